@@ -0,0 +1 @@
+"""Performance benchmarks for LLMGrep's chunking, context building, Semgrep and LLM stages."""
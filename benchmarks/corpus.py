@@ -0,0 +1,179 @@
+import os
+import re
+import random
+
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2, "G": 1024 ** 3, "GB": 1024 ** 3}
+
+# Vulnerable snippets with the Semgrep rule that matches them; {name} keeps functions distinct
+VULNERABLE_TEMPLATES = [
+    ("benchmark.sql-injection", "ERROR", "SQL query built with an f-string", '''def find_user_{name}(db, username):
+    query = f"SELECT * FROM users WHERE name = '{{username}}'"
+    return db.execute(query).fetchall()
+'''),
+    ("benchmark.shell-injection", "ERROR", "subprocess call with shell=True", '''def run_{name}(command):
+    import subprocess
+    return subprocess.run(command, shell=True, capture_output=True)
+'''),
+    ("benchmark.eval", "WARNING", "Use of eval on dynamic input", '''def calculate_{name}(expression):
+    return eval(expression)
+'''),
+    ("benchmark.pickle-load", "WARNING", "pickle.loads on untrusted data", '''def load_{name}(payload):
+    import pickle
+    return pickle.loads(payload)
+'''),
+]
+
+BENIGN_TEMPLATES = [
+    '''def total_{name}(items):
+    """Sum the price of every item."""
+    return sum(item["price"] * item.get("quantity", 1) for item in items)
+''',
+    '''class Cache_{name}:
+    def __init__(self):
+        self._entries = {{}}
+
+    def get(self, key, default=None):
+        return self._entries.get(key, default)
+
+    def set(self, key, value):
+        self._entries[key] = value
+''',
+    '''def normalize_{name}(text):
+    words = [word.strip().lower() for word in text.split()]
+    return " ".join(word for word in words if word)
+''',
+]
+
+# Local rules for the synthetic corpus, so Semgrep benchmarks never touch the registry
+BENCHMARK_RULES = """rules:
+- id: benchmark.sql-injection
+  languages: [python]
+  severity: ERROR
+  message: SQL query built with an f-string
+  pattern: |
+    $Q = f"..."
+    ...
+    $DB.execute($Q)
+- id: benchmark.shell-injection
+  languages: [python]
+  severity: ERROR
+  message: subprocess call with shell=True
+  pattern: subprocess.run(..., shell=True, ...)
+- id: benchmark.eval
+  languages: [python]
+  severity: WARNING
+  message: Use of eval on dynamic input
+  pattern: eval($X)
+- id: benchmark.pickle-load
+  languages: [python]
+  severity: WARNING
+  message: pickle.loads on untrusted data
+  pattern: pickle.loads($X)
+"""
+
+def parse_size(text):
+    """
+    Parse a human-readable size such as "1KB" or "10MB".
+
+    Args:
+        text (str): Size with an optional B/KB/MB/GB unit
+
+    Returns:
+        int: Size in bytes
+
+    Raises:
+        ValueError: If the size cannot be parsed
+    """
+    match = SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+def generate_code(size_bytes, seed=0, vulnerable_ratio=0.25, path="corpus.py"):
+    """
+    Generate Python code of about the given size with known vulnerabilities.
+
+    Args:
+        size_bytes (int): Approximate size of the code
+        seed (int): Random seed; the same seed always gives the same code
+        vulnerable_ratio (float): Share of generated functions that are vulnerable
+        path (str): Path recorded on the findings
+
+    Returns:
+        Tuple[str, dict]: The code, and Semgrep-shaped results for its
+        vulnerable functions
+    """
+    rng = random.Random(seed)
+    parts = []
+    results = []
+    size = 0
+    line = 1
+    index = 0
+
+    while size < size_bytes:
+        name = f"{seed}_{index}"
+        if rng.random() < vulnerable_ratio:
+            check_id, severity, message, template = rng.choice(VULNERABLE_TEMPLATES)
+            snippet = template.format(name=name)
+            results.append({
+                "check_id": check_id,
+                "path": path,
+                "start": {"line": line + 1, "col": 5},
+                "end": {"line": line + 1, "col": 40},
+                "extra": {"severity": severity, "message": message, "lines": snippet.splitlines()[1]}
+            })
+        else:
+            snippet = rng.choice(BENIGN_TEMPLATES).format(name=name)
+        snippet += "\n\n"
+        parts.append(snippet)
+        size += len(snippet.encode("utf-8"))
+        line += snippet.count("\n")
+        index += 1
+
+    return "".join(parts), {"results": results, "errors": []}
+
+def write_corpus(root, file_count, file_size, seed=0):
+    """
+    Write a multi-file synthetic corpus to disk.
+
+    Files are spread over subdirectories of at most 100 files each, as in
+    a real project tree.
+
+    Args:
+        root (str): Directory to write into
+        file_count (int): Number of files
+        file_size (int): Approximate size of each file in bytes
+        seed (int): Random seed for the first file; later files use the following seeds
+
+    Returns:
+        Tuple[dict, dict]: Mapping of file paths to code, and Semgrep-shaped
+        results for all files
+    """
+    files = {}
+    results = {"results": [], "errors": []}
+    for index in range(file_count):
+        directory = os.path.join(root, f"pkg_{index // 100:03d}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"module_{index:05d}.py")
+        code, file_results = generate_code(file_size, seed=seed + index, path=path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        files[path] = code
+        results["results"].extend(file_results["results"])
+    return files, results
+
+def write_rules(path):
+    """
+    Write the benchmark's local Semgrep rules.
+
+    Args:
+        path (str): File to write the rules to
+
+    Returns:
+        str: The path written
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(BENCHMARK_RULES)
+    return path
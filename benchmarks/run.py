@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from src.core.llm import create_llm
+from src.core.security import analyze_security, analyze_files
+from src.core.semgrep import scan_with_cache, get_semgrep_version
+from src.core.chat_context import build_chat_index, retrieve_chat_context
+from src.utils.text_chunk import analyze_code_in_chunks, chunk_chat_context, chunk_rule_context
+from src.utils.tokens import get_token_counter
+
+from .corpus import parse_size, generate_code, write_corpus, write_rules
+
+DEFAULT_SIZES = ["1KB", "100KB", "1MB", "10MB"]
+DEFAULT_FILE_COUNTS = [1, 100, 1000, 10000]
+QUICK_SIZES = ["1KB", "100KB"]
+QUICK_FILE_COUNTS = [1, 100]
+CHAT_QUERY = "Is the SQL query in find_user vulnerable to injection and how do I fix it?"
+
+def measure(fn, llm=None, setup=None, repeat=1, memory=True):
+    """
+    Time a benchmark stage and record its peak memory and LLM usage.
+
+    Wall time is the best of ``repeat`` untraced runs. Peak memory comes
+    from one extra run under tracemalloc, since tracing slows the code
+    down, and only covers Python allocations.
+
+    Args:
+        fn (callable): Stage to run, called without arguments
+        llm (FakeChatModel): Fake backend model whose usage is attributed to the stage
+        setup (callable): Called before every run, outside the timing
+        repeat (int): Number of timed runs
+        memory (bool): Whether to measure peak memory
+
+    Returns:
+        Tuple[dict, object]: Measurements, and the value returned by the last timed run
+    """
+    timings = []
+    usage = None
+    value = None
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        if llm is not None:
+            llm.reset_usage()
+        started = time.perf_counter()
+        value = fn()
+        timings.append(time.perf_counter() - started)
+        if usage is None and llm is not None:
+            usage = llm.usage()
+
+    peak = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    measurements = {
+        "wall_seconds": round(min(timings), 6),
+        "wall_seconds_all": [round(timing, 6) for timing in timings],
+        "peak_memory_bytes": peak,
+        "llm_calls": usage["calls"] if usage else 0,
+        "prompt_tokens": usage["prompt_tokens"] if usage else 0,
+        "completion_tokens": usage["completion_tokens"] if usage else 0
+    }
+    return measurements, value
+
+def bench_single_file(size, llm, args):
+    """Run the chunking, analysis and context stages on one generated file."""
+    code, semgrep_results = generate_code(parse_size(size), seed=args.seed)
+    corpus = {"corpus": f"{size} x 1 file", "bytes": len(code.encode("utf-8")), "files": 1}
+    records = []
+
+    def record(stage, fn, with_llm=False):
+        measurements, value = measure(fn, llm if with_llm else None, repeat=args.repeat, memory=not args.no_memory)
+        records.append({"stage": stage, **corpus, **measurements})
+        print_record(records[-1])
+        return value
+
+    record("chunking", lambda: analyze_code_in_chunks(code, language=".py"))
+
+    if args.skip_llm:
+        analysis = llm.respond(code[:4000])
+    else:
+        analysis = record(
+            "analyze_security",
+            lambda: analyze_security(semgrep_results, code, llm, max_concurrency=args.concurrency, language=".py"),
+            with_llm=True
+        )
+
+    def chat_context():
+        index = build_chat_index(code, analysis, semgrep_results, language=".py")
+        return retrieve_chat_context(index, CHAT_QUERY)
+
+    record("chat_index", chat_context)
+    record("chat_context_truncate", lambda: chunk_chat_context(code, analysis))
+    record("rule_context", lambda: chunk_rule_context(code, analysis))
+    return records
+
+def bench_multi_file(file_count, llm, args, work_dir):
+    """Run the Semgrep orchestration and per-file analysis stages on a generated tree."""
+    file_size = parse_size(args.file_size)
+    corpus_dir = os.path.join(work_dir, f"corpus_{file_count}")
+    files, semgrep_results = write_corpus(corpus_dir, file_count, file_size, seed=args.seed)
+    corpus = {
+        "corpus": f"{args.file_size} x {file_count} files",
+        "bytes": sum(len(code.encode("utf-8")) for code in files.values()),
+        "files": file_count
+    }
+    records = []
+
+    def record(stage, fn, with_llm=False, setup=None):
+        measurements, _ = measure(fn, llm if with_llm else None, setup=setup, repeat=args.repeat,
+                                  memory=not args.no_memory)
+        records.append({"stage": stage, **corpus, **measurements})
+        print_record(records[-1])
+
+    if args.skip_semgrep or shutil.which("semgrep") is None:
+        reason = "skipped" if args.skip_semgrep else "semgrep not installed"
+        records.append({"stage": "semgrep", **corpus, "skipped": reason})
+        print_record(records[-1])
+    else:
+        rules_path = write_rules(os.path.join(work_dir, "benchmark_rules.yaml"))
+        cache_dir = os.path.join(work_dir, f"semgrep_cache_{file_count}")
+
+        def clear_cache():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        def scan():
+            return scan_with_cache(corpus_dir, configs=[rules_path], cache_dir=cache_dir, jobs=args.jobs)
+
+        record("semgrep_cold", scan, setup=clear_cache)
+        # The last cold run left the cache filled, so every file is now a hit
+        record("semgrep_warm", scan)
+
+    if not args.skip_llm:
+        record(
+            "analyze_files",
+            lambda: analyze_files(files, semgrep_results, llm, max_workers=args.jobs, max_concurrency=args.concurrency),
+            with_llm=True
+        )
+    return records
+
+def print_record(record):
+    if record.get("skipped"):
+        print(f"{record['stage']:<24} {record['corpus']:<24} {record['skipped']}", file=sys.stderr)
+        return
+    peak = record["peak_memory_bytes"]
+    peak_text = f"{peak / 1024 ** 2:9.1f} MB" if peak is not None else "        -"
+    print(
+        f"{record['stage']:<24} {record['corpus']:<24} {record['wall_seconds']:10.4f} s {peak_text} "
+        f"{record['llm_calls']:6d} calls {record['prompt_tokens']:10d} prompt tokens",
+        file=sys.stderr
+    )
+
+def compare_results(baseline, current):
+    """
+    Compare two benchmark reports stage by stage.
+
+    Args:
+        baseline (dict): Earlier report
+        current (dict): New report
+
+    Returns:
+        list: One entry per stage and corpus present in both reports, with
+        the ratio of new to old wall time, peak memory and prompt tokens
+    """
+    def key(record):
+        return record["stage"], record["corpus"]
+
+    previous = {key(record): record for record in baseline.get("results", []) if not record.get("skipped")}
+    comparisons = []
+    for record in current.get("results", []):
+        old = previous.get(key(record))
+        if record.get("skipped") or old is None:
+            continue
+        entry = {"stage": record["stage"], "corpus": record["corpus"]}
+        for metric in ("wall_seconds", "peak_memory_bytes", "prompt_tokens"):
+            if old.get(metric) and record.get(metric) is not None:
+                entry[f"{metric}_ratio"] = round(record[metric] / old[metric], 3)
+        comparisons.append(entry)
+    return comparisons
+
+def main(argv=None):
+    """Command line entry point for the benchmark suite."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark chunking, context building, Semgrep orchestration and LLM fan-out"
+    )
+    parser.add_argument("--sizes", nargs="+", default=None, help="Single-file corpus sizes, e.g. 1KB 10MB")
+    parser.add_argument("--files", nargs="+", type=int, default=None, help="File counts for multi-file corpora")
+    parser.add_argument("--file-size", default="1KB", help="Size of each file in multi-file corpora")
+    parser.add_argument("--quick", action="store_true", help="Only the small corpora")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM seconds per call")
+    parser.add_argument("--latency-per-token", type=float, default=0.0, help="Fake LLM seconds per prompt token")
+    parser.add_argument("--response-tokens", type=int, default=200, help="Approximate fake LLM response length")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chunk requests in flight per file")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 4,
+                        help="Files analyzed in parallel and Semgrep worker processes")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the best is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpora")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--skip-llm", action="store_true", help="Skip the LLM analysis stages")
+    parser.add_argument("--skip-semgrep", action="store_true", help="Skip the Semgrep stages")
+    parser.add_argument("--output", "-o", help="Write the JSON report to a file instead of stdout")
+    parser.add_argument("--compare", metavar="REPORT", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    file_counts = args.files or (QUICK_FILE_COUNTS if args.quick else DEFAULT_FILE_COUNTS)
+    # Uncached, so every run pays the simulated latency
+    llm = create_llm(
+        "fake",
+        model="fake",
+        latency=args.latency,
+        latency_per_token=args.latency_per_token,
+        response_tokens=args.response_tokens
+    )
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="llmgrep_bench_")
+    try:
+        for size in sizes:
+            results.extend(bench_single_file(size, llm, args))
+        for file_count in file_counts:
+            results.extend(bench_multi_file(file_count, llm, args, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "tokenizer": type(get_token_counter()).__name__,
+            "semgrep": get_semgrep_version() if shutil.which("semgrep") else None
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results
+    }
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare_results(json.load(f), report)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
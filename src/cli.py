@@ -0,0 +1,264 @@
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .core.llm import initialize_llm, available_backends, LLMInitError
+from .core.security import analyze_security
+from .core.vulnerabilities import extract_findings
+from .core.semgrep import scan_with_cache, SemgrepError
+from .core.rule_bundle import get_scan_ruleset, describe_ruleset, RULE_SOURCES, RULE_SOURCE_DEFAULT
+from .core.findings import compact_finding, findings_for_path, severity_level, SEVERITY_LEVELS
+from .core.file_utils import iter_code_files
+from .core.git_diff import get_changed_hunks, GitDiffError
+
+EXIT_OK = 0
+EXIT_FINDINGS = 1
+EXIT_ERROR = 2
+
+LLM_SEVERITY_PATTERN = re.compile(r"SEVERITY\W*(Critical|High|Medium|Low)", re.IGNORECASE)
+
+def collect_files(paths):
+    """
+    Expand files and directories into the list of supported source files.
+
+    Args:
+        paths (list): Files or directories given on the command line
+
+    Returns:
+        list: Paths of the files to scan
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        else:
+            files.extend(file_path for file_path, _ in iter_code_files(path))
+    return files
+
+def collect_changed_files(paths, diff_base):
+    """
+    Find the files under the given paths that changed since a git ref.
+
+    Args:
+        paths (list): Files or directories given on the command line
+        diff_base (str): Git ref to diff against
+
+    Returns:
+        dict: Mapping of changed file paths to their changed line ranges
+    """
+    repo_path = paths[0] if os.path.isdir(paths[0]) else os.path.dirname(os.path.abspath(paths[0]))
+    changed = get_changed_hunks(diff_base, repo_path)
+    roots = [os.path.abspath(path) for path in paths]
+    return {
+        file_path: ranges for file_path, ranges in changed.items()
+        if any(file_path == root or file_path.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+    }
+
+def analyze_file(file_path, semgrep_results, llm, max_concurrency, line_ranges=None):
+    """
+    Build the report entry for a single file.
+
+    Args:
+        file_path (str): Path of the file
+        semgrep_results (dict): Results from the Semgrep scan of all files
+        llm: Language Model for analysis, or None to skip LLM analysis
+        max_concurrency (int): Maximum chunk requests in flight for this file
+        line_ranges (list): Changed line ranges; only overlapping code is sent to the LLM
+
+    Returns:
+        dict: Semgrep findings, LLM analysis and structured LLM findings, and
+        the highest severity for the file
+    """
+    file_results = findings_for_path(semgrep_results, file_path)
+    severities = [severity_level(finding) for finding in file_results["results"]]
+    entry = {
+        "path": file_path,
+        "findings": [compact_finding(finding) for finding in file_results["results"]],
+        "llm_analysis": "",
+        "llm_findings": [],
+        "error": None
+    }
+    if line_ranges is not None:
+        entry["changed_lines"] = line_ranges
+
+    if llm is not None:
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                code_content = f.read()
+            analysis = analyze_security(
+                file_results, code_content, llm,
+                max_concurrency=max_concurrency,
+                language=os.path.splitext(file_path)[1],
+                line_ranges=line_ranges
+            )
+            entry["llm_analysis"], findings = extract_findings(analysis, file_path)
+            entry["llm_findings"] = [finding.to_dict() for finding in findings]
+            if findings:
+                severities.extend(finding.severity for finding in findings)
+            else:
+                # No structured findings: fall back to the severities named in the report
+                severities.extend(match.lower() for match in LLM_SEVERITY_PATTERN.findall(entry["llm_analysis"]))
+        except Exception as e:
+            entry["error"] = str(e)
+
+    entry["max_severity"] = min(severities, key=SEVERITY_LEVELS.index) if severities else None
+    return entry
+
+def render_markdown(report):
+    """
+    Render a scan report as markdown.
+
+    Args:
+        report (dict): Report produced by ``run_scan``
+
+    Returns:
+        str: Markdown-formatted report
+    """
+    lines = [
+        "# Security Analysis Report",
+        f"Generated: {report['generated']}",
+        "",
+        f"Ruleset: {describe_ruleset(report['ruleset'])}",
+        f"Files scanned: {len(report['files'])}" + (f" (changed since {report['diff_base']})" if report['diff_base'] else ""),
+        ""
+    ]
+    for entry in report["files"]:
+        lines.append(f"## {entry['path']}")
+        lines.append(f"**Highest severity:** {entry['max_severity'] or 'none'}")
+        lines.append("")
+        for finding in entry["findings"]:
+            lines.append(f"- `{finding['check_id']}` ({finding['severity']}, line {finding['line']}): {finding['message']}")
+        if entry["llm_analysis"]:
+            lines.extend(["", entry["llm_analysis"]])
+        if entry["error"]:
+            lines.extend(["", f"❌ Error during LLM analysis: {entry['error']}"])
+        lines.append("")
+    return "\n".join(lines)
+
+def run_scan(paths, jobs=4, use_llm=True, model="deepseek-r1-distill-llama-70b", temperature=0,
+             max_concurrency=4, metrics_enabled=False, diff_base=None, rule_source=RULE_SOURCE_DEFAULT,
+             llm_backend=None):
+    """
+    Scan files with Semgrep and analyze each file with the LLM in parallel.
+
+    With ``diff_base``, only files changed since that git ref are scanned
+    and only the code around the changed hunks is sent to the LLM.
+
+    Args:
+        paths (list): Files or directories to scan
+        jobs (int): Number of files analyzed in parallel
+        use_llm (bool): Whether to run the LLM analysis
+        model (str): Name of the model to use
+        temperature (float): Controls randomness of output
+        max_concurrency (int): Maximum chunk requests in flight per file
+        metrics_enabled (bool): Whether to send Semgrep metrics
+        diff_base (str): Git ref for incremental scans, or None for a full scan
+        rule_source (str): Run the default ruleset, the custom rule pack, or both
+        llm_backend (str): LLM backend to use instead of the configured one
+
+    Returns:
+        dict: Report with the ruleset and one entry per file
+    """
+    if diff_base:
+        changed = collect_changed_files(paths, diff_base)
+        files = list(changed)
+    else:
+        changed = {}
+        files = collect_files(paths)
+    configs, ruleset = get_scan_ruleset(rule_source=rule_source)
+    semgrep_results = scan_with_cache(files, configs=configs, metrics_enabled=metrics_enabled, jobs=jobs) if files else {"results": []}
+    llm = initialize_llm(model=model, temperature=temperature, backend=llm_backend) if use_llm else None
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        entries = list(executor.map(
+            lambda file_path: analyze_file(file_path, semgrep_results, llm, max_concurrency, changed.get(file_path)),
+            files
+        ))
+
+    return {
+        "generated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "ruleset": ruleset,
+        "diff_base": diff_base,
+        "files": entries
+    }
+
+def exit_code_for(report, fail_on):
+    """
+    Choose the process exit code for a report.
+
+    Args:
+        report (dict): Report produced by ``run_scan``
+        fail_on (str): Lowest severity that fails the scan, or "none"
+
+    Returns:
+        int: EXIT_FINDINGS if any file reaches the threshold, EXIT_ERROR if
+        an analysis failed, EXIT_OK otherwise
+    """
+    if any(entry["error"] for entry in report["files"]):
+        return EXIT_ERROR
+    if fail_on != "none":
+        threshold = SEVERITY_LEVELS.index(fail_on)
+        for entry in report["files"]:
+            if entry["max_severity"] and SEVERITY_LEVELS.index(entry["max_severity"]) <= threshold:
+                return EXIT_FINDINGS
+    return EXIT_OK
+
+def main(argv=None):
+    """Command line entry point for headless batch scans."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Scan files with Semgrep and LLM analysis without the Streamlit UI"
+    )
+    parser.add_argument("paths", nargs="+", help="Files or directories to scan")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 4, help="Files analyzed in parallel")
+    parser.add_argument("--format", choices=["json", "markdown"], default="json", help="Report format")
+    parser.add_argument("--output", "-o", help="Write the report to a file instead of stdout")
+    parser.add_argument("--fail-on", choices=SEVERITY_LEVELS + ["none"], default="high",
+                        help="Exit with code 1 if a finding of at least this severity is found")
+    parser.add_argument("--no-llm", action="store_true", help="Only run Semgrep")
+    parser.add_argument("--model", default="deepseek-r1-distill-llama-70b", help="LLM model to use")
+    parser.add_argument("--llm-backend", choices=available_backends(),
+                        help="LLM backend, overriding LLMGREP_LLM_BACKEND (default: groq)")
+    parser.add_argument("--temperature", type=float, default=0.0, help="LLM temperature")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Chunk requests in flight per file")
+    parser.add_argument("--metrics", action="store_true", help="Enable Semgrep metrics")
+    parser.add_argument("--diff-base", metavar="REF",
+                        help="Only scan files and hunks changed since this git ref (e.g. origin/main)")
+    parser.add_argument("--rules", choices=RULE_SOURCES, default=RULE_SOURCE_DEFAULT,
+                        help="Scan with the default ruleset, the custom rule pack in configs/, or both")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_scan(
+            args.paths,
+            jobs=args.jobs,
+            use_llm=not args.no_llm,
+            model=args.model,
+            temperature=args.temperature,
+            max_concurrency=args.max_concurrency,
+            metrics_enabled=args.metrics,
+            diff_base=args.diff_base,
+            rule_source=args.rules,
+            llm_backend=args.llm_backend
+        )
+    except (SemgrepError, LLMInitError, GitDiffError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        if getattr(e, "stderr", ""):
+            print(e.stderr, file=sys.stderr)
+        return EXIT_ERROR
+
+    output = json.dumps(report, indent=2) if args.format == "json" else render_markdown(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    return exit_code_for(report, args.fail_on)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,16 @@
-from .llm import initialize_llm
+from .llm import initialize_llm, reset_llm_clients, create_llm, register_backend, get_llm_backend
 from .security import analyze_security
-from .file_utils import save_uploaded_file, cleanup_temp_files, save_code_to_temp_file
+from .file_utils import save_uploaded_file, cleanup_temp_files, save_code_to_temp_file, iter_code_files
 
 __all__ = [
     'initialize_llm',
+    'reset_llm_clients',
+    'create_llm',
+    'register_backend',
+    'get_llm_backend',
     'analyze_security',
     'save_uploaded_file',
     'cleanup_temp_files',
-    'save_code_to_temp_file'
+    'save_code_to_temp_file',
+    'iter_code_files'
 ]
@@ -0,0 +1,166 @@
+import re
+
+from .findings import group_findings
+from ..utils.text_chunk import iter_code_chunks
+from ..utils.tokens import count_tokens, truncate_to_tokens
+from ..utils.retrieval import BM25Index
+
+# Token budget for the code and analysis sent with each chat query
+CHAT_CONTEXT_TOKENS = 1500
+# Number of matching regions sent per query, and size of the analysis header always sent
+CHAT_TOP_K = 6
+CHAT_HEADER_TOKENS = 150
+# Size of the code regions and analysis sections the index retrieves
+CHAT_REGION_TOKENS = 250
+# Token budget for the recent turns resent verbatim, and cap on the summary of older ones
+CHAT_HISTORY_TOKENS = 1000
+CHAT_SUMMARY_TOKENS = 300
+
+FINDINGS_LABEL = "Semgrep findings:\n"
+
+SECTION_START_PATTERN = re.compile(r"^(?=#{1,6} |\[Analysis Part |\d+\. \*{0,2}VULNERABILITY)", re.MULTILINE)
+
+def _analysis_sections(llm_analysis):
+    """Split an analysis on its headings, then on paragraphs for sections that are still too long."""
+    sections = []
+    for section in SECTION_START_PATTERN.split(llm_analysis or ""):
+        if not section.strip():
+            continue
+        if count_tokens(section) <= CHAT_REGION_TOKENS:
+            sections.append(section.strip())
+            continue
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", section):
+            if current and count_tokens(current) + count_tokens(paragraph) > CHAT_REGION_TOKENS:
+                sections.append(current.strip())
+                current = ""
+            current += paragraph + "\n\n"
+        if current.strip():
+            sections.append(current.strip())
+    return sections
+
+def _format_finding_group(group):
+    lines = ", ".join(str(occurrence["line"]) for occurrence in group["occurrences"])
+    label = "lines" if group["count"] > 1 else "line"
+    return f"- `{group['check_id']}` ({group['severity']}, {label} {lines}): {group['message']}"
+
+def build_chat_index(code_snippet, llm_analysis, semgrep_results=None, language=None):
+    """
+    Build a BM25 index over the code regions, analysis sections and findings of a scan.
+
+    Build it once per scan and reuse it for every chat query.
+
+    Args:
+        code_snippet (str): Code that was analyzed
+        llm_analysis (str): LLM's security analysis
+        semgrep_results (dict): Results from Semgrep scan, optional
+        language (str): File extension hint used to find function/class boundaries
+
+    Returns:
+        BM25Index: Index whose documents carry ``kind``, ``order`` and ``tokens``
+    """
+    documents = []
+
+    if code_snippet:
+        for chunk, (start_line, end_line) in iter_code_chunks(code_snippet, chunk_size=CHAT_REGION_TOKENS,
+                                                              language=language):
+            documents.append({"kind": "code", "text": chunk, "start_line": start_line, "end_line": end_line})
+
+    for section in _analysis_sections(llm_analysis):
+        documents.append({"kind": "analysis", "text": section})
+
+    for group in group_findings((semgrep_results or {}).get("results", [])):
+        documents.append({
+            "kind": "finding",
+            "text": _format_finding_group(group),
+            # Index the matched code too, so questions about it find the finding
+            "search_text": f"{group['check_id']} {group['message']} {group['snippet']}"
+        })
+
+    for order, document in enumerate(documents):
+        document["order"] = order
+        document["tokens"] = count_tokens(document["text"])
+        document.setdefault("search_text", document["text"])
+
+    return BM25Index(documents, text_field="search_text")
+
+def _render_document(document):
+    if document["kind"] == "code":
+        return f"# Lines {document['start_line']}-{document['end_line']}\n{document['text']}"
+    return document["text"]
+
+def retrieve_chat_context(index, query, token_budget=CHAT_CONTEXT_TOKENS, top_k=CHAT_TOP_K):
+    """
+    Select the code regions, analysis sections and findings relevant to a query.
+
+    Only the ``top_k`` best matches are sent, plus a short header from the
+    start of the analysis so the model knows what was found. Documents
+    that don't match the query are never added to fill the budget, and
+    the region headers and labels count against it.
+
+    Args:
+        index (BM25Index): Index from build_chat_index
+        query (str): Chat query, optionally with recent conversation appended
+        token_budget (int): Maximum tokens of context to return
+        top_k (int): Maximum number of matching documents to include
+
+    Returns:
+        Tuple[str, str]: Code context and analysis context for the prompt
+    """
+    analysis_documents = [document for document in index.documents if document["kind"] == "analysis"]
+    header = ""
+    if analysis_documents:
+        header = truncate_to_tokens(analysis_documents[0]["text"], min(CHAT_HEADER_TOKENS, token_budget))
+    used = count_tokens(header) if header else 0
+
+    selected = []
+    findings_label_tokens = count_tokens(FINDINGS_LABEL)
+    for _, document in index.search(query, k=top_k):
+        if header and document["kind"] == "analysis" and document["order"] == analysis_documents[0]["order"]:
+            # Already sent, possibly shortened, as the header
+            continue
+        # Plus the blank line joining it to its neighbours
+        cost = count_tokens(_render_document(document)) + 2
+        if document["kind"] == "finding" and not any(item["kind"] == "finding" for item in selected):
+            cost += findings_label_tokens
+        if used + cost > token_budget:
+            continue
+        selected.append(document)
+        used += cost
+
+    selected.sort(key=lambda document: document["order"])
+    code_context = "\n\n".join(_render_document(document) for document in selected if document["kind"] == "code")
+
+    analysis_parts = ([header] if header else []) + [
+        document["text"] for document in selected if document["kind"] == "analysis"
+    ]
+    analysis_context = "\n\n".join(analysis_parts)
+    findings = [document["text"] for document in selected if document["kind"] == "finding"]
+    if findings:
+        analysis_context += ("\n\n" if analysis_context else "") + FINDINGS_LABEL + "\n".join(findings)
+
+    return code_context, analysis_context
+
+def split_chat_history(chat_history, token_budget=CHAT_HISTORY_TOKENS):
+    """
+    Split a conversation into older turns and a window of recent turns.
+
+    The window is the longest suffix of the conversation that fits the
+    token budget; everything before it is meant to be summarized.
+
+    Args:
+        chat_history (list): Messages as dicts with ``role`` and ``content``
+        token_budget (int): Maximum tokens of recent messages to keep verbatim
+
+    Returns:
+        Tuple[list, list]: Older messages and recent messages
+    """
+    used = 0
+    start = len(chat_history)
+    while start > 0:
+        tokens = count_tokens(chat_history[start - 1]["content"])
+        if used + tokens > token_budget:
+            break
+        used += tokens
+        start -= 1
+    return chat_history[:start], chat_history[start:]
@@ -0,0 +1,130 @@
+import re
+import json
+import time
+import hashlib
+import threading
+
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from ..utils.tokens import count_tokens
+
+START_LINE_PATTERN = re.compile(r"starting at line (\d+)")
+CHECK_ID_PATTERN = re.compile(r'"check_id":\s*"([^"]+)"')
+
+# Vulnerabilities the fake model picks from, keyed off a hash of the prompt
+FAKE_VULNERABILITIES = [
+    ("SQL Injection", "CWE-89", "high"),
+    ("Command Injection", "CWE-78", "critical"),
+    ("Insecure Deserialization", "CWE-502", "high"),
+    ("Hardcoded Secret", "CWE-798", "medium"),
+    ("Use of eval", "CWE-95", "high"),
+    ("Weak Hash", "CWE-328", "low")
+]
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic in-process chat model for offline runs, tests and benchmarks.
+
+    The same prompt always gets the same answer: a short markdown report
+    followed by a JSON findings block, as the analysis prompt requests.
+    Each call sleeps for ``latency`` plus ``latency_per_token`` seconds
+    per prompt token to stand in for network and inference time, and the
+    prompt and completion tokens of every call are tallied in ``usage()``.
+    """
+
+    latency: float = 0.0
+    latency_per_token: float = 0.0
+    response_tokens: int = 200
+
+    _usage: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+    _usage_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self):
+        return "llmgrep-fake"
+
+    @property
+    def _identifying_params(self):
+        return {
+            "latency": self.latency,
+            "latency_per_token": self.latency_per_token,
+            "response_tokens": self.response_tokens
+        }
+
+    def respond(self, prompt):
+        """
+        Build the deterministic answer to a prompt, without latency or usage accounting.
+
+        Args:
+            prompt (str): Rendered prompt text
+
+        Returns:
+            str: Markdown report followed by a JSON findings block
+        """
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        title, classification, severity = FAKE_VULNERABILITIES[digest[0] % len(FAKE_VULNERABILITIES)]
+        start_match = START_LINE_PATTERN.search(prompt)
+        line = (int(start_match.group(1)) if start_match else 1) + digest[1] % 20
+        check_ids = sorted(set(CHECK_ID_PATTERN.findall(prompt)))
+
+        finding = {
+            "title": title,
+            "classification": classification,
+            "severity": severity,
+            "lines": [line],
+            "risk": f"Untrusted input reaches a sensitive sink near line {line}.",
+            "fix": "Validate the input and use a safe API instead."
+        }
+        report = [
+            f"1. **VULNERABILITY**: {title}",
+            f"   **CLASSIFICATION**: {classification}",
+            f"   **SEVERITY**: {severity.capitalize()}",
+            f"   **RISK**: {finding['risk']}",
+            f"   **FIX**: {finding['fix']}"
+        ]
+        if check_ids:
+            report.append(f"   Related Semgrep findings: {', '.join(check_ids)}")
+        # Pad to roughly response_tokens so completion size is controllable
+        filler = "The surrounding code was reviewed for further issues."
+        while count_tokens("\n".join(report)) < self.response_tokens:
+            report.append(filler)
+        report.append(f"```json\n{json.dumps([finding])}\n```")
+        return "\n".join(report)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(
+            message.content if isinstance(message.content, str) else str(message.content)
+            for message in messages
+        )
+        prompt_tokens = count_tokens(prompt)
+        text = self.respond(prompt)
+
+        delay = self.latency + self.latency_per_token * prompt_tokens
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._usage_lock:
+            self._usage["calls"] += 1
+            self._usage["prompt_tokens"] += prompt_tokens
+            self._usage["completion_tokens"] += count_tokens(text)
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def usage(self):
+        """
+        Return the calls and tokens seen since the last reset.
+
+        Returns:
+            dict: ``calls``, ``prompt_tokens`` and ``completion_tokens``
+        """
+        with self._usage_lock:
+            return dict(self._usage)
+
+    def reset_usage(self):
+        """Zero the usage counters, e.g. between benchmark stages."""
+        with self._usage_lock:
+            for key in self._usage:
+                self._usage[key] = 0
@@ -1,29 +1,29 @@
 import os
+import re
 import tempfile
 from datetime import datetime
+from functools import partial
 
-def save_uploaded_file(uploaded_file):
+from .workspace import materialize_file, WORKSPACE_DIR
+
+# File types accepted by the uploader and collected from folders
+SUPPORTED_EXTENSIONS = ["py", "js", "java", "cpp", "c", "cs", "php", "rb", "go", "ts", "html", "css", "sql"]
+
+def save_uploaded_file(uploaded_file, workspace_dir=WORKSPACE_DIR):
     """
-    Save an uploaded file to a temporary directory.
+    Save an uploaded file to the content-addressed upload workspace.
+    
+    Uploading the same content again reuses the stored file instead of
+    writing it a second time.
     
     Args:
         uploaded_file: Streamlit uploaded file object
+        workspace_dir (str): Workspace to save into, e.g. the session's own
     
     Returns:
         str: Path to the saved file
     """
-    # Create temp dir if it doesn't exist
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Generate a unique file path
-    file_path = os.path.join(temp_dir, uploaded_file.name)
-    
-    # Save the file
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    
-    return file_path
+    return materialize_file(uploaded_file.name, uploaded_file.getvalue(), workspace_dir)
 
 def read_file_content(file_path):
     """
@@ -36,65 +36,193 @@ def read_file_content(file_path):
         str: File content or error message
     """
     try:
-        with open(file_path, 'r') as f:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             return f.read()
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
-def get_files_from_folder(folder_path, max_files=5):
+def _gitignore_pattern_to_regex(pattern):
+    """Translate a single .gitignore glob into a regex over '/'-separated paths."""
+    # Patterns without a slash (other than a trailing one) match at any depth
+    if "/" not in pattern:
+        pattern = "**/" + pattern
+    pattern = pattern.lstrip("/")
+
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + "$")
+
+def _load_gitignore(directory):
+    """Parse the .gitignore in a directory into (regex, negate, dir_only) rules."""
+    rules = []
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            rules.append((_gitignore_pattern_to_regex(line), negate, dir_only))
+    return rules
+
+def _is_ignored(path, is_dir, ignore_scopes):
+    """Apply the .gitignore rules of every enclosing directory, last match wins."""
+    ignored = False
+    for base_dir, rules in ignore_scopes:
+        relative = os.path.relpath(path, base_dir).replace(os.sep, "/")
+        for regex, negate, dir_only in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                ignored = not negate
+    return ignored
+
+def _is_binary(path, sniff_bytes=8192):
+    """Treat files containing NUL bytes in their first block as binary."""
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(sniff_bytes)
+    except OSError:
+        return True
+
+def iter_code_files(root, extensions=SUPPORTED_EXTENSIONS, max_file_size=1024 * 1024,
+                    respect_gitignore=True):
+    """
+    Recursively walk a folder and stream the code files it contains.
+
+    The walk uses ``os.scandir``, skips hidden entries and ``.git``,
+    honors ``.gitignore`` files, and leaves out files that are too large,
+    binary, or not in the extension whitelist. File contents are not read
+    until requested, so memory stays flat on very large trees.
+
+    Args:
+        root (str): Folder (or single file) to walk
+        extensions (list): Allowed extensions without the dot, or None for all
+        max_file_size (int): Largest file size in bytes to include, or None
+        respect_gitignore (bool): Whether to honor .gitignore files
+
+    Yields:
+        Tuple[str, Callable[[], str]]: File path and a zero-argument callable
+        that reads the file's content
+    """
+    suffixes = tuple(f".{ext}" for ext in extensions) if extensions else None
+
+    def accept(path, size):
+        if suffixes and not path.lower().endswith(suffixes):
+            return False
+        if max_file_size is not None and size > max_file_size:
+            return False
+        return not _is_binary(path)
+
+    if os.path.isfile(root):
+        if accept(root, os.path.getsize(root)):
+            yield root, partial(read_file_content, root)
+        return
+
+    # Iterative depth-first walk; each entry carries the .gitignore scopes above it
+    stack = [(root, [])]
+    while stack:
+        directory, ignore_scopes = stack.pop()
+        if respect_gitignore:
+            rules = _load_gitignore(directory)
+            if rules:
+                ignore_scopes = ignore_scopes + [(directory, rules)]
+
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+                if respect_gitignore and _is_ignored(entry.path, is_dir, ignore_scopes):
+                    continue
+                if is_dir:
+                    subdirectories.append((entry.path, ignore_scopes))
+                elif accept(entry.path, entry.stat(follow_symlinks=False).st_size):
+                    yield entry.path, partial(read_file_content, entry.path)
+            except OSError:
+                continue
+
+        # Reverse so subdirectories are visited in name order
+        stack.extend(reversed(subdirectories))
+
+def get_files_from_folder(folder_path, max_files=None):
     """
-    Collect code files from a folder.
+    Collect code files from a folder, recursively.
     
     Args:
         folder_path (str): Path to the folder
-        max_files (int): Maximum number of files to collect
+        max_files (int): Maximum number of files to collect, or None for all
     
     Returns:
         dict: Mapping of file paths to their contents
     """
     code_files = {}
-    file_count = 0
     
-    for file in os.listdir(folder_path):
-        if file_count >= max_files:
+    for file_path, read_content in iter_code_files(folder_path):
+        if max_files is not None and len(code_files) >= max_files:
             break
-        
-        file_path = os.path.join(folder_path, file)
-        if os.path.isfile(file_path) and not file.startswith('.'):
-            try:
-                with open(file_path, 'r') as f:
-                    code_files[file_path] = f.read()
-                    file_count += 1
-            except:
-                pass
+        code_files[file_path] = read_content()
     
     return code_files
 
-def save_code_to_temp_file(code_content, file_extension=".py"):
+def save_code_to_temp_file(code_content, file_extension=".py", workspace_dir=WORKSPACE_DIR):
     """
-    Save code content to a temporary file.
+    Save code content to the content-addressed upload workspace.
+    
+    The path only changes when the code does, so Streamlit reruns don't
+    write a new file each time.
     
     Args:
         code_content (str): Code content to save
         file_extension (str): File extension to use (default: .py)
+        workspace_dir (str): Workspace to save into, e.g. the session's own
     
     Returns:
-        str: Path to the saved temporary file
+        str: Path to the saved file
     """
-    # Create temp dir if it doesn't exist
-    temp_dir = "temp_code"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Generate a unique filename using timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"code_{timestamp}{file_extension}"
-    file_path = os.path.join(temp_dir, filename)
-    
-    # Save the code content
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(code_content)
-    
-    return file_path
+    return materialize_file(f"code{file_extension}", code_content.encode("utf-8"), workspace_dir)
 
 def generate_report(code_content, llm_analysis):
     """
@@ -119,14 +247,54 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 {llm_analysis}
 """
 
-def cleanup_temp_files():
+def generate_multi_file_report(file_analyses):
+    """
+    Generate a markdown report covering several analyzed files.
+    
+    Args:
+        file_analyses (dict): Mapping of file names to dicts with
+            ``llm_analysis`` and ``error`` entries
+    
+    Returns:
+        str: Markdown-formatted report
+    """
+    sections = []
+    for file_name, result in file_analyses.items():
+        body = result.get('llm_analysis') or ""
+        if result.get('error'):
+            body = f"❌ Error during LLM analysis: {result['error']}"
+        sections.append(f"### {file_name}\n\n{body}")
+    
+    file_list = "\n".join(f"- {file_name}" for file_name in file_analyses)
+    analysis = "\n\n".join(sections)
+    
+    return f"""# Security Analysis Report
+Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+## Files Analyzed
+{file_list}
+
+## Security Analysis
+{analysis}
+"""
+
+def cleanup_temp_files(workspace_dir=None):
     """
     Clean up temporary files and directories.
+    
+    Args:
+        workspace_dir (str): Only clean this session workspace, leaving other
+            sessions' files in place; clean all shared directories if None
     """
     import shutil
+    if workspace_dir:
+        shutil.rmtree(workspace_dir, ignore_errors=True)
+        os.makedirs(workspace_dir, exist_ok=True)
+        return
+    
     try:
-        # List of directories to clean
-        dirs_to_clean = ["temp_code", "temp_uploads", "results", "configs"]
+        # List of directories to clean; configs/ holds the saved custom rule pack and is kept
+        dirs_to_clean = ["temp_code", "temp_uploads", "results"]
         
         for dir_path in dirs_to_clean:
             if os.path.exists(dir_path):
@@ -139,7 +307,6 @@ def cleanup_temp_files():
         os.makedirs("temp_code", exist_ok=True)
         os.makedirs("temp_uploads", exist_ok=True)
         os.makedirs("results", exist_ok=True)
-        os.makedirs("configs", exist_ok=True)
         
     except Exception as e:
-        raise Exception(f"Error during cleanup: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error during cleanup: {str(e)}")
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+
+# Semgrep severities mapped onto the LLM's scale, most severe first
+SEVERITY_LEVELS = ["critical", "high", "medium", "low"]
+SEMGREP_SEVERITY_MAP = {"ERROR": "high", "WARNING": "medium", "INFO": "low"}
+
+QUOTED_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|`[^`]*`")
+NUMBER_PATTERN = re.compile(r"\b\d+\b")
+
+def compact_finding(finding):
+    """
+    Reduce a raw Semgrep finding to the fields the LLM needs.
+
+    Args:
+        finding (dict): Single entry from Semgrep's ``results`` list
+
+    Returns:
+        dict: Finding with only check_id, severity, line and message
+    """
+    extra = finding.get('extra', {})
+    return {
+        "check_id": finding.get('check_id', 'unknown'),
+        "severity": extra.get('severity', finding.get('severity', 'UNKNOWN')),
+        "line": finding.get('start', {}).get('line'),
+        "message": extra.get('message', '')
+    }
+
+def project_findings(semgrep_results, start_line, end_line):
+    """
+    Select the Semgrep findings whose lines overlap a source line range.
+
+    Args:
+        semgrep_results (dict): Results from Semgrep scan
+        start_line (int): First line of the range (1-based, inclusive)
+        end_line (int): Last line of the range (1-based, inclusive)
+
+    Returns:
+        list: Entries from Semgrep's ``results`` list that fall inside the range
+    """
+    projected = []
+    for finding in (semgrep_results or {}).get('results', []):
+        first = finding.get('start', {}).get('line')
+        if first is None:
+            continue
+        last = finding.get('end', {}).get('line', first)
+        if first <= end_line and last >= start_line:
+            projected.append(finding)
+    return projected
+
+def format_findings(findings):
+    """
+    Serialize Semgrep findings for inclusion in a prompt.
+
+    Findings are grouped as in ``group_findings``, so a rule that fires on
+    many lines costs the prompt a single message listing all its lines.
+    Entries are ordered by severity.
+
+    Args:
+        findings (list): Entries from Semgrep's ``results`` list, e.g. from project_findings
+
+    Returns:
+        str: Minimal JSON, or a note when there are no findings
+    """
+    if not findings:
+        return "No Semgrep findings in this section."
+
+    entries = [
+        {
+            "check_id": group["check_id"],
+            "severity": group["severity"],
+            "lines": [occurrence["line"] for occurrence in group["occurrences"]],
+            "message": group["message"]
+        }
+        for group in group_findings(findings)
+    ]
+    return json.dumps(entries, separators=(",", ":"), ensure_ascii=False)
+
+def findings_for_path(semgrep_results, file_path):
+    """
+    Restrict Semgrep results to the findings reported for one file.
+
+    Args:
+        semgrep_results (dict): Results from Semgrep scan
+        file_path (str): Path of the file, as passed to Semgrep
+
+    Returns:
+        dict: Results dict containing only that file's findings
+    """
+    target = os.path.normpath(file_path)
+    return {
+        "results": [
+            finding for finding in (semgrep_results or {}).get('results', [])
+            if os.path.normpath(finding.get('path', '')) == target
+        ]
+    }
+
+def severity_level(finding):
+    """
+    Map a Semgrep finding's severity onto the critical/high/medium/low scale.
+
+    Args:
+        finding (dict): Single entry from Semgrep's ``results`` list
+
+    Returns:
+        str: One of SEVERITY_LEVELS
+    """
+    severity = finding.get('extra', {}).get('severity', finding.get('severity', 'INFO'))
+    return SEMGREP_SEVERITY_MAP.get(str(severity).upper(), "low")
+
+def message_template(message):
+    """
+    Reduce a finding message to its template by masking the parts that vary.
+
+    Quoted strings and numbers are replaced, so messages that differ only
+    in the variable or value they mention fall into the same group.
+
+    Args:
+        message (str): Semgrep finding message
+
+    Returns:
+        str: Message with variable parts masked
+    """
+    masked = QUOTED_PATTERN.sub("<…>", message or "")
+    return NUMBER_PATTERN.sub("<n>", " ".join(masked.split()))
+
+def group_findings(results):
+    """
+    Group findings that share a check_id and message template.
+
+    Each group keeps one representative message and snippet plus the
+    location of every occurrence. Groups are ranked by severity, then by
+    number of occurrences.
+
+    Args:
+        results (list): Entries from Semgrep's ``results`` list
+
+    Returns:
+        list: Groups as dicts with check_id, severity, level, message,
+        snippet, count and occurrences (dicts with path and line)
+    """
+    groups = {}
+    for finding in results or []:
+        compact = compact_finding(finding)
+        key = (compact["check_id"], message_template(compact["message"]))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "check_id": compact["check_id"],
+                "severity": compact["severity"],
+                "level": severity_level(finding),
+                "message": compact["message"],
+                "snippet": finding.get('extra', {}).get('lines', ''),
+                "count": 0,
+                "occurrences": []
+            }
+        group["count"] += 1
+        group["occurrences"].append({"path": finding.get('path'), "line": compact["line"]})
+
+    return sorted(groups.values(), key=lambda group: (SEVERITY_LEVELS.index(group["level"]), -group["count"]))
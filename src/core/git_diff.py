@@ -0,0 +1,163 @@
+import os
+import re
+import subprocess
+
+from .file_utils import SUPPORTED_EXTENSIONS
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# C-style escapes git uses in quoted paths
+QUOTED_PATH_ESCAPE = re.compile(r'\\([0-7]{3}|.)')
+QUOTED_PATH_CHARS = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13}
+
+class GitDiffError(Exception):
+    """Raised when git cannot compute the changes against a base ref."""
+
+def _git(repo_path, *args):
+    # Keep non-ASCII paths readable; names with quotes or control characters are still quoted
+    result = subprocess.run(["git", "-C", repo_path, "-c", "core.quotePath=false", *args],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise GitDiffError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout
+
+def _unquote_path(path):
+    """
+    Undo git's quoting of a path in diff headers.
+
+    Git writes paths with special characters as C-style quoted strings,
+    e.g. ``"b/q\\"t.py"`` or ``"b/\\303\\251.py"``, and appends a tab to
+    unquoted header paths that contain a space.
+    """
+    path = path.rstrip("\t")
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    # Octal escapes are UTF-8 bytes, so rebuild the name as bytes before decoding
+    inner = path[1:-1]
+    raw = bytearray()
+    position = 0
+    for match in QUOTED_PATH_ESCAPE.finditer(inner):
+        raw += inner[position:match.start()].encode("utf-8")
+        escape = match.group(1)
+        raw.append(int(escape, 8) if len(escape) == 3 else QUOTED_PATH_CHARS.get(escape, ord(escape)))
+        position = match.end()
+    raw += inner[position:].encode("utf-8")
+    return raw.decode("utf-8", errors="replace")
+
+def parse_unified_diff(diff_text):
+    """
+    Extract the changed line ranges of each file from a ``--unified=0`` diff.
+
+    Pure deletions are recorded as the single line next to the removed
+    block so the surrounding code is still reviewed.
+
+    Args:
+        diff_text (str): Output of ``git diff --unified=0``
+
+    Returns:
+        dict: Mapping of repository-relative paths to lists of
+        1-based (start_line, end_line) ranges on the new side
+    """
+    hunks = {}
+    current = None
+    previous = ""
+    # Lines of the current hunk body still to come, counted from its header
+    old_left = new_left = 0
+
+    for line in diff_text.splitlines():
+        if old_left or new_left:
+            # Inside a hunk body: "+++ x" here is an added line reading "++ x", not a file header
+            if line.startswith("-"):
+                old_left -= 1
+            elif line.startswith("+"):
+                new_left -= 1
+            elif line.startswith(" "):
+                old_left -= 1
+                new_left -= 1
+            elif not line.startswith("\\"):
+                # Truncated hunk; stop counting and read the line as a header below
+                old_left = new_left = 0
+            if line.startswith(("+", "-", " ", "\\")):
+                previous = line
+                continue
+
+        if line.startswith("diff --git "):
+            current = None
+        elif line.startswith("+++ ") and previous.startswith("--- "):
+            target = _unquote_path(line[4:])
+            current = None if target == "/dev/null" else target[2:] if target.startswith("b/") else target
+            if current is not None:
+                hunks.setdefault(current, [])
+        elif current is not None and line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            if match:
+                old_left = int(match.group(1)) if match.group(1) is not None else 1
+                start = int(match.group(2))
+                count = int(match.group(3)) if match.group(3) is not None else 1
+                new_left = count
+                if count == 0:
+                    hunks[current].append((max(start, 1), max(start, 1)))
+                else:
+                    hunks[current].append((start, start + count - 1))
+        previous = line
+
+    return hunks
+
+def get_changed_hunks(base_ref, repo_path=".", extensions=SUPPORTED_EXTENSIONS):
+    """
+    Compute the files and line ranges changed since a base ref.
+
+    Compares ``base_ref`` with the working tree, so committed, staged and
+    unstaged changes are all included. Untracked files count as entirely
+    changed.
+
+    Args:
+        base_ref (str): Git ref to diff against, e.g. "origin/main"
+        repo_path (str): Any path inside the repository
+        extensions (list): Allowed extensions without the dot, or None for all
+
+    Returns:
+        dict: Mapping of absolute file paths to lists of 1-based
+        (start_line, end_line) ranges
+
+    Raises:
+        GitDiffError: If git fails, e.g. the ref does not exist
+    """
+    top_level = _git(repo_path, "rev-parse", "--show-toplevel").strip()
+    diff_text = _git(top_level, "diff", "--unified=0", "--no-color", "--no-ext-diff",
+                     "--diff-filter=ACMR", base_ref, "--")
+    hunks = parse_unified_diff(diff_text)
+
+    untracked = _git(top_level, "ls-files", "--others", "--exclude-standard").splitlines()
+    for path in untracked:
+        hunks.setdefault(path, None)
+
+    suffixes = tuple(f".{ext}" for ext in extensions) if extensions else None
+    changed = {}
+    for path, ranges in hunks.items():
+        full_path = os.path.join(top_level, path)
+        if suffixes and not path.lower().endswith(suffixes):
+            continue
+        if not os.path.isfile(full_path):
+            continue
+        if ranges is None:
+            # Untracked file: the whole file is new
+            with open(full_path, "rb") as f:
+                ranges = [(1, max(f.read().count(b"\n") + 1, 1))]
+        if ranges:
+            changed[full_path] = ranges
+    return changed
+
+def ranges_overlap(start_line, end_line, line_ranges):
+    """
+    Check whether a line range overlaps any of the given ranges.
+
+    Args:
+        start_line (int): First line of the range (1-based, inclusive)
+        end_line (int): Last line of the range (1-based, inclusive)
+        line_ranges (list): (start_line, end_line) ranges to test against
+
+    Returns:
+        bool: True if the ranges intersect
+    """
+    return any(start <= end_line and end >= start_line for start, end in line_ranges)
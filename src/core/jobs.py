@@ -0,0 +1,211 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker once cancellation has been requested."""
+
+class Job:
+    """
+    Shared state of one background job.
+
+    The worker reports progress through ``update``; pollers read a
+    consistent copy through ``snapshot``.
+    """
+
+    def __init__(self, job_id, owner=None):
+        self.id = job_id
+        self.owner = owner
+        self.status = JOB_QUEUED
+        self.stage = "Queued"
+        self.percent = 0.0
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, stage=None, percent=None, **partial):
+        """
+        Record progress from the worker.
+
+        Args:
+            stage (str): Human-readable name of the current stage
+            percent (float): Fraction of the job done, between 0 and 1
+            **partial: Partial results to publish to pollers
+
+        Raises:
+            JobCancelled: If cancellation has been requested
+        """
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            if percent is not None:
+                self.percent = min(max(percent, 0.0), 1.0)
+            self.partial.update(partial)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation has been requested."""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def cancel(self):
+        """Ask the worker to stop at its next progress update."""
+        self._cancel_event.set()
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def snapshot(self):
+        """
+        Copy the job's state for display.
+
+        Returns:
+            dict: Status, stage, percent, partial results, result and error
+        """
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "percent": self.percent,
+                "partial": dict(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "cancel_requested": self._cancel_event.is_set()
+            }
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+
+class JobManager:
+    """
+    Worker pool running jobs in the background, with a table of their state.
+
+    Jobs outlive the Streamlit script run that submitted them, so reruns
+    only poll the table instead of restarting the work.
+    """
+
+    def __init__(self, max_workers=2, max_finished_age=3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llmgrep-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.max_finished_age = max_finished_age
+
+    def submit(self, fn, *args, owner=None, **kwargs):
+        """
+        Queue a job.
+
+        Args:
+            fn (callable): Called as ``fn(job, *args, **kwargs)`` on a worker
+                thread; its return value becomes the job's result
+            *args: Positional arguments for ``fn``
+            owner (str): Identifier of the submitter, e.g. the session id
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            str: Id of the new job
+        """
+        self.prune()
+        job = Job(uuid.uuid4().hex, owner)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel_event.is_set():
+            job._finish(JOB_CANCELLED)
+            return
+        with job._lock:
+            job.status = JOB_RUNNING
+        try:
+            job._finish(JOB_DONE, result=fn(job, *args, **kwargs))
+        except JobCancelled:
+            job._finish(JOB_CANCELLED)
+        except Exception as e:
+            job._finish(JOB_FAILED, error=str(e))
+
+    def get(self, job_id):
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): Id returned by ``submit``
+
+        Returns:
+            Job: The job, or None if it is unknown or has been pruned
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Request cancellation of a job.
+
+        Args:
+            job_id (str): Id returned by ``submit``
+
+        Returns:
+            bool: True if the job exists and had not finished yet
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancel()
+        return True
+
+    def jobs_for(self, owner):
+        """
+        List the jobs submitted by one owner, oldest first.
+
+        Args:
+            owner (str): Identifier passed to ``submit``
+
+        Returns:
+            list: Matching jobs
+        """
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if job.owner == owner), key=lambda job: job.created)
+
+    def prune(self):
+        """Forget finished jobs older than ``max_finished_age`` seconds."""
+        cutoff = time.time() - self.max_finished_age
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+                del self._jobs[job_id]
+
+def get_job_manager():
+    """
+    Return the process-wide job manager, creating it on first use.
+
+    The pool size comes from ``LLMGREP_JOB_WORKERS`` (default 2).
+
+    Returns:
+        JobManager: Shared job manager
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(max_workers=max(1, int(os.getenv("LLMGREP_JOB_WORKERS", "2"))))
+        return _job_manager
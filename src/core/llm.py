@@ -1,36 +1,196 @@
 import os
-import streamlit as st
-from langchain_groq import ChatGroq
+import threading
 import dotenv
 
-def initialize_llm(model="deepseek-r1-distill-llama-70b", temperature=0):
+from .llm_cache import get_llm_cache, should_cache
+
+DEFAULT_BACKEND = "groq"
+
+# Process-wide registry of chat clients, shared by every Streamlit session
+_llm_clients = {}
+_llm_clients_lock = threading.Lock()
+_env_loaded = False
+
+# Backend name -> factory(model, temperature, cache, **options) returning a chat model
+_backends = {}
+
+class LLMInitError(Exception):
+    """Raised when a language model client cannot be created."""
+
+def _load_env_once():
+    global _env_loaded
+    if not _env_loaded:
+        dotenv.load_dotenv()
+        _env_loaded = True
+
+def register_backend(name, factory):
+    """
+    Register a chat model backend under a name.
+
+    Args:
+        name (str): Name used to select the backend, e.g. in LLMGREP_LLM_BACKEND
+        factory (callable): Called as ``factory(model, temperature, cache, **options)``,
+            where ``cache`` is a LangChain BaseCache or None; returns a chat model
+            and raises LLMInitError if it cannot be created
+    """
+    _backends[name] = factory
+
+def available_backends():
+    """
+    Return the names of the registered backends.
+
+    Returns:
+        list: Backend names, sorted
+    """
+    return sorted(_backends)
+
+def get_llm_backend():
+    """
+    Return the backend selected by configuration.
+
+    Returns:
+        str: LLMGREP_LLM_BACKEND, or "groq" if unset
+    """
+    _load_env_once()
+    return os.environ.get("LLMGREP_LLM_BACKEND", DEFAULT_BACKEND).strip().lower() or DEFAULT_BACKEND
+
+def _create_groq(model, temperature, cache, **options):
+    if "GROQ_API_KEY" not in os.environ:
+        raise LLMInitError("GROQ_API_KEY not found in environment variables. Please add it to your .env file.")
+    try:
+        from langchain_groq import ChatGroq
+    except ImportError as e:
+        raise LLMInitError("The groq backend needs langchain-groq: pip install langchain-groq") from e
+
+    return ChatGroq(
+        model=model,
+        temperature=temperature,
+        max_tokens=None,
+        timeout=None,
+        max_retries=2,
+        cache=cache if cache is not None else False,
+        **options
+    )
+
+def _create_openai_compatible(model, temperature, cache, **options):
+    # Any server speaking the OpenAI chat API: llama.cpp, vLLM, Ollama, LM Studio, ...
+    base_url = options.pop("base_url", None) or os.environ.get("LLMGREP_OPENAI_BASE_URL")
+    if not base_url:
+        raise LLMInitError("LLMGREP_OPENAI_BASE_URL not set. Point it at the server, e.g. http://localhost:8000/v1")
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError as e:
+        raise LLMInitError("The openai backend needs langchain-openai: pip install langchain-openai") from e
+
+    return ChatOpenAI(
+        # Local servers serve their own models; the UI's model list is Groq's
+        model=os.environ.get("LLMGREP_OPENAI_MODEL") or model,
+        base_url=base_url,
+        # Local servers usually ignore the key, but the client requires one
+        api_key=os.environ.get("LLMGREP_OPENAI_API_KEY") or "not-needed",
+        temperature=temperature,
+        timeout=None,
+        max_retries=2,
+        cache=cache if cache is not None else False,
+        **options
+    )
+
+def _create_fake(model, temperature, cache, **options):
+    from .fake_llm import FakeChatModel
+
+    options.setdefault("latency", float(os.environ.get("LLMGREP_FAKE_LATENCY", "0")))
+    return FakeChatModel(cache=cache if cache is not None else False, **options)
+
+register_backend("groq", _create_groq)
+register_backend("openai", _create_openai_compatible)
+register_backend("fake", _create_fake)
+
+def create_llm(backend, model, temperature=0, cache=None, **options):
     """
-    Initialize and return a Groq Language Model.
-    
+    Build a new chat model from a registered backend, bypassing the client registry.
+
     Args:
+        backend (str): Registered backend name
         model (str): Name of the model to use
         temperature (float): Controls randomness of output
-    
+        cache: LangChain BaseCache to attach, or None
+        **options: Backend-specific settings, e.g. ``latency`` for the fake backend
+
     Returns:
-        ChatGroq: Initialized language model or None
+        Chat model
+
+    Raises:
+        LLMInitError: If the backend is unknown or the client cannot be created
     """
-    # Load environment variables
-    dotenv.load_dotenv()
+    _load_env_once()
 
-    # Check if API key is set
-    if "GROQ_API_KEY" not in os.environ:
-        st.error("⚠️ GROQ_API_KEY not found in environment variables. Please add it to your .env file.")
-        return None
+    factory = _backends.get(backend)
+    if factory is None:
+        raise LLMInitError(f"Unknown LLM backend '{backend}'. Available: {', '.join(available_backends())}")
 
     try:
-        llm = ChatGroq(
-            model=model,
-            temperature=temperature,
-            max_tokens=None,
-            timeout=None,
-            max_retries=2,
-        )
-        return llm
+        return factory(model, temperature, cache, **options)
+    except LLMInitError:
+        raise
     except Exception as e:
-        st.error(f"❌ Error initializing Groq LLM: {str(e)}")
-        return None
\ No newline at end of file
+        raise LLMInitError(f"Error initializing {backend} LLM: {str(e)}") from e
+
+def initialize_llm(model="deepseek-r1-distill-llama-70b", temperature=0, use_cache=True, backend=None):
+    """
+    Initialize and return a language model from the configured backend.
+
+    The backend is ``groq`` unless LLMGREP_LLM_BACKEND selects another
+    registered one, such as ``openai`` for an OpenAI-compatible local
+    server or ``fake`` for offline runs.
+
+    Clients are kept in a process-wide registry keyed by backend, model
+    and temperature, so repeated calls reuse the same client and its open
+    HTTP connections instead of rebuilding them on every rerun.
+
+    Unless disabled, the model is backed by the on-disk response cache so
+    repeated prompts are answered without another round-trip.
+
+    Args:
+        model (str): Name of the model to use
+        temperature (float): Controls randomness of output
+        use_cache (bool): Whether to attach the LLM response cache
+        backend (str): Backend to use instead of the configured one
+
+    Returns:
+        Initialized language model
+
+    Raises:
+        LLMInitError: If the backend's settings are missing or the client cannot be created
+    """
+    # Before any LLMGREP_* lookup, so .env settings apply even with an explicit backend
+    _load_env_once()
+
+    backend = backend or get_llm_backend()
+    cache = get_llm_cache() if use_cache and should_cache(temperature) else None
+    key = (backend, model, float(temperature), cache is not None)
+
+    with _llm_clients_lock:
+        llm = _llm_clients.get(key)
+        if llm is not None:
+            return llm
+
+        llm = create_llm(backend, model, temperature, cache)
+        _llm_clients[key] = llm
+        return llm
+
+def reset_llm_clients(model=None):
+    """
+    Drop cached LLM clients so the next call builds fresh ones.
+
+    The .env file is read again on the next call to initialize_llm.
+
+    Args:
+        model (str): Only drop clients for this model; all clients if None
+    """
+    global _env_loaded
+
+    with _llm_clients_lock:
+        for key in list(_llm_clients):
+            if model is None or key[1] == model:
+                del _llm_clients[key]
+        _env_loaded = False
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+DEFAULT_CACHE_DIR = ".llmgrep_cache"
+
+class DiskLLMCache(BaseCache):
+    """
+    Content-addressed LLM response cache stored in a local SQLite file.
+
+    Entries are keyed by a SHA-256 of LangChain's ``llm_string`` (which
+    carries the model name and temperature) and the rendered prompt.
+    The cache is capped in size with least-recently-used eviction and
+    entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_bytes=100 * 1024 * 1024,
+                 ttl_seconds=7 * 24 * 3600):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "llm_responses.sqlite")
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        """Return cached generations for the prompt, or None on a miss."""
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            generations = None if self.ttl_seconds and now - created > self.ttl_seconds else self._decode(value)
+            if generations is None:
+                # Expired, or written by an incompatible version
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return generations
+
+    @staticmethod
+    def _decode(value):
+        """Rebuild chat generations from a stored entry, or return None if it is unreadable."""
+        try:
+            texts = json.loads(value).get("texts")
+        except (ValueError, AttributeError):
+            return None
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return None
+        return [ChatGeneration(message=AIMessage(content=text)) for text in texts]
+
+    def update(self, prompt, llm_string, return_val):
+        """Store generations for the prompt and evict old entries if needed."""
+        key = self._key(prompt, llm_string)
+        # Only the text is kept: plain JSON needs no LangChain deserializer to read back
+        value = json.dumps({"texts": [generation.text for generation in return_val]})
+        size = len(value.encode("utf-8"))
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        # Drop least recently used entries until we are back under the cap
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if total <= self.max_size_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self, **kwargs):
+        """Remove every cached response and reset the counters."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            dict: Hit and miss counters, entry count and size on disk
+        """
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size_bytes": size}
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """
+    Return the process-wide LLM response cache, configured from the environment.
+
+    Recognized variables are LLMGREP_LLM_CACHE (set to 0 to disable),
+    LLMGREP_CACHE_DIR, LLMGREP_CACHE_MAX_MB and LLMGREP_CACHE_TTL_HOURS.
+
+    Returns:
+        DiskLLMCache: Shared cache instance, or None if caching is disabled
+    """
+    global _llm_cache
+
+    if os.environ.get("LLMGREP_LLM_CACHE", "1") == "0":
+        return None
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = DiskLLMCache(
+                cache_dir=os.environ.get("LLMGREP_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_size_bytes=int(float(os.environ.get("LLMGREP_CACHE_MAX_MB", "100")) * 1024 * 1024),
+                ttl_seconds=int(float(os.environ.get("LLMGREP_CACHE_TTL_HOURS", "168")) * 3600)
+            )
+        return _llm_cache
+
+def should_cache(temperature):
+    """
+    Decide whether responses at the given temperature may be cached.
+
+    Non-deterministic responses (temperature > 0) are cached unless
+    LLMGREP_CACHE_SKIP_NONZERO_TEMPERATURE is set to 1.
+
+    Args:
+        temperature (float): Sampling temperature of the model
+
+    Returns:
+        bool: True if the cache should be attached
+    """
+    if temperature and temperature > 0:
+        return os.environ.get("LLMGREP_CACHE_SKIP_NONZERO_TEMPERATURE", "0") != "1"
+    return True
+
+def stream_with_cache(llm, messages):
+    """
+    Stream a chat model's response while reading and filling its response cache.
+
+    LangChain only consults the cache on ``invoke``; this helper applies
+    the same key to streamed calls so that streamed and non-streamed
+    entry points share cached responses.
+
+    Args:
+        llm: Chat model, optionally configured with a BaseCache
+        messages (list): Rendered prompt messages
+
+    Yields:
+        str: Response text as it arrives, or the whole cached response
+    """
+    cache = llm.cache if isinstance(getattr(llm, "cache", None), BaseCache) else None
+
+    if cache is not None:
+        prompt = dumps(messages)
+        llm_string = llm._get_llm_string()
+        cached = cache.lookup(prompt, llm_string)
+        if cached:
+            yield cached[0].text
+            return
+
+    parts = []
+    for chunk in llm.stream(messages):
+        text = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+        parts.append(text)
+        yield text
+
+    if cache is not None:
+        response = "".join(parts)
+        cache.update(prompt, llm_string, [ChatGeneration(message=AIMessage(content=response))])
@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import urllib.request
+from datetime import datetime
+
+import yaml
+
+DEFAULT_BUNDLE_ROOT = "rule_bundles"
+DEFAULT_PACKS = ["p/default"]
+REGISTRY_URL = "https://semgrep.dev/c/{pack}"
+
+# Rules generated in the Rules tab are kept as a versioned pack of their own
+CUSTOM_PACK_ROOT = "configs"
+CUSTOM_PACK_FILE = "custom_rules.yaml"
+
+# Which rules a scan runs: the registry/bundle ruleset, the custom pack, or both
+RULE_SOURCE_DEFAULT = "default"
+RULE_SOURCE_CUSTOM = "custom"
+RULE_SOURCE_BOTH = "both"
+RULE_SOURCES = [RULE_SOURCE_DEFAULT, RULE_SOURCE_CUSTOM, RULE_SOURCE_BOTH]
+
+def _finalize_bundle(staging_dir, packs, source, bundle_root):
+    """Move a staged bundle into its versioned directory and activate it."""
+    rules_dir = os.path.join(staging_dir, "rules")
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(rules_dir)):
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(rules_dir, name), "rb") as f:
+            digest.update(f.read())
+    version = digest.hexdigest()[:12]
+
+    manifest = {
+        "version": version,
+        "packs": packs,
+        "source": source,
+        "created": datetime.now().isoformat(timespec="seconds")
+    }
+
+    bundle_dir = os.path.join(bundle_root, version)
+    if os.path.exists(bundle_dir):
+        # Identical content is already on disk; keep its original manifest
+        shutil.rmtree(staging_dir)
+        with open(os.path.join(bundle_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    else:
+        with open(os.path.join(staging_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(staging_dir, bundle_dir)
+
+    with open(os.path.join(bundle_root, "CURRENT"), "w") as f:
+        f.write(version)
+
+    return {**manifest, "path": bundle_dir, "rules_path": os.path.join(bundle_dir, "rules")}
+
+def _stage_bundle(bundle_root):
+    os.makedirs(bundle_root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".staging_", dir=bundle_root)
+    # Rules live in their own directory so Semgrep never sees the manifest
+    os.makedirs(os.path.join(staging_dir, "rules"))
+    return staging_dir
+
+def _pack_filename(pack):
+    return pack.replace("/", "_").replace(":", "_") + ".yaml"
+
+def fetch_rule_bundle(packs=None, bundle_root=DEFAULT_BUNDLE_ROOT, timeout=60):
+    """
+    Download rule packs from the Semgrep registry into a new local bundle.
+
+    Args:
+        packs (list): Registry packs to fetch, e.g. ``["p/python"]``
+        bundle_root (str): Directory holding the versioned bundles
+        timeout (int): Network timeout per pack in seconds
+
+    Returns:
+        dict: Manifest of the now active bundle, including ``path`` and ``rules_path``
+    """
+    packs = list(packs or DEFAULT_PACKS)
+    staging_dir = _stage_bundle(bundle_root)
+
+    try:
+        for pack in packs:
+            request = urllib.request.Request(
+                REGISTRY_URL.format(pack=pack),
+                headers={"Accept": "application/x-yaml"}
+            )
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                rules = response.read()
+            with open(os.path.join(staging_dir, "rules", _pack_filename(pack)), "wb") as f:
+                f.write(rules)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return _finalize_bundle(staging_dir, packs, "registry", bundle_root)
+
+def import_rule_bundle(paths, bundle_root=DEFAULT_BUNDLE_ROOT):
+    """
+    Import rule files from local paths into a new bundle, for offline hosts.
+
+    Args:
+        paths (list): YAML rule files or directories containing them
+        bundle_root (str): Directory holding the versioned bundles
+
+    Returns:
+        dict: Manifest of the now active bundle, including ``path`` and ``rules_path``
+    """
+    staging_dir = _stage_bundle(bundle_root)
+    imported = []
+
+    try:
+        for path in paths:
+            if os.path.isdir(path):
+                candidates = [
+                    os.path.join(root, name)
+                    for root, _, names in os.walk(path)
+                    for name in sorted(names)
+                    if name.endswith((".yaml", ".yml"))
+                ]
+            else:
+                candidates = [path]
+
+            for candidate in candidates:
+                name = os.path.relpath(candidate, path) if os.path.isdir(path) else os.path.basename(candidate)
+                target_name = name.replace(os.sep, "_")
+                shutil.copyfile(candidate, os.path.join(staging_dir, "rules", target_name))
+                imported.append(target_name)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return _finalize_bundle(staging_dir, sorted(imported), "import", bundle_root)
+
+def get_active_bundle(bundle_root=DEFAULT_BUNDLE_ROOT):
+    """
+    Return the manifest of the active rule bundle.
+
+    Args:
+        bundle_root (str): Directory holding the versioned bundles
+
+    Returns:
+        dict: Manifest including ``path`` and ``rules_path``, or None if no bundle is installed
+    """
+    try:
+        with open(os.path.join(bundle_root, "CURRENT")) as f:
+            version = f.read().strip()
+        bundle_dir = os.path.join(bundle_root, version)
+        with open(os.path.join(bundle_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    return {**manifest, "path": bundle_dir, "rules_path": os.path.join(bundle_dir, "rules")}
+
+def load_custom_rules(pack_root=CUSTOM_PACK_ROOT):
+    """
+    Load the rules of the active custom rule pack.
+
+    Args:
+        pack_root (str): Directory holding the versioned custom packs
+
+    Returns:
+        list: Rule dicts, empty if no custom pack is saved
+    """
+    pack = get_active_bundle(pack_root)
+    if pack is None:
+        return []
+    try:
+        with open(os.path.join(pack["rules_path"], CUSTOM_PACK_FILE), encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return []
+    return [rule for rule in data.get("rules", []) if isinstance(rule, dict)]
+
+def save_custom_rules(rules, pack_root=CUSTOM_PACK_ROOT, replace=False):
+    """
+    Save rules into a new version of the local custom rule pack.
+
+    Rules are merged into the active pack by id, so saving a regenerated
+    rule updates it in place. Saving rules already in the pack keeps the
+    current version.
+
+    Args:
+        rules (list): Rule dicts, e.g. the generated rules that validated
+        pack_root (str): Directory holding the versioned custom packs
+        replace (bool): Start the pack over instead of merging into it
+
+    Returns:
+        dict: Manifest of the now active pack, including ``path`` and ``rules_path``
+    """
+    merged = {} if replace else {rule["id"]: rule for rule in load_custom_rules(pack_root) if rule.get("id")}
+    for rule in rules:
+        merged[rule["id"]] = rule
+
+    staging_dir = _stage_bundle(pack_root)
+    try:
+        with open(os.path.join(staging_dir, "rules", CUSTOM_PACK_FILE), "w", encoding="utf-8") as f:
+            yaml.safe_dump({"rules": list(merged.values())}, f, sort_keys=False, allow_unicode=True)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return _finalize_bundle(staging_dir, sorted(merged), "custom", pack_root)
+
+def get_scan_ruleset(bundle_root=DEFAULT_BUNDLE_ROOT, rule_source=RULE_SOURCE_DEFAULT, custom_root=CUSTOM_PACK_ROOT):
+    """
+    Resolve the Semgrep configs to scan with.
+
+    The default ruleset is the active local bundle when one is installed
+    and the registry's ``auto`` config otherwise. The custom rule pack can
+    replace it or run alongside it; without a saved pack, scans fall back
+    to the default ruleset.
+
+    Args:
+        bundle_root (str): Directory holding the versioned bundles
+        rule_source (str): One of RULE_SOURCES
+        custom_root (str): Directory holding the versioned custom packs
+
+    Returns:
+        Tuple[list, dict]: Configs for ``--config`` and a description of
+        the ruleset to report alongside the results
+    """
+    bundle = get_active_bundle(bundle_root)
+    if bundle:
+        configs, ruleset = [bundle["rules_path"]], {"source": "bundle", "version": bundle["version"], "packs": bundle["packs"]}
+    else:
+        configs, ruleset = ["auto"], {"source": "registry", "version": "auto", "packs": ["auto"]}
+
+    custom = get_active_bundle(custom_root) if rule_source != RULE_SOURCE_DEFAULT else None
+    if custom is None:
+        return configs, ruleset
+
+    custom_ruleset = {"source": "custom", "version": custom["version"], "packs": [CUSTOM_PACK_FILE],
+                      "rules": custom["packs"]}
+    if rule_source == RULE_SOURCE_CUSTOM:
+        return [custom["rules_path"]], custom_ruleset
+    return configs + [custom["rules_path"]], {**ruleset, "custom": custom_ruleset}
+
+def _update_custom_pack(paths, pack_root):
+    rules = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        rules.extend(rule for rule in data.get("rules", []) if isinstance(rule, dict) and rule.get("id"))
+    return save_custom_rules(rules, pack_root) if rules else get_active_bundle(pack_root)
+
+def describe_ruleset(ruleset):
+    """
+    Render a ruleset description from ``get_scan_ruleset`` as one line.
+
+    Args:
+        ruleset (dict): Ruleset description
+
+    Returns:
+        str: e.g. "bundle (1a2b3c4d5e6f) + custom (0f9e8d7c6b5a)"
+    """
+    text = f"{ruleset['source']} ({ruleset['version']})"
+    if ruleset.get("custom"):
+        text += f" + {describe_ruleset(ruleset['custom'])}"
+    return text
+
+def main(argv=None):
+    """Command line entry point for managing rule bundles."""
+    parser = argparse.ArgumentParser(description="Manage the local Semgrep rule bundle")
+    parser.add_argument("--bundle-root", default=DEFAULT_BUNDLE_ROOT, help="Directory holding the bundles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Fetch rule packs from the Semgrep registry")
+    refresh_parser.add_argument("--packs", nargs="+", default=DEFAULT_PACKS, help="Registry packs to fetch")
+
+    import_parser = subparsers.add_parser("import", help="Import rule files from local paths")
+    import_parser.add_argument("paths", nargs="+", help="YAML rule files or directories")
+
+    subparsers.add_parser("show", help="Show the active bundle")
+
+    custom_parser = subparsers.add_parser("custom", help="Show the custom rule pack, or add rule files to it")
+    custom_parser.add_argument("paths", nargs="*", help="YAML rule files to merge into the pack")
+    custom_parser.add_argument("--pack-root", default=CUSTOM_PACK_ROOT, help="Directory holding the custom packs")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "refresh":
+            bundle = fetch_rule_bundle(args.packs, args.bundle_root)
+        elif args.command == "import":
+            bundle = import_rule_bundle(args.paths, args.bundle_root)
+        elif args.command == "custom":
+            bundle = _update_custom_pack(args.paths, args.pack_root)
+            if bundle is None:
+                print("No custom rule pack saved; generate rules in the Custom Rules tab.")
+                return 1
+        else:
+            bundle = get_active_bundle(args.bundle_root)
+            if bundle is None:
+                print("No rule bundle installed; scans use --config=auto.")
+                return 1
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(bundle, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+
+import yaml
+
+from .semgrep import run_semgrep, SemgrepError
+
+RULE_INVALID = "invalid"
+RULE_FIRES = "fires"
+RULE_NO_MATCHES = "no_matches"
+
+PATTERN_KEYS = ("pattern", "patterns", "pattern-either", "pattern-regex", "pattern-sources", "match")
+REQUIRED_KEYS = ("id", "message", "languages", "severity")
+
+# Semgrep language names mapped to the extension Semgrep expects for a target
+LANGUAGE_EXTENSIONS = {
+    "python": ".py", "py": ".py", "python3": ".py",
+    "javascript": ".js", "js": ".js",
+    "typescript": ".ts", "ts": ".ts",
+    "java": ".java",
+    "go": ".go", "golang": ".go",
+    "ruby": ".rb", "rb": ".rb",
+    "php": ".php",
+    "c": ".c",
+    "cpp": ".cpp", "c++": ".cpp",
+    "csharp": ".cs", "c#": ".cs",
+    "html": ".html",
+}
+
+def collect_rules(yaml_blocks):
+    """
+    Gather the individual rules from generated YAML blocks.
+
+    Blocks may hold a ``rules:`` mapping, a list of rules or a single
+    rule. Duplicate ids are renamed so every rule can be told apart in
+    a merged config.
+
+    Args:
+        yaml_blocks (list): YAML texts, e.g. from extract_yaml_blocks
+
+    Returns:
+        list: Rule dicts, in order of appearance
+    """
+    rules = []
+    seen = set()
+    for block in yaml_blocks:
+        try:
+            data = yaml.safe_load(block)
+        except yaml.YAMLError:
+            continue
+        if isinstance(data, dict):
+            data = data.get("rules", [data])
+        for rule in data if isinstance(data, list) else []:
+            if not isinstance(rule, dict):
+                continue
+            rule = dict(rule)
+            base_id = str(rule.get("id") or f"generated-rule-{len(rules) + 1}")
+            rule_id, suffix = base_id, 2
+            while rule_id in seen:
+                rule_id, suffix = f"{base_id}-{suffix}", suffix + 1
+            rule["id"] = rule_id
+            seen.add(rule_id)
+            rules.append(rule)
+    return rules
+
+def rules_to_yaml(rules):
+    """
+    Serialize rules as a single Semgrep config.
+
+    Args:
+        rules (list): Rule dicts
+
+    Returns:
+        str: YAML with a top-level ``rules`` list
+    """
+    return yaml.safe_dump({"rules": rules}, sort_keys=False, allow_unicode=True)
+
+def _schema_error(rule):
+    missing = [key for key in REQUIRED_KEYS if not rule.get(key)]
+    if missing:
+        return f"Missing required keys: {', '.join(missing)}"
+    if not any(key in rule for key in PATTERN_KEYS):
+        return "Rule has no pattern"
+    return None
+
+def _rule_matches(check_id, rule_id):
+    # Semgrep prefixes local rule ids with the config's path
+    return check_id == rule_id or check_id.endswith("." + rule_id)
+
+def _target_extensions(rules, language):
+    extensions = set()
+    for rule in rules:
+        for name in rule.get("languages") or []:
+            extension = LANGUAGE_EXTENSIONS.get(str(name).lower())
+            if extension:
+                extensions.add(extension)
+    if language:
+        extensions.add(language if language.startswith(".") else f".{language}")
+    return sorted(extensions) or [".txt"]
+
+def _run_batch(rules, targets, work_dir):
+    """Run rules in one Semgrep invocation; split the batch only when an error can't be attributed."""
+    config_path = os.path.join(work_dir, f"rules_{len(os.listdir(work_dir))}.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(rules_to_yaml(rules))
+
+    try:
+        output = run_semgrep(targets, [config_path], allow_errors=True)
+    except SemgrepError as e:
+        output = {"results": [], "errors": [{"message": str(e), "stderr": e.stderr, "fatal": True}]}
+
+    errors = {}
+    unattributed = []
+    for error in output.get("errors", []):
+        rule_id = error.get("rule_id")
+        owner = next((rule["id"] for rule in rules if rule_id and _rule_matches(rule_id, rule["id"])), None)
+        if owner:
+            errors.setdefault(owner, error.get("message") or str(error.get("type", "Invalid rule")))
+        elif error.get("fatal") or (error.get("level") == "error" and not error.get("path")):
+            unattributed.append(error)
+
+    if unattributed and not output.get("results") and not errors:
+        if len(rules) == 1:
+            message = unattributed[0].get("message") or "Semgrep rejected the rule"
+            return {rules[0]["id"]: {"error": message, "matches": []}}
+        middle = len(rules) // 2
+        return {**_run_batch(rules[:middle], targets, work_dir), **_run_batch(rules[middle:], targets, work_dir)}
+
+    outcome = {rule["id"]: {"error": errors.get(rule["id"]), "matches": []} for rule in rules}
+    for finding in output.get("results", []):
+        owner = next((rule["id"] for rule in rules if _rule_matches(finding.get("check_id", ""), rule["id"])), None)
+        if owner:
+            outcome[owner]["matches"].append(finding.get("start", {}).get("line"))
+    return outcome
+
+def validate_rules(rules, code, language=None):
+    """
+    Check which generated rules compile and which fire on the given code.
+
+    All rules are merged into one config and run against the code in a
+    single Semgrep invocation. Only if Semgrep rejects the config without
+    saying which rule is at fault is the batch split to isolate it.
+
+    Args:
+        rules (list): Rule dicts from collect_rules
+        code (str): Code the rules are expected to match
+        language (str): Extension of the code, e.g. ".py"; otherwise the
+            code is written once per language the rules declare
+
+    Returns:
+        list: One report per rule, in input order, with ``id``, ``status``
+        (``invalid``, ``fires`` or ``no_matches``), matched ``lines`` and ``error``
+    """
+    reports = {}
+    runnable = []
+    for rule in rules:
+        error = _schema_error(rule)
+        if error:
+            reports[rule["id"]] = {"id": rule["id"], "status": RULE_INVALID, "lines": [], "error": error}
+        else:
+            runnable.append(rule)
+
+    if runnable:
+        work_dir = tempfile.mkdtemp(prefix="llmgrep_rules_")
+        try:
+            targets = []
+            for extension in _target_extensions(runnable, language):
+                target = os.path.join(work_dir, f"target{extension}")
+                with open(target, "w", encoding="utf-8") as f:
+                    f.write(code)
+                targets.append(target)
+
+            rules_dir = os.path.join(work_dir, "configs")
+            os.makedirs(rules_dir)
+            for rule_id, outcome in _run_batch(runnable, targets, rules_dir).items():
+                if outcome["error"]:
+                    status = RULE_INVALID
+                elif outcome["matches"]:
+                    status = RULE_FIRES
+                else:
+                    status = RULE_NO_MATCHES
+                reports[rule_id] = {
+                    "id": rule_id,
+                    "status": status,
+                    "lines": sorted(line for line in outcome["matches"] if line is not None),
+                    "error": outcome["error"]
+                }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return [reports[rule["id"]] for rule in rules]
@@ -1,26 +1,40 @@
-import json
-import streamlit as st
+import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
-from ..utils.text_chunk import analyze_code_in_chunks, chunk_chat_context, chunk_rule_context
+from .findings import project_findings, format_findings, findings_for_path
+from .llm_cache import stream_with_cache
+from .vulnerabilities import (STRUCTURED_OUTPUT_INSTRUCTIONS, extract_findings, parse_findings,
+                              strip_findings_block, dedupe_findings, format_findings_block)
+from .git_diff import ranges_overlap
+from .chat_context import (build_chat_index, retrieve_chat_context, split_chat_history,
+                           CHAT_HISTORY_TOKENS, CHAT_SUMMARY_TOKENS)
+from ..utils.text_chunk import split_code_with_line_ranges, chunk_rule_context
+from ..utils.tokens import count_tokens, truncate_to_tokens
 
-def analyze_security(semgrep_results, code_snippet, llm):
-    """
-    Analyze security of code using LLM and Semgrep results.
-    
-    Args:
-        semgrep_results (dict): Results from Semgrep scan
-        code_snippet (str): Code to analyze
-        llm: Language Model for analysis
-    
-    Returns:
-        str: Comprehensive security analysis
-    """
-    # Create prompt template for LLM
-    prompt = ChatPromptTemplate.from_messages([
+ANALYSIS_SIZE_ERROR = "❌ Error: Code size exceeds model's capacity even after chunking. Please try analyzing a smaller code sample."
+NO_CHANGES_MESSAGE = "✅ No changed code to analyze."
+RULES_SIZE_ERROR = "❌ Error: Input size exceeds model's capacity even after chunking. Please try with a smaller code sample."
+THINK_BLOCK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+# Map-reduce merge of chunk analyses: batch size, input budget per merge, and cap on merged output
+MERGE_FAN_IN = 4
+MERGE_INPUT_TOKENS = 4000
+MERGED_ANALYSIS_TOKENS = 1500
+
+def _is_size_error(error):
+    return "413" in str(error) or "too large" in str(error).lower()
+
+def _security_analysis_prompt():
+    """Create the prompt template used to analyze a chunk of code."""
+    return ChatPromptTemplate.from_messages([
         (
             "system",
             """You are an expert security analyst specializing in code vulnerability detection and remediation.
@@ -38,13 +52,14 @@ def analyze_security(semgrep_results, code_snippet, llm):
             
             If Semgrep didn't detect any issues but you identify potential vulnerabilities, clearly indicate this.
             Use markdown formatting for better readability. Be specific and provide actionable advice.
-            """
+            
+            """ + STRUCTURED_OUTPUT_INSTRUCTIONS
         ),
         ("human", """
-        # Semgrep Results: 
+        # Semgrep Findings (check_id, severity, lines, message):
         {semgrep_results}
         
-        # Code for Analysis:
+        # Code for Analysis (starting at line {start_line}):
         ```
         {code_snippet}
         ```
@@ -52,79 +67,390 @@ def analyze_security(semgrep_results, code_snippet, llm):
         Please provide your comprehensive security assessment, focusing on both the Semgrep findings and your own expert analysis.
         """),
     ])
-    
-    try:
-        # Check if code needs to be chunked
-        code_chunks = analyze_code_in_chunks(code_snippet)
+
+def _security_analysis_inputs(semgrep_results, chunk_with_range):
+    chunk, (start_line, end_line) = chunk_with_range
+    return {
+        # Only send the findings that fall inside this chunk
+        "semgrep_results": format_findings(
+            project_findings(semgrep_results, start_line, end_line)
+        ),
+        "code_snippet": chunk,
+        "start_line": start_line
+    }
+
+def _select_chunks(code_snippet, language, line_ranges):
+    """Split code into chunks, keeping only those that overlap ``line_ranges`` if given."""
+    # Split code on top-level boundaries, keeping the source lines each chunk covers
+    code_chunks = split_code_with_line_ranges(code_snippet, language=language)
+    if line_ranges is None:
+        return code_chunks
+    # Chunks follow top-level blocks, so this keeps each change's enclosing function
+    return [chunk for chunk in code_chunks if ranges_overlap(*chunk[1], line_ranges)]
+
+def _part_header(index, total):
+    return f"[Analysis Part {index}/{total}]\n\n"
+
+def _part_footer(elapsed):
+    return f"\n\n_(analyzed in {elapsed:.1f}s)_"
+
+def _merged_footer(results):
+    # The merge drops the part framing, so keep each chunk's time in one closing line
+    timings = ", ".join(f"part {i}: {elapsed:.1f}s" for i, (_, elapsed) in enumerate(results, 1))
+    return f"\n\n_(analyzed in {len(results)} parts; {timings})_"
+
+def _analysis_merge_prompt():
+    """Create the prompt template used to merge partial analyses of the same code."""
+    return ChatPromptTemplate.from_messages([
+        (
+            "system",
+            """You are an expert security analyst consolidating several partial security analyses of the same codebase.
+            
+            Merge them into a single report:
+            1. Report each distinct vulnerability once. When several parts describe the same issue, combine them
+               and list every affected location.
+            2. Keep the structure VULNERABILITY, CLASSIFICATION, SEVERITY, RISK, FIX for each vulnerability.
+            3. Order vulnerabilities from most to least severe.
+            4. Drop statements that no issue was found in a part when other parts found issues.
+            
+            Be concise: at most 600 words in total. Use markdown formatting.
+            
+            """ + STRUCTURED_OUTPUT_INSTRUCTIONS
+        ),
+        ("human", """
+        # Partial Analyses:
+        {analyses}
         
-        if isinstance(code_chunks, list):
-            # Analyze each chunk separately
+        Please provide the consolidated security assessment.
+        """),
+    ])
+
+def _merge_inputs(analyses):
+    return {
+        "analyses": "\n\n".join(f"## Part {i}\n{analysis}" for i, analysis in enumerate(analyses, 1))
+    }
+
+def _strip_reasoning(analysis):
+    # Reasoning models prepend their chain of thought; it only costs tokens downstream
+    return THINK_BLOCK_PATTERN.sub("", analysis).strip()
+
+def _bound_analysis(analysis, max_tokens=MERGED_ANALYSIS_TOKENS):
+    """
+    Strip reasoning from a merged analysis and cap its size without losing findings.
+
+    Only the prose is truncated; the findings are re-emitted whole as one
+    JSON block, and a code fence left open by the cut is closed.
+    """
+    analysis = _strip_reasoning(analysis)
+    if count_tokens(analysis) <= max_tokens:
+        return analysis
+
+    block = format_findings_block(dedupe_findings(parse_findings(analysis)))
+    prose = truncate_to_tokens(strip_findings_block(analysis), max(max_tokens - count_tokens(block), 0)).rstrip()
+    if sum(1 for line in prose.split("\n") if line.lstrip().startswith("```")) % 2:
+        prose += "\n```"
+    return f"{prose}\n\n{block}" if prose else block
+
+def _merge_batches(analyses, fan_in, max_input_tokens):
+    """Group analyses into merge batches of at most ``fan_in`` items and roughly ``max_input_tokens``."""
+    batches = []
+    current = []
+    used = 0
+    for analysis in analyses:
+        tokens = count_tokens(analysis)
+        # Batches hold at least two items so every round shrinks the tree
+        if len(current) >= fan_in or (len(current) >= 2 and used + tokens > max_input_tokens):
+            batches.append(current)
+            current, used = [], 0
+        current.append(analysis)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _reduce_analyses(analyses, llm, max_concurrency=4, fan_in=MERGE_FAN_IN, max_input_tokens=MERGE_INPUT_TOKENS):
+    """
+    Merge analyses level by level until a single final batch is left.
+
+    Returns:
+        list: The analyses the final merge should combine
+    """
+    chain = _analysis_merge_prompt() | llm | StrOutputParser()
+    analyses = [_strip_reasoning(analysis) for analysis in analyses]
+
+    def merge_batch(batch):
+        if len(batch) == 1:
+            return batch[0]
+        return _bound_analysis(chain.invoke(_merge_inputs(batch)))
+
+    batches = _merge_batches(analyses, fan_in, max_input_tokens)
+    while len(batches) > 1:
+        workers = max(1, min(max_concurrency, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            analyses = list(executor.map(merge_batch, batches))
+        batches = _merge_batches(analyses, fan_in, max_input_tokens)
+    return batches[0] if batches else []
+
+def merge_analyses(analyses, llm, max_concurrency=4, fan_in=MERGE_FAN_IN, max_input_tokens=MERGE_INPUT_TOKENS):
+    """
+    Merge per-chunk analyses into one consolidated, deduplicated analysis.
+
+    Analyses are merged as a tree: each level merges batches of at most
+    ``fan_in`` analyses concurrently, so very large inputs never exceed
+    the context of a single merge request.
+
+    Args:
+        analyses (list): Per-chunk analyses, in chunk order
+        llm: Language Model for merging
+        max_concurrency (int): Maximum number of merge requests in flight
+        fan_in (int): Maximum analyses merged by one request
+        max_input_tokens (int): Approximate token limit of one merge request's analyses
+
+    Returns:
+        str: Consolidated security analysis
+    """
+    final_batch = _reduce_analyses(analyses, llm, max_concurrency, fan_in, max_input_tokens)
+    if len(final_batch) <= 1:
+        return final_batch[0] if final_batch else ""
+    chain = _analysis_merge_prompt() | llm | StrOutputParser()
+    return _bound_analysis(chain.invoke(_merge_inputs(final_batch)))
+
+def _map_chunks(chain, semgrep_results, code_chunks, max_concurrency, on_progress=None):
+    """Analyze chunks concurrently, returning (response, elapsed) pairs in chunk order."""
+    def run_chunk(chunk_with_range):
+        started = time.perf_counter()
+        response = chain.invoke(_security_analysis_inputs(semgrep_results, chunk_with_range))
+        return response, time.perf_counter() - started
+
+    workers = max(1, min(max_concurrency, len(code_chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_chunk, chunk) for chunk in code_chunks]
+        try:
+            for done, _ in enumerate(as_completed(futures), 1):
+                if on_progress:
+                    on_progress(done, len(code_chunks))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+def analyze_security(semgrep_results, code_snippet, llm, max_concurrency=4, language=None, line_ranges=None,
+                     merge=True, on_progress=None):
+    """
+    Analyze security of code using LLM and Semgrep results.
+
+    Large inputs are split into chunks which are analyzed concurrently,
+    with at most ``max_concurrency`` requests in flight at once. The
+    per-chunk analyses are then merged into one deduplicated analysis of
+    bounded size, or joined part by part if ``merge`` is False. Either way
+    the time spent on each chunk is reported.
+
+    Args:
+        semgrep_results (dict): Results from Semgrep scan
+        code_snippet (str): Code to analyze
+        llm: Language Model for analysis
+        max_concurrency (int): Maximum number of chunk requests in flight
+        language (str): File extension hint used to find function/class boundaries
+        line_ranges (list): Only analyze chunks overlapping these 1-based
+            (start_line, end_line) ranges, e.g. the hunks of a diff
+        merge (bool): Whether to consolidate the per-chunk analyses
+        on_progress (callable): Called as ``on_progress(done, total)`` from
+            the calling thread as chunks finish
+
+    Returns:
+        str: Comprehensive security analysis
+    """
+    # Build the chain once; it is stateless and safe to share across workers
+    chain = _security_analysis_prompt() | llm | StrOutputParser()
+
+    try:
+        code_chunks = _select_chunks(code_snippet, language, line_ranges)
+        if not code_chunks:
+            return NO_CHANGES_MESSAGE
+
+        if len(code_chunks) > 1:
+            results = _map_chunks(chain, semgrep_results, code_chunks, max_concurrency, on_progress)
+
+            if merge:
+                merged = merge_analyses([response for response, _ in results], llm, max_concurrency)
+                return merged + _merged_footer(results)
+
             all_responses = []
-            for i, chunk in enumerate(code_chunks, 1):
-                chunk_prompt = f"[Analysis Part {i}/{len(code_chunks)}]\n\n"
-                
-                # Create and invoke chain for each chunk
-                chain = (
-                    {"semgrep_results": RunnablePassthrough(), "code_snippet": RunnablePassthrough()} 
-                    | prompt 
-                    | llm 
-                    | StrOutputParser()
-                )
-                
-                response = chain.invoke({
-                    "semgrep_results": json.dumps(semgrep_results, indent=2),
-                    "code_snippet": chunk
-                })
-                all_responses.append(chunk_prompt + response)
-            
+            for i, (response, elapsed) in enumerate(results, 1):
+                all_responses.append(_part_header(i, len(code_chunks)) + response + _part_footer(elapsed))
+
             # Combine all responses
             return "\n\n".join(all_responses)
         else:
             # Process single chunk normally
-            chain = (
-                {"semgrep_results": RunnablePassthrough(), "code_snippet": RunnablePassthrough()} 
-                | prompt 
-                | llm 
-                | StrOutputParser()
-            )
-            
-            return chain.invoke({
-                "semgrep_results": json.dumps(semgrep_results, indent=2),
-                "code_snippet": code_chunks
-            })
-            
+            return chain.invoke(_security_analysis_inputs(semgrep_results, code_chunks[0]))
+
     except Exception as e:
-        if "413" in str(e) or "too large" in str(e).lower():
-            return "❌ Error: Code size exceeds model's capacity even after chunking. Please try analyzing a smaller code sample."
+        if _is_size_error(e):
+            return ANALYSIS_SIZE_ERROR
         raise e
 
-def security_chat(code_snippet, llm_analysis, chat_history, query, llm):
+def stream_security_analysis(semgrep_results, code_snippet, llm, max_concurrency=4, language=None,
+                             line_ranges=None, merge=True, on_progress=None):
     """
-    Generate security-focused chat responses.
-    
+    Stream the security analysis of code as tokens arrive.
+
+    Chunks are analyzed concurrently as in ``analyze_security``. With
+    ``merge``, the chunk and merge requests run first and the merged
+    analysis is yielded at once; otherwise each chunk's tokens are yielded in
+    chunk order as soon as they are available. Either way the concatenated
+    output is identical to ``analyze_security``'s result.
+
     Args:
-        code_snippet (str): Original code
-        llm_analysis (str): Previous LLM security analysis
-        chat_history (list): Conversation history
-        query (str): User's current query
-        llm: Language Model for response generation
-    
+        semgrep_results (dict): Results from Semgrep scan
+        code_snippet (str): Code to analyze
+        llm: Language Model for analysis
+        max_concurrency (int): Maximum number of chunk requests in flight
+        language (str): File extension hint used to find function/class boundaries
+        line_ranges (list): Only analyze chunks overlapping these 1-based
+            (start_line, end_line) ranges, e.g. the hunks of a diff
+        merge (bool): Whether to consolidate the per-chunk analyses
+        on_progress (callable): Called as ``on_progress(done, total)`` from
+            the consuming thread as chunks finish
+
+    Yields:
+        str: Pieces of the security analysis
+    """
+    prompt = _security_analysis_prompt()
+
+    try:
+        code_chunks = _select_chunks(code_snippet, language, line_ranges)
+        if not code_chunks:
+            yield NO_CHANGES_MESSAGE
+            return
+
+        if len(code_chunks) == 1:
+            messages = prompt.format_messages(**_security_analysis_inputs(semgrep_results, code_chunks[0]))
+            yield from stream_with_cache(llm, messages)
+            return
+
+        if merge:
+            results = _map_chunks(prompt | llm | StrOutputParser(), semgrep_results, code_chunks,
+                                  max_concurrency, on_progress)
+            final_batch = _reduce_analyses([response for response, _ in results], llm, max_concurrency)
+            if len(final_batch) == 1:
+                yield final_batch[0]
+            else:
+                # Buffered: reasoning removal and the size cap need the whole merged text
+                messages = _analysis_merge_prompt().format_messages(**_merge_inputs(final_batch))
+                yield _bound_analysis("".join(stream_with_cache(llm, messages)))
+            yield _merged_footer(results)
+            return
+
+        # Each worker streams its chunk into its own queue; the consumer
+        # drains the queues in chunk order so output stays ordered
+        queues = [queue.Queue() for _ in code_chunks]
+        stop = threading.Event()
+
+        def stream_chunk(index):
+            started = time.perf_counter()
+            try:
+                messages = prompt.format_messages(**_security_analysis_inputs(semgrep_results, code_chunks[index]))
+                for token in stream_with_cache(llm, messages):
+                    if stop.is_set():
+                        return
+                    queues[index].put(("token", token))
+                queues[index].put(("done", time.perf_counter() - started))
+            except Exception as e:
+                queues[index].put(("error", e))
+
+        workers = max(1, min(max_concurrency, len(code_chunks)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for index in range(len(code_chunks)):
+                executor.submit(stream_chunk, index)
+
+            for i, chunk_queue in enumerate(queues, 1):
+                if i > 1:
+                    yield "\n\n"
+                yield _part_header(i, len(code_chunks))
+                while True:
+                    kind, value = chunk_queue.get()
+                    if kind == "token":
+                        yield value
+                    elif kind == "done":
+                        yield _part_footer(value)
+                        if on_progress:
+                            on_progress(i, len(code_chunks))
+                        break
+                    else:
+                        raise value
+        finally:
+            # Stop outstanding workers if the consumer goes away early
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    except Exception as e:
+        if _is_size_error(e):
+            yield ANALYSIS_SIZE_ERROR
+            return
+        raise e
+
+def analyze_files(files, semgrep_results, llm, max_workers=4, max_concurrency=2, line_ranges=None,
+                  on_file_done=None):
+    """
+    Analyze several files concurrently, each with only its own Semgrep findings.
+
+    Args:
+        files (dict): Mapping of file paths (as scanned by Semgrep) to their code
+        semgrep_results (dict): Results from the Semgrep scan of all files
+        llm: Language Model for analysis
+        max_workers (int): Number of files analyzed at the same time
+        max_concurrency (int): Maximum chunk requests in flight per file
+        line_ranges (dict): Optional mapping of file paths to changed line ranges
+        on_file_done (callable): Called as ``on_file_done(path, result, done, total)``
+            from the calling thread each time a file finishes; if it raises, files
+            that have not started yet are skipped and the exception propagates
+
     Returns:
-        str: Chat response focused on vulnerabilities
+        dict: Mapping of file paths, in input order, to dicts holding the
+        file's ``llm_analysis`` report, structured ``findings``, ``error``
+        and ``elapsed`` seconds
     """
-    # Chunk the context before processing
-    chunked_code, chunked_analysis = chunk_chat_context(code_snippet, llm_analysis)
-    
-    # Convert chat history to the format expected by LangChain
-    formatted_messages = []
-    for msg in chat_history[-5:]:  # Only keep last 5 messages to manage context
-        if msg["role"] == "human":
-            formatted_messages.append(HumanMessage(content=msg["content"]))
-        else:
-            formatted_messages.append(AIMessage(content=msg["content"]))
-    
-    # Create prompt template for security chat
-    chat_prompt = ChatPromptTemplate.from_messages([
+    def run_file(file_path):
+        started = time.perf_counter()
+        result = {"llm_analysis": "", "findings": [], "error": None}
+        try:
+            analysis = analyze_security(
+                findings_for_path(semgrep_results, file_path),
+                files[file_path],
+                llm,
+                max_concurrency=max_concurrency,
+                language=os.path.splitext(file_path)[1],
+                line_ranges=(line_ranges or {}).get(file_path)
+            )
+            result["llm_analysis"], result["findings"] = extract_findings(analysis, os.path.basename(file_path))
+        except Exception as e:
+            result["error"] = str(e)
+        result["elapsed"] = time.perf_counter() - started
+        return result
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files) or 1))) as executor:
+        futures = {executor.submit(run_file, file_path): file_path for file_path in files}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                file_path = futures[future]
+                results[file_path] = future.result()
+                if on_file_done:
+                    on_file_done(file_path, results[file_path], done, len(files))
+        except BaseException:
+            # e.g. the callback cancelled the job: drop the files not started yet
+            for future in futures:
+                future.cancel()
+            raise
+
+    return {file_path: results[file_path] for file_path in files}
+
+def _security_chat_prompt():
+    """Create the prompt template used for security chat."""
+    return ChatPromptTemplate.from_messages([
         (
             "system",
             """You are an expert security advisor helping developers understand the vulnerabilities detected in their code.
@@ -147,42 +473,142 @@ def security_chat(code_snippet, llm_analysis, chat_history, query, llm):
         {query}
         """),
     ])
-    
-    # Create and invoke chain
-    chain = (
-        {
-            "code": lambda _: chunked_code, 
-            "llm_analysis": lambda _: chunked_analysis,
-            "query": lambda _: query, 
-            "chat_history": lambda _: formatted_messages
-        } 
-        | chat_prompt 
-        | llm 
-        | StrOutputParser()
-    )
-    
-    # Invoke the chain with an empty dict since we're using lambdas
-    response = chain.invoke({})
-    
-    return response
 
-def suggest_rules(code_snippet, llm_analysis, llm):
+def _conversation_summary_prompt():
+    """Create the prompt template used to fold older chat turns into a running summary."""
+    return ChatPromptTemplate.from_messages([
+        (
+            "system",
+            """You maintain a running summary of a conversation between a developer and a security advisor.
+            Update the summary with the new turns. Keep the vulnerabilities discussed, the fixes agreed on,
+            and any open questions. Reply with the updated summary only, in at most 150 words.
+            """
+        ),
+        ("human", """
+        # Summary So Far:
+        {summary}
+        
+        # New Turns:
+        {new_turns}
+        """),
+    ])
+
+def update_conversation_summary(summary_state, older_messages, llm):
     """
-    Generate custom Semgrep rules based on identified vulnerabilities.
-    
+    Fold chat turns that left the recent window into a rolling summary.
+
+    Only turns not yet summarized are sent, so each call costs one short
+    request no matter how long the conversation is.
+
+    Args:
+        summary_state (dict): Per-session state holding ``summary`` and the
+            number of ``summarized`` messages; updated in place
+        older_messages (list): Messages before the recent window
+        llm: Language Model used to write the summary
+
+    Returns:
+        str: Summary of ``older_messages``, or "" if there are none
+    """
+    if summary_state.get("summarized", 0) > len(older_messages):
+        # The conversation was cleared or rewound: start over
+        summary_state.clear()
+
+    pending = older_messages[summary_state.get("summarized", 0):]
+    if pending:
+        transcript = "\n\n".join(
+            f"{'Developer' if msg['role'] == 'human' else 'Advisor'}: {msg['content']}" for msg in pending
+        )
+        chain = _conversation_summary_prompt() | llm | StrOutputParser()
+        summary = chain.invoke({
+            "summary": summary_state.get("summary") or "(none yet)",
+            "new_turns": truncate_to_tokens(transcript, CHAT_HISTORY_TOKENS * 2)
+        })
+        summary = _strip_reasoning(summary)
+        summary_state["summary"] = truncate_to_tokens(summary, CHAT_SUMMARY_TOKENS)
+        summary_state["summarized"] = len(older_messages)
+
+    return summary_state.get("summary", "")
+
+def _security_chat_inputs(code_snippet, llm_analysis, chat_history, query, llm, index=None, summary_state=None):
+    if index is None:
+        index = build_chat_index(code_snippet, llm_analysis)
+
+    # Retrieve with the previous question too, so follow-ups like "how do I fix it?" stay on topic
+    previous_queries = [msg["content"] for msg in chat_history if msg["role"] == "human"][-1:]
+    code_context, analysis_context = retrieve_chat_context(index, " ".join(previous_queries + [query]))
+
+    # Resend only a token-budgeted window of recent turns; older ones live on in the summary
+    older_messages, recent_messages = split_chat_history(chat_history)
+
+    # Convert chat history to the format expected by LangChain
+    formatted_messages = []
+    if older_messages and summary_state is not None:
+        summary = update_conversation_summary(summary_state, older_messages, llm)
+        if summary:
+            formatted_messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    for msg in recent_messages:
+        if msg["role"] == "human":
+            formatted_messages.append(HumanMessage(content=msg["content"]))
+        else:
+            formatted_messages.append(AIMessage(content=msg["content"]))
+
+    return {
+        "code": code_context,
+        "llm_analysis": analysis_context,
+        "query": query,
+        "chat_history": formatted_messages
+    }
+
+def security_chat(code_snippet, llm_analysis, chat_history, query, llm, index=None, summary_state=None):
+    """
+    Generate security-focused chat responses.
+
+    Only the code regions, analysis sections and findings most relevant
+    to the query are sent, selected from ``index``. Recent turns are sent
+    verbatim up to a token budget; older turns are represented by a
+    rolling summary when ``summary_state`` is given, and dropped otherwise.
+
     Args:
         code_snippet (str): Original code
-        llm_analysis (str): Vulnerabilities analysis
-        llm: Language Model for rule generation
-    
+        llm_analysis (str): Previous LLM security analysis
+        chat_history (list): Conversation history
+        query (str): User's current query
+        llm: Language Model for response generation
+        index (BM25Index): Index from build_chat_index, built on the fly if None
+        summary_state (dict): Per-session state for the rolling summary, updated in place
+
     Returns:
-        str: Generated Semgrep rules
+        str: Chat response focused on vulnerabilities
     """
-    # Chunk the context before processing
-    chunked_code, chunked_analysis = chunk_rule_context(code_snippet, llm_analysis)
-    
-    # Create prompt template for rule suggestions
-    prompt = ChatPromptTemplate.from_messages([
+    chain = _security_chat_prompt() | llm | StrOutputParser()
+
+    return chain.invoke(_security_chat_inputs(code_snippet, llm_analysis, chat_history, query, llm,
+                                              index, summary_state))
+
+def stream_security_chat(code_snippet, llm_analysis, chat_history, query, llm, index=None, summary_state=None):
+    """
+    Stream a security-focused chat response as tokens arrive.
+
+    Args:
+        code_snippet (str): Original code
+        llm_analysis (str): Previous LLM security analysis
+        chat_history (list): Conversation history
+        query (str): User's current query
+        llm: Language Model for response generation
+        index (BM25Index): Index from build_chat_index, built on the fly if None
+        summary_state (dict): Per-session state for the rolling summary, updated in place
+
+    Yields:
+        str: Pieces of the chat response
+    """
+    messages = _security_chat_prompt().format_messages(
+        **_security_chat_inputs(code_snippet, llm_analysis, chat_history, query, llm, index, summary_state)
+    )
+    yield from stream_with_cache(llm, messages)
+
+def _rule_suggestion_prompt():
+    """Create the prompt template used to generate Semgrep rules."""
+    return ChatPromptTemplate.from_messages([
         (
             "system",
             """You are a Semgrep rule expert. Based on the provided code and the vulnerabilities that were identified in the analysis, 
@@ -209,23 +635,106 @@ def suggest_rules(code_snippet, llm_analysis, llm):
         Please create custom Semgrep rules that would detect the specific vulnerabilities identified in the analysis.
         """),
     ])
-    
+
+def _rule_suggestion_inputs(code_snippet, llm_analysis):
+    # Chunk the context before processing
+    chunked_code, chunked_analysis = chunk_rule_context(code_snippet, llm_analysis)
+    return {
+        "code_snippet": chunked_code,
+        "llm_analysis": chunked_analysis
+    }
+
+def suggest_rules(code_snippet, llm_analysis, llm):
+    """
+    Generate custom Semgrep rules based on identified vulnerabilities.
+
+    Args:
+        code_snippet (str): Original code
+        llm_analysis (str): Vulnerabilities analysis
+        llm: Language Model for rule generation
+
+    Returns:
+        str: Generated Semgrep rules
+    """
     try:
         # Create and invoke chain with chunked content
-        chain = (
-            {"code_snippet": RunnablePassthrough(), "llm_analysis": RunnablePassthrough()} 
-            | prompt 
-            | llm 
-            | StrOutputParser()
+        chain = _rule_suggestion_prompt() | llm | StrOutputParser()
+
+        return chain.invoke(_rule_suggestion_inputs(code_snippet, llm_analysis))
+    except Exception as e:
+        if _is_size_error(e):
+            return RULES_SIZE_ERROR
+        raise e
+
+def stream_rule_suggestions(code_snippet, llm_analysis, llm):
+    """
+    Stream generated Semgrep rules as tokens arrive.
+
+    Args:
+        code_snippet (str): Original code
+        llm_analysis (str): Vulnerabilities analysis
+        llm: Language Model for rule generation
+
+    Yields:
+        str: Pieces of the generated rules
+    """
+    try:
+        messages = _rule_suggestion_prompt().format_messages(
+            **_rule_suggestion_inputs(code_snippet, llm_analysis)
         )
-        
-        response = chain.invoke({
-            "code_snippet": chunked_code,
-            "llm_analysis": chunked_analysis
-        })
-        
-        return response
+        yield from stream_with_cache(llm, messages)
+    except Exception as e:
+        if _is_size_error(e):
+            yield RULES_SIZE_ERROR
+            return
+        raise e
+
+def _rule_repair_prompt():
+    """Create the prompt template used to fix generated Semgrep rules that failed validation."""
+    return ChatPromptTemplate.from_messages([
+        (
+            "system",
+            """You are a Semgrep rule expert. The following Semgrep rules were generated for the provided code,
+            but they either do not compile or do not match the code they were written for.
+
+            Rewrite each rule so that it is valid Semgrep YAML and matches the vulnerable code. Keep each rule's id,
+            and return every rule in its own ```yaml block.
+            """
+        ),
+        ("human", """
+        # Code the Rules Must Match:
+        ```
+        {code_snippet}
+        ```
+
+        # Failing Rules:
+        {failing_rules}
+
+        Please return the corrected Semgrep rules.
+        """),
+    ])
+
+def repair_rules(code_snippet, failing_rules, llm):
+    """
+    Regenerate only the Semgrep rules that failed validation.
+
+    Args:
+        code_snippet (str): Code the rules are expected to match
+        failing_rules (list): (rule_yaml, problem) pairs, where ``problem`` is
+            the Semgrep error or a note that the rule matched nothing
+        llm: Language Model for rule generation
+
+    Returns:
+        str: Corrected rules as ```yaml blocks
+    """
+    chunked_code, _ = chunk_rule_context(code_snippet, "")
+    described = "\n\n".join(
+        f"Problem: {problem}\n```yaml\n{rule_yaml.strip()}\n```" for rule_yaml, problem in failing_rules
+    )
+    try:
+        chain = _rule_repair_prompt() | llm | StrOutputParser()
+        return chain.invoke({"code_snippet": chunked_code, "failing_rules": described})
     except Exception as e:
-        if "413" in str(e) or "too large" in str(e).lower():
-            return "❌ Error: Input size exceeds model's capacity even after chunking. Please try with a smaller code sample."
-        raise e
\ No newline at end of file
+        if _is_size_error(e):
+            return RULES_SIZE_ERROR
+        raise e
@@ -0,0 +1,328 @@
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+from datetime import date
+from functools import lru_cache
+
+from .file_utils import iter_code_files
+from .rule_bundle import get_active_bundle, DEFAULT_BUNDLE_ROOT, CUSTOM_PACK_ROOT
+
+DEFAULT_CACHE_DIR = os.path.join(".llmgrep_cache", "semgrep")
+# Bytes of target paths per Semgrep invocation, well under common ARG_MAX limits
+MAX_TARGET_ARGV_BYTES = 64 * 1024
+
+class SemgrepError(Exception):
+    """Raised when a Semgrep invocation fails."""
+
+    def __init__(self, message, stderr=""):
+        super().__init__(message)
+        self.stderr = stderr
+
+@lru_cache(maxsize=1)
+def get_semgrep_version():
+    """
+    Return the installed Semgrep version string.
+
+    Returns:
+        str: Version reported by ``semgrep --version`` or "unknown"
+    """
+    try:
+        result = subprocess.run(["semgrep", "--version"], capture_output=True, text=True)
+        return result.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+def _hash_path(digest, path):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                with open(file_path, "rb") as f:
+                    digest.update(f.read())
+    else:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+
+def _active_bundle_version(config):
+    """Return the version of the active bundle or custom pack whose rules directory is ``config``."""
+    for bundle_root in (DEFAULT_BUNDLE_ROOT, CUSTOM_PACK_ROOT):
+        bundle = get_active_bundle(bundle_root)
+        if bundle and isinstance(bundle.get("version"), str) and \
+                os.path.abspath(config) == os.path.abspath(bundle["rules_path"]):
+            return bundle["version"]
+    return None
+
+def ruleset_fingerprint(configs):
+    """
+    Compute a fingerprint identifying a Semgrep ruleset.
+
+    The rules of the active rule bundle and custom pack are identified by
+    their manifest version. Other local rule files and directories are
+    hashed by content. Registry configs such as ``auto`` cannot be hashed
+    locally, so they are keyed by name and the current date and refresh
+    at most daily.
+
+    Args:
+        configs (list): Values passed to ``--config``
+
+    Returns:
+        str: Hex digest combining the configs and the Semgrep version
+    """
+    digest = hashlib.sha256(get_semgrep_version().encode("utf-8"))
+    for config in configs:
+        digest.update(config.encode("utf-8"))
+        version = _active_bundle_version(config) if os.path.isdir(config) else None
+        if version:
+            digest.update(version.encode("utf-8"))
+        elif os.path.exists(config):
+            _hash_path(digest, config)
+        else:
+            digest.update(date.today().isoformat().encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def collect_target_files(target_path):
+    """
+    List the files Semgrep would scan for a target.
+
+    Args:
+        target_path (str): File or directory to scan
+
+    Returns:
+        list: Paths of the supported, non-ignored files under the target
+    """
+    if os.path.isfile(target_path):
+        return [target_path]
+    return [file_path for file_path, _ in iter_code_files(target_path)]
+
+def _rule_id_prefixes(configs):
+    """Return the dotted path prefixes Semgrep puts on the ids of rules loaded from local configs."""
+    prefixes = set()
+    for config in configs:
+        if not os.path.exists(config):
+            continue
+        rules_dir = config if os.path.isdir(config) else os.path.dirname(config)
+        for path in (os.path.relpath(rules_dir), os.path.abspath(rules_dir).lstrip(os.sep)):
+            prefix = ".".join(part for part in path.split(os.sep) if part not in ("", "."))
+            if prefix:
+                prefixes.add(prefix + ".")
+    # Longest first, so a nested rules directory wins over its parent
+    return sorted(prefixes, key=len, reverse=True)
+
+def _strip_rule_id_prefixes(results, configs):
+    """
+    Restore the rule ids as written in local rule files.
+
+    Semgrep prefixes them with the rule file's directory, e.g.
+    ``rule_bundles.<version>.rules.os-system``, which changes with every
+    bundle version and only costs prompt tokens.
+    """
+    prefixes = _rule_id_prefixes(configs)
+    if not prefixes:
+        return results
+
+    def strip(rule_id):
+        prefix = next((prefix for prefix in prefixes if rule_id.startswith(prefix)), None)
+        return rule_id[len(prefix):] if prefix else rule_id
+
+    for finding in results.get("results", []):
+        if isinstance(finding.get("check_id"), str):
+            finding["check_id"] = strip(finding["check_id"])
+    for error in results.get("errors", []):
+        if isinstance(error.get("rule_id"), str):
+            error["rule_id"] = strip(error["rule_id"])
+    return results
+
+def run_semgrep(targets, configs=("auto",), metrics_enabled=False, output_path=None, jobs=None,
+                allow_errors=False):
+    """
+    Run a single Semgrep invocation over one or more targets.
+
+    Args:
+        targets (list): Files or directories to scan
+        configs (list): Values passed to ``--config``
+        metrics_enabled (bool): Whether to send Semgrep metrics
+        output_path (str): Optional file to also save the JSON output to; the
+            results are always read from Semgrep's stdout
+        jobs (int): Number of Semgrep worker processes, Semgrep's default if None
+        allow_errors (bool): Return the JSON output even if Semgrep exits with
+            an error, e.g. to inspect the ``errors`` of invalid rules
+
+    Returns:
+        dict: Parsed Semgrep JSON output
+
+    Raises:
+        SemgrepError: If Semgrep exits with an error (unless ``allow_errors``)
+            or its output cannot be parsed
+    """
+    cmd = ["semgrep", "--json"]
+    if not metrics_enabled:
+        cmd.append("--metrics=off")
+    for config in configs:
+        cmd.append(f"--config={config}")
+    if all(os.path.exists(config) for config in configs):
+        # Local rules only: skip the network version check as well
+        cmd.append("--disable-version-check")
+    if jobs:
+        cmd.append(f"--jobs={jobs}")
+    cmd.extend(targets)
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        # Missing binary, or an argument list the OS refuses (E2BIG)
+        raise SemgrepError(f"Could not run Semgrep: {str(e)}")
+    if result.returncode != 0 and not (allow_errors and result.stdout.strip()):
+        raise SemgrepError("Semgrep scan failed!", result.stderr)
+
+    try:
+        # Read from stdout so concurrent scans never share an output file
+        results = json.loads(result.stdout)
+    except ValueError as e:
+        raise SemgrepError(f"Error parsing Semgrep results: {str(e)}", result.stderr)
+    results = _strip_rule_id_prefixes(results, configs)
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(results, f)
+    return results
+
+def _file_cache_key(file_path, content):
+    # Semgrep picks rules by language, so the extension is part of the key
+    extension = os.path.splitext(file_path)[1].lower()
+    return hashlib.sha256(extension.encode("utf-8") + b"\0" + content).hexdigest()
+
+def _write_cache_entry(entry_path, entry):
+    """Write a findings cache entry atomically, so concurrent readers never see a partial one."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _target_batches(targets, max_bytes=MAX_TARGET_ARGV_BYTES):
+    """Split targets into batches whose paths fit comfortably on one command line."""
+    batch = []
+    size = 0
+    for target in targets:
+        length = len(os.fsencode(target)) + 1
+        if batch and size + length > max_bytes:
+            yield batch
+            batch = []
+            size = 0
+        batch.append(target)
+        size += length
+    if batch:
+        yield batch
+
+def scan_with_cache(target_path, configs=("auto",), metrics_enabled=False,
+                    output_path=None, cache_dir=DEFAULT_CACHE_DIR, jobs=None):
+    """
+    Scan a target with Semgrep, reusing cached findings for unchanged files.
+
+    Findings are cached per file, keyed by the file's content hash and
+    the ruleset fingerprint. Only files without a cache entry are passed
+    to Semgrep, and their findings are merged with the cached ones into
+    a single results dict shaped like Semgrep's own JSON output.
+
+    Args:
+        target_path (Union[str, list]): File or directory to scan, or a list of them
+        configs (list): Values passed to ``--config``
+        metrics_enabled (bool): Whether to send Semgrep metrics
+        output_path (str): Optional file to also save the fresh Semgrep JSON output to
+        cache_dir (str): Root directory of the findings cache
+        jobs (int): Number of Semgrep worker processes, Semgrep's default if None
+
+    Returns:
+        dict: Merged Semgrep results with an extra ``cache`` summary
+
+    Raises:
+        SemgrepError: If the Semgrep run for changed files fails
+    """
+    ruleset_dir = os.path.join(cache_dir, ruleset_fingerprint(configs))
+    os.makedirs(ruleset_dir, exist_ok=True)
+
+    merged = {"results": [], "errors": [], "paths": {"scanned": []}}
+    pending = {}
+    hits = 0
+
+    targets = [target_path] if isinstance(target_path, str) else target_path
+    target_files = [file_path for target in targets for file_path in collect_target_files(target)]
+
+    for file_path in target_files:
+        with open(file_path, "rb") as f:
+            key = _file_cache_key(file_path, f.read())
+        entry_path = os.path.join(ruleset_dir, f"{key}.json")
+
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if not (isinstance(entry, dict) and isinstance(entry.get("results"), list)
+                and isinstance(entry.get("errors"), list)):
+            pending[file_path] = entry_path
+            continue
+
+        # Entries written before ids were normalized may still carry the rules path
+        entry = _strip_rule_id_prefixes(entry, configs)
+        # Cached findings are stored without a path; attach the current one
+        merged["results"].extend({**finding, "path": file_path} for finding in entry["results"])
+        merged["errors"].extend({**error, "path": file_path} for error in entry["errors"])
+        merged["paths"]["scanned"].append(file_path)
+        hits += 1
+
+    if pending:
+        # Large trees are scanned in several invocations so the argument list stays within the OS limit
+        fresh = {}
+        for batch in _target_batches(list(pending)):
+            output = run_semgrep(batch, configs, metrics_enabled, jobs=jobs)
+            if not fresh:
+                fresh = output
+                continue
+            fresh["results"] = fresh.get("results", []) + output.get("results", [])
+            fresh["errors"] = fresh.get("errors", []) + output.get("errors", [])
+            fresh_paths = fresh.setdefault("paths", {})
+            fresh_paths["scanned"] = fresh_paths.get("scanned", []) + output.get("paths", {}).get("scanned", [])
+
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            with open(output_path, "w") as f:
+                json.dump(fresh, f)
+
+        by_path = {}
+        for kind in ("results", "errors"):
+            for item in fresh.get(kind, []):
+                by_path.setdefault((kind, os.path.normpath(item.get("path", ""))), []).append(item)
+
+        for file_path, entry_path in pending.items():
+            file_results = by_path.get(("results", os.path.normpath(file_path)), [])
+            file_errors = by_path.get(("errors", os.path.normpath(file_path)), [])
+
+            entry = {
+                "results": [{k: v for k, v in r.items() if k != "path"} for r in file_results],
+                "errors": [{k: v for k, v in e.items() if k != "path"} for e in file_errors]
+            }
+            _write_cache_entry(entry_path, entry)
+
+        # Keep any top-level keys (version, interfile info, ...) from the fresh run
+        merged = {
+            **fresh,
+            "results": merged["results"] + fresh.get("results", []),
+            "errors": merged["errors"] + fresh.get("errors", []),
+            "paths": {
+                **fresh.get("paths", {}),
+                "scanned": merged["paths"]["scanned"] + fresh.get("paths", {}).get("scanned", list(pending))
+            }
+        }
+
+    merged["cache"] = {"hits": hits, "misses": len(pending)}
+    return merged
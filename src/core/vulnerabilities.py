@@ -0,0 +1,314 @@
+import re
+import ast
+import json
+from dataclasses import dataclass, field, asdict
+
+from .findings import SEVERITY_LEVELS
+
+# Appended to the analysis and merge prompts; no braces, as the prompts are templates
+STRUCTURED_OUTPUT_INSTRUCTIONS = """After the report, add a fenced ```json block listing every vulnerability as an object with the keys
+            "title", "classification", "severity" (critical, high, medium or low), "lines" (list of line numbers),
+            "risk" and "fix" (one sentence each). Use an empty list if there are no vulnerabilities."""
+
+JSON_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*(\[.*?\]|\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+THINK_BLOCK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([\]}])")
+LINE_NUMBER_PATTERN = re.compile(r"\d+")
+# Markdown fallback: "1. **VULNERABILITY**: ..." style fields written by the analysis prompt
+FIELD_PATTERN = re.compile(
+    r"^[\s\d.*#\-]*(VULNERABILITY|CLASSIFICATION|SEVERITY|RISK|FIX)\W*?[:\-]\W*(.*?)"
+    r"(?=^[\s\d.*#\-]*(?:VULNERABILITY|CLASSIFICATION|SEVERITY|RISK|FIX)\W*?[:\-]|\Z)",
+    re.MULTILINE | re.DOTALL | re.IGNORECASE
+)
+
+# Accepted spellings of each field in the model's JSON
+FIELD_ALIASES = {
+    "title": ("title", "vulnerability", "name", "issue"),
+    "classification": ("classification", "type", "category", "cwe"),
+    "severity": ("severity", "level", "risk_level"),
+    "lines": ("lines", "line", "line_numbers", "location", "locations"),
+    "risk": ("risk", "impact", "description"),
+    "fix": ("fix", "remediation", "recommendation", "mitigation")
+}
+
+@dataclass(slots=True)
+class Finding:
+    """A single vulnerability reported by the LLM, in compact form."""
+
+    title: str
+    classification: str = ""
+    severity: str = "medium"
+    lines: list = field(default_factory=list)
+    risk: str = ""
+    fix: str = ""
+    path: str = ""
+
+    def to_dict(self):
+        """Return the finding as a JSON-serializable dict."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a finding from a dict, accepting common alternative key names.
+
+        Args:
+            data (dict): Finding as written by the model or by ``to_dict``
+
+        Returns:
+            Finding: Parsed finding, or None if it has no title or classification
+        """
+        values = {key.lower().strip(): value for key, value in data.items()}
+
+        def pick(name):
+            for alias in FIELD_ALIASES[name]:
+                if values.get(alias) not in (None, ""):
+                    return values[alias]
+            return None
+
+        title = _as_text(pick("title"))
+        classification = _as_text(pick("classification"))
+        if not title and not classification:
+            return None
+        return cls(
+            title=title or classification,
+            classification=classification,
+            severity=normalize_severity(pick("severity")),
+            lines=_as_lines(pick("lines")),
+            risk=_as_text(pick("risk")),
+            fix=_as_text(pick("fix")),
+            path=_as_text(values.get("path"))
+        )
+
+    def to_compact(self, max_chars=200):
+        """
+        Render the finding as one short line for prompts.
+
+        Args:
+            max_chars (int): Maximum characters kept from the risk and the fix
+
+        Returns:
+            str: Single-line summary of the finding
+        """
+        lines = f"lines {', '.join(map(str, self.lines))}" if self.lines else ""
+        location = ", ".join(part for part in (self.path, lines) if part)
+        location = f" ({location})" if location else ""
+        classification = f" [{self.classification}]" if self.classification and self.classification != self.title else ""
+        text = f"- {self.severity.upper()}: {self.title}{classification}{location}"
+        if self.risk:
+            text += f" Risk: {_shorten(self.risk, max_chars)}"
+        if self.fix:
+            text += f" Fix: {_shorten(self.fix, max_chars)}"
+        return text
+
+def _as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_as_text(item) for item in value)
+    return " ".join(str(value).split())
+
+def _as_lines(value):
+    if value is None:
+        return []
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return sorted({line for item in value for line in _as_lines(item)})
+    return sorted({int(number) for number in LINE_NUMBER_PATTERN.findall(str(value))})
+
+def _shorten(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+def normalize_severity(value):
+    """
+    Map a free-form severity onto the critical/high/medium/low scale.
+
+    Args:
+        value: Severity as written by the model, e.g. "High" or "CRITICAL (9.8)"
+
+    Returns:
+        str: One of SEVERITY_LEVELS, "medium" if unrecognized
+    """
+    text = str(value or "").lower()
+    for level in SEVERITY_LEVELS:
+        if level in text:
+            return level
+    return "medium"
+
+def _load_json(text):
+    """Parse JSON written by a model, tolerating trailing commas and Python literals."""
+    for candidate in (text, TRAILING_COMMA_PATTERN.sub(r"\1", text)):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+        try:
+            return ast.literal_eval(candidate)
+        except (ValueError, SyntaxError):
+            pass
+    return None
+
+def _findings_from_json(data):
+    if isinstance(data, dict):
+        # {"findings": [...]} or a single finding
+        nested = next((value for value in data.values() if isinstance(value, list)), None)
+        data = nested if nested is not None else [data]
+    if not isinstance(data, list):
+        return []
+    findings = [Finding.from_dict(item) for item in data if isinstance(item, dict)]
+    return [finding for finding in findings if finding is not None]
+
+def _findings_from_markdown(text):
+    findings = []
+    current = {}
+    for name, value in FIELD_PATTERN.findall(text):
+        name = name.lower()
+        if name == "vulnerability" and current:
+            findings.append(current)
+            current = {}
+        current[name] = value.strip().strip("*").strip()
+    if current:
+        findings.append(current)
+    return _findings_from_json(findings)
+
+def _findings_payload(data):
+    """Return the finding dicts of a parsed JSON block, or None if it is not a findings block."""
+    if isinstance(data, dict) and set(data) == {"findings"}:
+        data = data["findings"]
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        return None
+    # Every entry must read as a finding, so JSON samples in the report's fixes are left alone
+    if any(Finding.from_dict(item) is None for item in data):
+        return None
+    return data
+
+def _find_findings_blocks(text):
+    """Return every fenced JSON findings block, as (match, finding dicts) pairs in order."""
+    blocks = []
+    for match in JSON_BLOCK_PATTERN.finditer(text):
+        data = _findings_payload(_load_json(match.group(1)))
+        if data is not None:
+            blocks.append((match, data))
+    return blocks
+
+def parse_findings(text):
+    """
+    Extract structured findings from an LLM analysis.
+
+    The analysis prompt asks for a fenced JSON block of findings after the
+    markdown report. Every block that is a list of findings, or a
+    ``{"findings": [...]}`` object, is read, since an unmerged analysis
+    has one per chunk; if there is none, the markdown
+    VULNERABILITY/CLASSIFICATION/SEVERITY/RISK/FIX fields are parsed
+    instead.
+
+    Args:
+        text (str): LLM output
+
+    Returns:
+        list: Finding objects, possibly empty
+    """
+    text = THINK_BLOCK_PATTERN.sub("", text or "")
+    blocks = _find_findings_blocks(text)
+    if blocks:
+        return [finding for _, data in blocks for finding in _findings_from_json(data)]
+    return _findings_from_markdown(text)
+
+def strip_findings_block(text):
+    """
+    Remove the fenced JSON findings blocks from an analysis for display.
+
+    Only the blocks ``parse_findings`` reads are removed; JSON examples
+    inside the report's fixes are kept.
+
+    Args:
+        text (str): LLM output
+
+    Returns:
+        str: The markdown report without its JSON findings
+    """
+    text = text or ""
+    blocks = _find_findings_blocks(text)
+    if not blocks:
+        return text
+
+    # Trim only around each removed block; blank lines elsewhere, e.g. in code samples, are kept
+    parts = []
+    position = 0
+    for match, _ in blocks:
+        parts.append(text[position:match.start()])
+        position = match.end()
+    parts.append(text[position:])
+    parts = [parts[0].rstrip()] + [re.sub(r"^\s*\n", "", part).rstrip() for part in parts[1:]]
+    return "\n\n".join(part for part in parts if part)
+
+def dedupe_findings(findings):
+    """
+    Merge findings that describe the same vulnerability.
+
+    Findings in the same file with the same classification and title
+    (case-insensitive) are merged: their lines are combined and the highest severity kept.
+    The result is ordered from most to least severe.
+
+    Args:
+        findings (list): Finding objects
+
+    Returns:
+        list: Deduplicated Finding objects
+    """
+    merged = {}
+    for finding in findings:
+        key = (finding.path, finding.classification.lower(), finding.title.lower())
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = Finding(**finding.to_dict())
+            continue
+        existing.lines = sorted(set(existing.lines) | set(finding.lines))
+        if SEVERITY_LEVELS.index(finding.severity) < SEVERITY_LEVELS.index(existing.severity):
+            existing.severity = finding.severity
+        existing.risk = existing.risk or finding.risk
+        existing.fix = existing.fix or finding.fix
+    return sorted(merged.values(), key=lambda finding: SEVERITY_LEVELS.index(finding.severity))
+
+def format_findings_compact(findings):
+    """
+    Render findings as a compact list for the chat and rules prompts.
+
+    Args:
+        findings (list): Finding objects
+
+    Returns:
+        str: One line per finding
+    """
+    return "\n".join(finding.to_compact() for finding in findings)
+
+def format_findings_block(findings):
+    """
+    Render findings as the fenced JSON block the analysis prompt asks for.
+
+    Args:
+        findings (list): Finding objects
+
+    Returns:
+        str: A ```json block that ``parse_findings`` reads back
+    """
+    items = [{key: value for key, value in finding.to_dict().items() if key != "path" or value}
+             for finding in findings]
+    return f"```json\n{json.dumps(items, separators=(',', ':'), ensure_ascii=False)}\n```"
+
+def extract_findings(text, path=""):
+    """
+    Split an LLM analysis into its displayable report and its structured findings.
+
+    Args:
+        text (str): LLM output
+        path (str): File the analysis is about, recorded on each finding
+
+    Returns:
+        Tuple[str, list]: Report without its JSON blocks, and deduplicated findings
+    """
+    findings = parse_findings(text)
+    for finding in findings:
+        finding.path = finding.path or path
+    return strip_findings_block(text), dedupe_findings(findings)
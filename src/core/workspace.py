@@ -0,0 +1,157 @@
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import tempfile
+
+# Root of the content-addressed stores for uploaded and pasted code
+WORKSPACE_DIR = "temp_uploads"
+
+def content_hash(data):
+    """
+    Hash file content for content addressing.
+
+    Args:
+        data (bytes): File content
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def _link_or_copy(source, destination):
+    """Hardlink a blob into a scan directory, copying when links are unsupported."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+def store_blob(data, workspace_dir=WORKSPACE_DIR):
+    """
+    Store content once under its hash, skipping the write if it is already present.
+
+    Args:
+        data (bytes): File content
+        workspace_dir (str): Root of the workspace
+
+    Returns:
+        str: Path to the stored blob
+    """
+    digest = content_hash(data)
+    blob_dir = os.path.join(workspace_dir, "blobs", digest[:2])
+    blob_path = os.path.join(blob_dir, digest)
+    if os.path.exists(blob_path):
+        return blob_path
+
+    os.makedirs(blob_dir, exist_ok=True)
+    # Write to a temporary name first so readers never see a partial blob
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, blob_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return blob_path
+
+def materialize_files(files, workspace_dir=WORKSPACE_DIR):
+    """
+    Lay out a set of files as a scan directory backed by the blob store.
+
+    The directory is named after the hash of its file names and contents,
+    so the same upload always maps to the same directory and Streamlit
+    reruns do no file I/O once it exists. Files are hardlinked to their
+    blobs, falling back to copies on filesystems without hardlinks.
+
+    Args:
+        files (dict): Mapping of file names to their content as bytes
+        workspace_dir (str): Root of the workspace
+
+    Returns:
+        str: Path to the scan directory containing the files
+    """
+    entries = sorted((os.path.basename(name), content_hash(data), data) for name, data in files.items())
+    tree_hash = hashlib.sha256(
+        "\n".join(f"{name}\0{digest}" for name, digest, _ in entries).encode("utf-8")
+    ).hexdigest()
+
+    trees_dir = os.path.join(workspace_dir, "trees")
+    tree_path = os.path.join(trees_dir, tree_hash)
+    if os.path.isdir(tree_path):
+        return tree_path
+
+    os.makedirs(trees_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=trees_dir, prefix=".tmp_")
+    try:
+        for name, _, data in entries:
+            _link_or_copy(store_blob(data, workspace_dir), os.path.join(staging, name))
+        os.rename(staging, tree_path)
+    except OSError:
+        # Another session materialized the same tree first
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(tree_path):
+            raise
+    return tree_path
+
+def materialize_file(name, data, workspace_dir=WORKSPACE_DIR):
+    """
+    Lay out a single file in its own content-addressed scan directory.
+
+    Args:
+        name (str): File name, including the extension Semgrep uses to pick rules
+        data (bytes): File content
+        workspace_dir (str): Root of the workspace
+
+    Returns:
+        str: Path to the materialized file
+    """
+    return os.path.join(materialize_files({name: data}, workspace_dir), os.path.basename(name))
+
+def create_session_workspace(session_id=None, workspace_dir=WORKSPACE_DIR, max_age_hours=24):
+    """
+    Create an isolated workspace directory for one user session.
+
+    Each session materializes its uploads into its own directory, so
+    concurrent users never overwrite or delete each other's files.
+    Calling this again for an existing session marks it as active.
+    Workspaces of sessions idle for longer than ``max_age_hours`` are
+    pruned on the way.
+
+    Args:
+        session_id (str): Identifier of the session, a random one if None
+        workspace_dir (str): Root of the workspace
+        max_age_hours (float): Age after which idle session workspaces are removed
+
+    Returns:
+        str: Path to the session's workspace directory
+    """
+    prune_session_workspaces(max_age_hours, workspace_dir)
+    session_dir = os.path.join(workspace_dir, "sessions", session_id or uuid.uuid4().hex)
+    os.makedirs(session_dir, exist_ok=True)
+    # Mark the session as active so pruning leaves it alone
+    os.utime(session_dir)
+    return session_dir
+
+def prune_session_workspaces(max_age_hours=24, workspace_dir=WORKSPACE_DIR):
+    """
+    Remove session workspaces that have not been touched recently.
+
+    Args:
+        max_age_hours (float): Age after which a session workspace is removed
+        workspace_dir (str): Root of the workspace
+    """
+    sessions_dir = os.path.join(workspace_dir, "sessions")
+    cutoff = time.time() - max_age_hours * 3600
+    try:
+        entries = list(os.scandir(sessions_dir))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            continue
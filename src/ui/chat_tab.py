@@ -1,7 +1,20 @@
 import streamlit as st
 
-from ..core.llm import initialize_llm
-from ..core.security import security_chat
+from .common import load_llm
+from ..core.security import stream_security_chat
+from ..core.chat_context import build_chat_index
+
+def get_chat_index(code_content, llm_analysis):
+    """Return the retrieval index for the current code and analysis, rebuilding it only when they change."""
+    analysis_results = st.session_state.get('analysis_results') or {}
+    semgrep_results = analysis_results.get('semgrep_results')
+    key = (hash(code_content), hash(llm_analysis), id(semgrep_results))
+    if st.session_state.get('chat_index_key') != key:
+        st.session_state.chat_index = build_chat_index(
+            code_content, llm_analysis, semgrep_results, language=analysis_results.get('code_language')
+        )
+        st.session_state.chat_index_key = key
+    return st.session_state.chat_index
 
 def render_chat_tab():
     """Render the security vulnerability chat tab."""
@@ -45,20 +58,22 @@ def render_chat_tab():
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
                 # Use LLM settings from sidebar
-                llm = initialize_llm(
+                llm = load_llm(
                     model=st.session_state.get('model_selection', "deepseek-r1-distill-llama-70b"),
                     temperature=st.session_state.get('llm_temperature', 0.2)
                 )
                 
                 if llm:
-                    response = security_chat(
+                    # Render tokens as they arrive; write_stream returns the full text
+                    response = st.write_stream(stream_security_chat(
                         st.session_state.code_content,
                         st.session_state.llm_analysis,
                         st.session_state.chat_history[:-1],
                         user_query,
-                        llm
-                    )
-                    st.markdown(response)
+                        llm,
+                        index=get_chat_index(st.session_state.code_content, st.session_state.llm_analysis),
+                        summary_state=st.session_state.chat_summary
+                    ))
                     st.session_state.chat_history.append(
                         {"role": "assistant", "content": response}
                     )
\ No newline at end of file
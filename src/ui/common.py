@@ -0,0 +1,20 @@
+import streamlit as st
+
+from ..core.llm import initialize_llm, LLMInitError
+
+def load_llm(model, temperature):
+    """
+    Initialize the language model, reporting failures in the UI.
+
+    Args:
+        model (str): Name of the model to use
+        temperature (float): Controls randomness of output
+
+    Returns:
+        Initialized language model or None
+    """
+    try:
+        return initialize_llm(model=model, temperature=temperature)
+    except LLMInitError as e:
+        st.error(f"❌ {str(e)}")
+        return None
@@ -1,4 +1,4 @@
-import os
+import uuid
 import atexit
 import streamlit as st
 from dotenv import load_dotenv
@@ -6,21 +6,44 @@ from dotenv import load_dotenv
 from .scanner_tab import render_scanner_tab
 from .chat_tab import render_chat_tab
 from .rules_tab import render_rules_tab
-from ..core.file_utils import cleanup_temp_files
+from ..core.file_utils import cleanup_temp_files, SUPPORTED_EXTENSIONS
+from ..core.llm_cache import get_llm_cache
+from ..core.workspace import create_session_workspace
+from ..core.jobs import get_job_manager
+from ..core.llm import get_llm_backend
+from ..core.rule_bundle import (
+    get_active_bundle, CUSTOM_PACK_ROOT, RULE_SOURCES, RULE_SOURCE_DEFAULT, RULE_SOURCE_CUSTOM, RULE_SOURCE_BOTH
+)
+
+RULE_SOURCE_LABELS = {
+    RULE_SOURCE_DEFAULT: "🌐 Default ruleset",
+    RULE_SOURCE_CUSTOM: "🧩 Custom rule pack",
+    RULE_SOURCE_BOTH: "➕ Default + custom pack"
+}
 
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
     default_states = {
         'chat_history': [],
+        'chat_summary': {},
         'code_content': "",
         'analysis_results': None,
         'llm_analysis': "",
-        'current_file': None
+        'current_file': None,
+        'scan_job_id': None,
+        'scan_result': None,
+        'generated_rules': None,
+        'rule_reports': None
     }
     
     for key, default_value in default_states.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
+    
+    # Isolated per-session workspace; touched on every rerun so it isn't pruned
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.workspace_dir = create_session_workspace(st.session_state.session_id)
 
 def configure_page():
     """Configure Streamlit page settings."""
@@ -36,22 +59,24 @@ def render_sidebar():
         # Add cleanup button to sidebar
         if st.button("🗑️ Cleanup Temp Files", key="cleanup_button"):
             try:
-                # Clean up temp directories
-                cleanup_temp_files()
+                # Stop this session's scan before its files go away
+                if st.session_state.get('scan_job_id'):
+                    get_job_manager().cancel(st.session_state.scan_job_id)
+                
+                # Only this session's workspace; other users' scans keep their files
+                cleanup_temp_files(st.session_state.workspace_dir)
                 
                 # Reset session state
                 st.session_state.chat_history = []
+                st.session_state.chat_summary = {}
                 st.session_state.code_content = ""
                 st.session_state.analysis_results = None
                 st.session_state.llm_analysis = ""
                 st.session_state.current_file = None
-                
-                # Remove results directory if it exists
-                import shutil
-                if os.path.exists("results"):
-                    shutil.rmtree("results")
-                if os.path.exists("configs"):
-                    shutil.rmtree("configs")
+                st.session_state.scan_job_id = None
+                st.session_state.scan_result = None
+                st.session_state.generated_rules = None
+                st.session_state.rule_reports = None
                     
                 st.success("✅ Temporary files and session data cleaned up!")
                 st.rerun()  # Rerun the app to refresh the UI
@@ -72,13 +97,13 @@ def render_sidebar():
         if scan_target_type == "📤 Upload File":
             uploaded_file = st.file_uploader(
                 "Upload a file to scan", 
-                type=["py", "js", "java", "cpp", "c", "cs", "php", "rb", "go", "ts", "html", "css", "sql"]
+                type=SUPPORTED_EXTENSIONS
             )
 
         elif scan_target_type == "📤 Upload Multiple Files":  # Changed condition here
             uploaded_files = st.file_uploader(
                 "Select multiple files to scan", 
-                type=["py", "js", "java", "cpp", "c", "cs", "php", "rb", "go", "ts", "html", "css", "sql"], 
+                type=SUPPORTED_EXTENSIONS, 
                 accept_multiple_files=True,
                 help="You can select multiple files by holding Ctrl/Cmd while clicking"
             )
@@ -98,6 +123,17 @@ def login(username, password):
         # Other settings
         metrics_enabled = st.toggle("Enable Metrics", value=False)
 
+        custom_pack = get_active_bundle(CUSTOM_PACK_ROOT)
+        rule_source = st.radio(
+            "Semgrep Rules",
+            RULE_SOURCES,
+            format_func=RULE_SOURCE_LABELS.get,
+            disabled=custom_pack is None,
+            help="Run the rules saved from the Custom Rules tab instead of, or alongside, the default ruleset"
+        )
+        if custom_pack:
+            st.caption(f"Custom rule pack {custom_pack['version']}: {len(custom_pack['packs'])} rules")
+
         # Advanced settings
         with st.expander("🔧 Advanced Settings"):
             llm_temperature = st.slider(
@@ -109,6 +145,10 @@ def login(username, password):
                 help="Higher values make output more creative, lower values more deterministic"
             )
             
+            llm_backend = get_llm_backend()
+            if llm_backend != "groq":
+                # Local and fake backends serve their own models; set LLMGREP_OPENAI_MODEL to pick one
+                st.caption(f"LLM backend: {llm_backend} (set by LLMGREP_LLM_BACKEND)")
             model_selection = st.selectbox(
                 "LLM Model", 
                 options=[
@@ -124,8 +164,25 @@ def login(username, password):
                     "qwen-2.5-coder-32b",
                     "mistral-saba-24b"
                 ],
-                help="Select the model to use for analysis"
+                help="Select the model to use for analysis",
+                disabled=llm_backend != "groq"
+            )
+            
+            llm_concurrency = st.slider(
+                "Max Concurrent LLM Requests",
+                min_value=1,
+                max_value=8,
+                value=4,
+                help="How many code chunks are analyzed in parallel for large inputs"
             )
+            
+            llm_cache = get_llm_cache()
+            if llm_cache:
+                cache_stats = llm_cache.stats()
+                st.caption(
+                    f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                    f"{cache_stats['entries']} entries"
+                )
 
         # Store the settings in session state
         st.session_state['model_selection'] = model_selection
@@ -137,8 +194,10 @@ def login(username, password):
             "uploaded_files": uploaded_files,
             "code_input": code_input,
             "metrics_enabled": metrics_enabled,
+            "custom_config": rule_source if custom_pack else RULE_SOURCE_DEFAULT,
             "llm_temperature": llm_temperature,
-            "model_selection": model_selection
+            "model_selection": model_selection,
+            "llm_concurrency": llm_concurrency
         }
 
 def main():
@@ -175,7 +234,9 @@ def main():
             if analysis_results and isinstance(analysis_results, dict):
                 st.session_state.code_content = analysis_results.get('code_content', '')
                 st.session_state.analysis_results = analysis_results
-                st.session_state.llm_analysis = analysis_results.get('llm_analysis', '')
+                # Prefer the compact structured findings over the prose for chat and rules
+                st.session_state.llm_analysis = (analysis_results.get('findings_summary')
+                                                 or analysis_results.get('llm_analysis', ''))
 
     # Chat Tab
     with tabs[1]:
@@ -2,8 +2,18 @@ import re
 import yaml
 import streamlit as st
 
-from ..core.llm import initialize_llm
-from ..core.security import suggest_rules
+from .common import load_llm
+from ..core.security import stream_rule_suggestions, repair_rules
+from ..core.rule_bundle import save_custom_rules
+from ..core.rule_validation import (
+    collect_rules, rules_to_yaml, validate_rules, RULE_INVALID, RULE_FIRES, RULE_NO_MATCHES
+)
+
+RULE_STATUS_LABELS = {
+    RULE_FIRES: "✅ Fires",
+    RULE_NO_MATCHES: "⚠️ No matches",
+    RULE_INVALID: "❌ Invalid"
+}
 
 def extract_yaml_blocks(text):
     """
@@ -32,6 +42,70 @@ def extract_yaml_blocks(text):
             
     return yaml_blocks
 
+def _sidebar_llm():
+    # Use LLM settings from sidebar
+    return load_llm(
+        model=st.session_state.get('model_selection', "deepseek-r1-distill-llama-70b"),
+        temperature=st.session_state.get('llm_temperature', 0.1)
+    )
+
+def _code_language():
+    analysis_results = st.session_state.get('analysis_results') or {}
+    return analysis_results.get('code_language')
+
+def _run_validation(code_input):
+    rules = st.session_state.get('generated_rules') or []
+    with st.spinner(f"Validating {len(rules)} rules in one Semgrep run..."):
+        st.session_state.rule_reports = validate_rules(rules, code_input, language=_code_language())
+
+def _regenerate_failing_rules(code_input):
+    """Ask the LLM to fix the rules that failed validation, then validate again."""
+    rules = st.session_state.get('generated_rules') or []
+    reports = {report["id"]: report for report in st.session_state.get('rule_reports') or []}
+    failing = [
+        (rules_to_yaml([rule]), reports[rule["id"]]["error"] or "The rule compiled but matched nothing in the code")
+        for rule in rules
+        if reports.get(rule["id"], {}).get("status") in (RULE_INVALID, RULE_NO_MATCHES)
+    ]
+    if not failing:
+        return
+
+    llm = _sidebar_llm()
+    if not llm:
+        return
+    with st.spinner(f"Regenerating {len(failing)} failing rules..."):
+        repaired = {rule["id"]: rule for rule in collect_rules(extract_yaml_blocks(repair_rules(code_input, failing, llm)))}
+
+    if not repaired:
+        st.warning("⚠️ The LLM returned no usable rules; keeping the originals")
+        return
+    # Replace failing rules in place; passing rules are left untouched
+    st.session_state.generated_rules = [repaired.get(rule["id"], rule) for rule in rules]
+    _run_validation(code_input)
+
+def _render_rule_reports(rules):
+    reports = st.session_state.get('rule_reports')
+    if not reports:
+        return
+
+    counts = {status: sum(report["status"] == status for report in reports) for status in RULE_STATUS_LABELS}
+    st.write(
+        f"✅ {counts[RULE_FIRES]} fire · ⚠️ {counts[RULE_NO_MATCHES]} no matches · ❌ {counts[RULE_INVALID]} invalid"
+    )
+    st.dataframe(
+        [
+            {
+                "Rule": report["id"],
+                "Status": RULE_STATUS_LABELS[report["status"]],
+                "Lines": ", ".join(map(str, report["lines"])),
+                "Error": report["error"] or ""
+            }
+            for report in reports
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
 def render_rules_tab():
     """Render the custom rules generation tab."""
     st.subheader("📋 Generate Custom Semgrep Rules")
@@ -54,29 +128,58 @@ def render_rules_tab():
     
     if st.button("🔍 Generate Rules", key="generate_rules_button"):
         with st.spinner("Generating Semgrep rules..."):
-            # Use LLM settings from sidebar
-            llm = initialize_llm(
-                model=st.session_state.get('model_selection', "deepseek-r1-distill-llama-70b"),
-                temperature=st.session_state.get('llm_temperature', 0.1)
-            )
+            llm = _sidebar_llm()
             
             if llm and code_input:
                 try:
-                    rules = suggest_rules(code_input, vulnerability_input, llm)
-                    
                     st.markdown("## 📋 Generated Rules")
-                    st.markdown(rules)
+                    # Render tokens as they arrive; write_stream returns the full text
+                    rules = st.write_stream(stream_rule_suggestions(code_input, vulnerability_input, llm))
                     
                     # Extract and validate YAML blocks
-                    yaml_blocks = extract_yaml_blocks(rules)
-                    if yaml_blocks:
-                        combined_yaml = "\n---\n".join(yaml_blocks)
-                        st.download_button(
-                            "📥 Download Rules",
-                            combined_yaml,
-                            file_name="custom_semgrep_rules.yaml",
-                            mime="text/yaml",
-                            key="download_rules_button"
-                        )
+                    st.session_state.generated_rules = collect_rules(extract_yaml_blocks(rules))
+                    st.session_state.rule_reports = None
                 except Exception as e:
-                    st.error(f"Error generating rules: {str(e)}")
\ No newline at end of file
+                    st.error(f"Error generating rules: {str(e)}")
+
+    rules = st.session_state.get('generated_rules')
+    if not rules:
+        return
+
+    st.markdown(f"### 🧪 Rule Validation ({len(rules)} rules)")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🧪 Validate Rules", key="validate_rules_button") and code_input:
+            _run_validation(code_input)
+    with col2:
+        reports = st.session_state.get('rule_reports') or []
+        has_failures = any(report["status"] != RULE_FIRES for report in reports)
+        if st.button("🔁 Regenerate Failing Rules", key="regenerate_rules_button", disabled=not has_failures):
+            try:
+                _regenerate_failing_rules(code_input)
+            except Exception as e:
+                st.error(f"Error regenerating rules: {str(e)}")
+
+    _render_rule_reports(rules)
+
+    # Once validated, only offer the rules Semgrep accepted
+    reports = {report["id"]: report for report in st.session_state.get('rule_reports') or []}
+    downloadable = [rule for rule in rules if reports.get(rule["id"], {}).get("status") != RULE_INVALID]
+    if reports and st.button("💾 Save to Custom Rule Pack", key="save_rules_button", disabled=not downloadable,
+                             help="Validated rules are added to configs/ and can be selected under Semgrep Rules"):
+        try:
+            pack = save_custom_rules(downloadable)
+            st.success(f"✅ Saved {len(downloadable)} rules; custom rule pack {pack['version']} "
+                       f"now holds {len(pack['packs'])} rules")
+        except Exception as e:
+            st.error(f"Error saving rules: {str(e)}")
+    with st.expander("📄 Rules YAML"):
+        st.code(rules_to_yaml(rules), language="yaml")
+    if downloadable:
+        st.download_button(
+            "📥 Download Rules",
+            rules_to_yaml(downloadable),
+            file_name="custom_semgrep_rules.yaml",
+            mime="text/yaml",
+            key="download_rules_button"
+        )
@@ -1,23 +1,31 @@
 import os
-import json
-import subprocess
 import streamlit as st
-from datetime import datetime
 
-from ..core.llm import initialize_llm
-from ..core.security import analyze_security
-from ..core.file_utils import save_uploaded_file, generate_report, save_code_to_temp_file
+from ..core.llm import initialize_llm, LLMInitError
+from ..core.jobs import get_job_manager, JobCancelled, JOB_DONE, JOB_FAILED
+from ..core.security import stream_security_analysis, analyze_files
+from ..core.semgrep import scan_with_cache, SemgrepError
+from ..core.rule_bundle import get_scan_ruleset, describe_ruleset, RULE_SOURCE_DEFAULT
+from ..core.findings import group_findings
+from ..core.vulnerabilities import extract_findings, dedupe_findings, format_findings_compact
+from ..core.workspace import materialize_files
+from ..core.file_utils import save_uploaded_file, generate_report, generate_multi_file_report, save_code_to_temp_file
+
+SEVERITY_ICONS = {"critical": "🔴", "high": "🟠", "medium": "🟡", "low": "🔵"}
 
 def render_scanner_tab(scan_target_type, uploaded_file=None, uploaded_files=None, 
                       code_input=None, metrics_enabled=False, custom_config=None, 
-                      llm_temperature=0, model_selection="deepseek-r1-distill-llama-70b"):
+                      llm_temperature=0, model_selection="deepseek-r1-distill-llama-70b",
+                      llm_concurrency=4):
     """Render the scanner tab with code preview and analysis results."""
     
     # Create columns for layout
     col1, col2 = st.columns([2, 3])
     
     code_content = ""
+    code_language = None
     target_path = None
+    file_contents = {}
     
     with col1:
         st.subheader("Code Preview")
@@ -27,12 +35,13 @@ def render_scanner_tab(scan_target_type, uploaded_file=None, uploaded_files=None
             code_content = code_input or ""
             st.code(code_content)
             if code_content:
-                target_path = save_code_to_temp_file(code_content)
+                target_path = save_code_to_temp_file(code_content, workspace_dir=st.session_state.workspace_dir)
             
         elif scan_target_type == "📤 Upload File" and uploaded_file:
             code_content = uploaded_file.getvalue().decode("utf-8")
+            code_language = os.path.splitext(uploaded_file.name)[1]
             st.code(code_content)
-            target_path = save_uploaded_file(uploaded_file)
+            target_path = save_uploaded_file(uploaded_file, workspace_dir=st.session_state.workspace_dir)
             
         elif scan_target_type == "📤 Upload Multiple Files" and uploaded_files:  # Changed condition here
             st.info(f"Selected {len(uploaded_files)} files")
@@ -45,38 +54,73 @@ def render_scanner_tab(scan_target_type, uploaded_file=None, uploaded_files=None
                     if file.name == selected_file:
                         try:
                             code_content = file.getvalue().decode("utf-8")
+                            code_language = os.path.splitext(file.name)[1]
                             st.code(code_content)
                             break
                         except Exception as e:
                             st.error(f"Error reading file {file.name}: {str(e)}")
             
-            # Create folder for multiple files
-            folder_path = os.path.join("temp_uploads", f"upload_folder_{datetime.now().strftime('%Y%m%d%H%M%S')}")
-            os.makedirs(folder_path, exist_ok=True)
+            # Reuses the same folder on reruns as long as the uploads are unchanged
+            folder_path = materialize_files({file.name: file.getvalue() for file in uploaded_files},
+                                            st.session_state.workspace_dir)
             for file in uploaded_files:
                 file_path = os.path.join(folder_path, file.name)
-                with open(file_path, "wb") as f:
-                    f.write(file.getvalue())
+                try:
+                    file_contents[file_path] = file.getvalue().decode("utf-8")
+                except UnicodeDecodeError:
+                    st.warning(f"Skipping LLM analysis of {file.name}: not valid UTF-8")
             target_path = folder_path
     
     with col2:
         st.subheader("Analysis Results")
-        result_tabs = st.tabs(["LLM Analysis", "Semgrep Results"])
+        manager = get_job_manager()
+        session_jobs = manager.jobs_for(st.session_state.get('session_id'))
+        
+        # Pick this session's running scan back up if a rerun lost its id
+        if not st.session_state.get('scan_job_id'):
+            running = [job for job in session_jobs
+                       if not job.is_finished and not job.snapshot()['cancel_requested']]
+            if running:
+                st.session_state.scan_job_id = running[-1].id
         
         # Run analysis button
         if st.button("🔍 Run Security Scan"):
-            with st.spinner("Running security analysis..."):
-                semgrep_results = run_semgrep_scan(target_path, metrics_enabled, result_tabs[1])
-                llm_analysis = run_llm_analysis(code_content, semgrep_results, llm_temperature, model_selection, result_tabs[0])
-                
-                report = generate_report(code_content, llm_analysis)
-                
-                return {
-                    'code_content': code_content,
-                    'llm_analysis': llm_analysis,
-                    'semgrep_results': semgrep_results,
-                    'report': report
-                }
+            # Only one scan per session; a new scan replaces any still running
+            for session_job in session_jobs:
+                manager.cancel(session_job.id)
+            st.session_state.scan_result = None
+            st.session_state.scan_job_id = manager.submit(
+                run_scan_job,
+                target_path=target_path,
+                code_content=code_content,
+                code_language=code_language,
+                file_contents=file_contents,
+                metrics_enabled=metrics_enabled,
+                rule_source=custom_config or RULE_SOURCE_DEFAULT,
+                llm_temperature=llm_temperature,
+                model_selection=model_selection,
+                llm_concurrency=llm_concurrency,
+                owner=st.session_state.get('session_id')
+            )
+        
+        job = manager.get(st.session_state.get('scan_job_id'))
+        if job is not None and not job.is_finished:
+            render_scan_progress(job.id)
+        elif job is not None:
+            # Keep the finished result in the session so it survives reruns
+            snapshot = job.snapshot()
+            st.session_state.scan_job_id = None
+            if snapshot['status'] == JOB_DONE:
+                st.session_state.scan_result = snapshot['result']
+            elif snapshot['status'] == JOB_FAILED:
+                st.error(f"❌ Security scan failed: {snapshot['error']}")
+            else:
+                st.warning("⏹️ Security scan cancelled.")
+        
+        scan_result = st.session_state.get('scan_result')
+        if scan_result:
+            render_scan_result(scan_result)
+            return scan_result
     
     return {
         'code_content': code_content,
@@ -84,59 +128,197 @@ def render_scanner_tab(scan_target_type, uploaded_file=None, uploaded_files=None
         'report': ""
     }
 
-def run_semgrep_scan(target_path, metrics_enabled, result_tab):
-    """Run Semgrep scan on the target."""
-    if not target_path:
-        return {"results": []}
+def run_scan_job(job, target_path, code_content, code_language, file_contents, metrics_enabled,
+                 rule_source, llm_temperature, model_selection, llm_concurrency):
+    """
+    Run the Semgrep and LLM pipeline on a background worker.
+
+    Runs outside the Streamlit script, so it reports through ``job.update``
+    instead of drawing widgets. Semgrep and LLM errors are recorded in the
+    result rather than failing the job, matching the inline scan.
+
+    Args:
+        job (Job): Job to report progress to
+        target_path (str): File or folder for Semgrep to scan
+        code_content (str): Code to analyze in single-file mode
+        code_language (str): File extension of ``code_content``
+        file_contents (dict): Mapping of file paths to code in multi-file mode
+        metrics_enabled (bool): Whether to send Semgrep metrics
+        rule_source (str): Run the default ruleset, the custom rule pack, or both
+        llm_temperature (float): Controls randomness of output
+        model_selection (str): Name of the model to use
+        llm_concurrency (int): Maximum LLM requests in flight
+
+    Returns:
+        dict: Code, LLM analysis, Semgrep results and report
+    """
+    result = {
+        'code_content': code_content,
+        'code_language': code_language,
+        'llm_analysis': "",
+        'semgrep_results': {"results": []},
+        'semgrep_error': None,
+        'llm_error': None,
+        'file_analyses': None,
+        'findings': [],
+        'findings_summary': ""
+    }
     
-    output_path = "results/result.json"
-    os.makedirs("results", exist_ok=True)
+    job.update(stage="⏳ Running Semgrep scan...", percent=0.05)
+    if target_path:
+        try:
+            # Prefer the local rule bundle over the registry's auto config; add or swap in the custom pack
+            configs, ruleset = get_scan_ruleset(rule_source=rule_source)
+            result['semgrep_results'] = scan_with_cache(target_path, configs=configs, metrics_enabled=metrics_enabled)
+            result['semgrep_results']["ruleset"] = ruleset
+        except SemgrepError as e:
+            result['semgrep_error'] = (str(e), e.stderr)
+    job.update(stage="🧠 Running LLM analysis...", percent=0.3,
+               semgrep_results=result['semgrep_results'], semgrep_error=result['semgrep_error'])
     
-    cmd = ["semgrep", "--json", "--output", output_path]
-    if not metrics_enabled:
-        cmd.append("--metrics=off")
+    try:
+        llm = initialize_llm(model=model_selection, temperature=llm_temperature)
+    except LLMInitError as e:
+        llm = None
+        result['llm_error'] = str(e)
     
-    # Always use auto config
-    cmd.append("--config=auto")
-    cmd.append(target_path)
+    if file_contents:
+        # Multi-file mode: analyze every uploaded file, not just the previewed one
+        file_analyses = {}
+        
+        def file_done(file_path, file_result, done, total):
+            file_analyses[os.path.basename(file_path)] = file_result
+            job.update(stage=f"🧠 Analyzed {done}/{total} files", percent=0.3 + 0.7 * done / total,
+                       file_analyses=dict(file_analyses))
+        
+        if llm:
+            analyze_files(file_contents, result['semgrep_results'], llm, max_workers=llm_concurrency,
+                          on_file_done=file_done)
+            # Report files in upload order, not completion order
+            file_analyses = {os.path.basename(file_path): file_analyses[os.path.basename(file_path)]
+                             for file_path in file_contents}
+        findings = dedupe_findings([finding for file_result in file_analyses.values()
+                                    for finding in file_result['findings']])
+        # Finding objects stay in the worker; the session keeps plain dicts
+        file_analyses = {file_name: {**file_result, 'findings': [finding.to_dict() for finding in file_result['findings']]}
+                         for file_name, file_result in file_analyses.items()}
+        result['file_analyses'] = file_analyses
+        result['code_content'] = "\n\n".join(
+            f"# File: {os.path.basename(file_path)}\n{content}"
+            for file_path, content in file_contents.items()
+        )
+        result['llm_analysis'] = "\n\n".join(
+            f"### {file_name}\n\n{file_result['llm_analysis']}"
+            for file_name, file_result in file_analyses.items() if file_result['llm_analysis']
+        )
+        result['report'] = generate_multi_file_report(file_analyses)
+    else:
+        if llm and code_content:
+            try:
+                def chunk_done(done, total):
+                    # Chunks take most of the time; the merge fills the last stretch
+                    job.update(stage=f"🧠 Analyzed {done}/{total} parts", percent=0.3 + 0.6 * done / total)
+                
+                for piece in stream_security_analysis(result['semgrep_results'], code_content, llm,
+                                                      max_concurrency=llm_concurrency, language=code_language,
+                                                      on_progress=chunk_done):
+                    result['llm_analysis'] += piece
+                    job.update(llm_analysis=result['llm_analysis'])
+            except JobCancelled:
+                raise
+            except Exception as e:
+                result['llm_error'] = str(e)
+        result['llm_analysis'], findings = extract_findings(result['llm_analysis'])
+        result['report'] = generate_report(code_content, result['llm_analysis'])
     
-    with result_tab:
-        with st.spinner("⏳ Running Semgrep scan..."):
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                try:
-                    with open(output_path) as f:
-                        semgrep_results = json.load(f)
-                    display_semgrep_findings(semgrep_results)
-                    return semgrep_results
-                except Exception as e:
-                    st.error(f"❌ Error parsing Semgrep results: {str(e)}")
-            else:
-                st.error("❌ Semgrep scan failed!")
-                st.code(result.stderr)
+    result['findings'] = [finding.to_dict() for finding in findings]
+    # Compact findings replace the prose in the chat and rules prompts
+    result['findings_summary'] = format_findings_compact(findings)
     
-    return {"results": []}
+    job.update(stage="✅ Done", percent=1.0)
+    return result
 
-def run_llm_analysis(code_content, semgrep_results, temperature, model_selection, result_tab):
-    """Run LLM analysis on the code."""
-    with result_tab:
-        with st.spinner("🧠 Running LLM analysis..."):
-            llm = initialize_llm(model=model_selection, temperature=temperature)
-            if llm and code_content:
-                try:
-                    llm_analysis = analyze_security(semgrep_results, code_content, llm)
-                    st.markdown("## 🧠 Security Analysis")
-                    st.markdown(llm_analysis)
-                    return llm_analysis
-                except Exception as e:
-                    st.error(f"❌ Error during LLM analysis: {str(e)}")
-    return ""
+@st.fragment(run_every=1.0)
+def render_scan_progress(job_id):
+    """Poll a running scan job and show its progress and partial results."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return
+    if job.is_finished:
+        # Rerun the whole app so the result reaches the other tabs
+        st.rerun()
+    
+    snapshot = job.snapshot()
+    partial = snapshot['partial']
+    st.progress(snapshot['percent'], text=snapshot['stage'])
+    if snapshot['cancel_requested']:
+        st.caption("Cancelling...")
+    elif st.button("⏹️ Cancel Scan", key=f"cancel_{job_id}"):
+        job.cancel()
+    
+    render_scan_result({
+        'llm_analysis': partial.get('llm_analysis', ""),
+        'file_analyses': partial.get('file_analyses'),
+        'semgrep_results': partial.get('semgrep_results'),
+        'semgrep_error': partial.get('semgrep_error')
+    })
+
+def render_scan_result(scan_result):
+    """Show the LLM analysis and Semgrep findings of a (possibly partial) scan."""
+    result_tabs = st.tabs(["LLM Analysis", "Semgrep Results"])
+    
+    with result_tabs[0]:
+        if scan_result.get('llm_error'):
+            st.error(f"❌ Error during LLM analysis: {scan_result['llm_error']}")
+        file_analyses = scan_result.get('file_analyses')
+        if file_analyses:
+            st.markdown("## 🧠 Security Analysis")
+            for file_name, file_result in file_analyses.items():
+                with st.expander(f"📄 {file_name} ({file_result['elapsed']:.1f}s)"):
+                    if file_result['error']:
+                        st.error(f"❌ Error during LLM analysis: {file_result['error']}")
+                    else:
+                        st.markdown(file_result['llm_analysis'])
+        elif scan_result.get('llm_analysis'):
+            st.markdown("## 🧠 Security Analysis")
+            st.markdown(scan_result['llm_analysis'])
+        if scan_result.get('findings'):
+            st.markdown("### 📋 Findings Summary")
+            st.dataframe(
+                [
+                    {
+                        "Severity": finding['severity'],
+                        "Vulnerability": finding['title'],
+                        "Classification": finding['classification'],
+                        "File": finding['path'],
+                        "Lines": ", ".join(map(str, finding['lines']))
+                    }
+                    for finding in scan_result['findings']
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+    
+    with result_tabs[1]:
+        if scan_result.get('semgrep_error'):
+            message, stderr = scan_result['semgrep_error']
+            st.error(f"❌ {message}")
+            if stderr:
+                st.code(stderr)
+        semgrep_results = scan_result.get('semgrep_results')
+        if semgrep_results is not None:
+            ruleset = semgrep_results.get("ruleset")
+            if ruleset:
+                st.caption(f"Ruleset: {describe_ruleset(ruleset)}")
+            display_semgrep_findings(semgrep_results)
 
 def display_semgrep_findings(semgrep_results):
     """Display formatted Semgrep findings."""
     st.subheader("🔍 Semgrep Findings:")
     if "results" in semgrep_results and semgrep_results["results"]:
+        if st.toggle("Group similar findings", value=True, key="group_semgrep_findings"):
+            display_grouped_findings(group_findings(semgrep_results["results"]))
+            return
         for i, finding in enumerate(semgrep_results["results"]):
             with st.expander(f"Finding #{i+1}: {finding.get('check_id', 'Unknown issue')}"):
                 st.markdown(f"**Severity:** {finding.get('severity', 'Unknown')}")
@@ -145,4 +327,18 @@ def display_semgrep_findings(semgrep_results):
                 st.markdown(f"**Message:** {finding.get('extra', {}).get('message', 'No message')}")
                 st.code(finding.get('extra', {}).get('lines', 'No code available'))
     else:
-        st.info("✅ No issues detected by Semgrep.")
\ No newline at end of file
+        st.info("✅ No issues detected by Semgrep.")
+
+def display_grouped_findings(groups):
+    """Display findings grouped by rule and message, most severe first."""
+    total = sum(group['count'] for group in groups)
+    st.caption(f"{total} findings in {len(groups)} groups")
+    for group in groups:
+        icon = SEVERITY_ICONS.get(group['level'], "⚪")
+        with st.expander(f"{icon} {group['check_id']} ({group['count']} occurrence{'s' if group['count'] != 1 else ''})"):
+            st.markdown(f"**Severity:** {group['severity']}")
+            st.markdown(f"**Message:** {group['message'] or 'No message'}")
+            st.markdown("**Occurrences:** " + ", ".join(
+                f"`{occurrence['path']}:{occurrence['line']}`" for occurrence in group['occurrences']
+            ))
+            st.code(group['snippet'] or 'No code available')
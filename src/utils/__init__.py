@@ -1,7 +1,20 @@
-from .text_chunk import analyze_code_in_chunks, chunk_chat_context, chunk_rule_context
+from .text_chunk import analyze_code_in_chunks, iter_code_chunks, split_code_with_line_ranges, chunk_chat_context, chunk_rule_context
+from .code_structure import find_block_boundaries
+from .retrieval import BM25Index, tokenize
+from .tokens import TokenCounter, get_token_counter, set_token_counter, count_tokens, truncate_to_tokens
 
 __all__ = [
     'analyze_code_in_chunks',
+    'iter_code_chunks',
+    'split_code_with_line_ranges',
+    'find_block_boundaries',
     'chunk_chat_context',
-    'chunk_rule_context'
+    'chunk_rule_context',
+    'TokenCounter',
+    'get_token_counter',
+    'set_token_counter',
+    'count_tokens',
+    'truncate_to_tokens',
+    'BM25Index',
+    'tokenize'
 ]
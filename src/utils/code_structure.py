@@ -0,0 +1,125 @@
+import ast
+
+# Languages from the upload whitelist that delimit blocks by indentation
+INDENT_LANGUAGES = {"py", "rb"}
+# Languages where '#' starts a line comment
+HASH_COMMENT_LANGUAGES = {"py", "rb", "php"}
+
+CONTINUATION_PREFIXES = (
+    "}", ")", "]", "else", "elif", "except", "finally", "catch", "end", "rescue", "ensure", "when"
+)
+ATTACHED_PREFIXES = ("#", "//", "/*", "*", "@", "--")
+
+def normalize_language(language):
+    """
+    Normalize a language hint to a bare file extension.
+
+    Args:
+        language (str): Extension (".py", "py") or file name, or None
+
+    Returns:
+        str: Lower-case extension without a dot, or None
+    """
+    if not language:
+        return None
+    return language.rsplit(".", 1)[-1].lower()
+
+def _python_boundaries(code_snippet):
+    """Return the 0-based start lines of top-level Python statements."""
+    tree = ast.parse(code_snippet)
+    boundaries = []
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno] + [d.lineno for d in decorators])
+        boundaries.append(start - 1)
+    return boundaries
+
+def _heuristic_boundaries(lines, language):
+    """Return 0-based start lines of top-level blocks using brace depth and indentation."""
+    hash_comments = language in HASH_COMMENT_LANGUAGES
+    # In Python and Ruby "//" is an operator or regex, and there are no /* */ comments
+    c_comments = language not in INDENT_LANGUAGES
+    boundaries = []
+    depth = 0
+    in_block_comment = False
+
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if (depth == 0 and not in_block_comment and stripped
+                and not line[0].isspace()
+                and not stripped.startswith(CONTINUATION_PREFIXES)):
+            boundaries.append(index)
+
+        # Track bracket depth, ignoring strings and comments
+        quote = None
+        i = 0
+        while i < len(line):
+            char = line[i]
+            pair = line[i:i + 2]
+            if in_block_comment:
+                if pair == "*/":
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if char == "\\":
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif c_comments and pair == "/*":
+                in_block_comment = True
+                i += 1
+            elif (c_comments and pair == "//") or (hash_comments and char == "#"):
+                break
+            elif char in "'\"`":
+                quote = char
+            elif char in "{([":
+                depth += 1
+            elif char in "})]":
+                depth = max(depth - 1, 0)
+            i += 1
+
+    return boundaries
+
+def _attach_leading_comments(lines, boundaries):
+    """Move each boundary up over the comments and decorators directly above it."""
+    attached = []
+    previous = -1
+    for boundary in boundaries:
+        start = boundary
+        while (start - 1 > previous and lines[start - 1].strip()
+               and not lines[start - 1][0].isspace()
+               and lines[start - 1].lstrip().startswith(ATTACHED_PREFIXES)):
+            start -= 1
+        attached.append(start)
+        previous = boundary
+    return attached
+
+def find_block_boundaries(code_snippet, language=None):
+    """
+    Find the lines where top-level functions, classes and statements start.
+
+    Python is parsed with ``ast``; other languages (and Python that fails
+    to parse) use brace-depth and indentation heuristics.
+
+    Args:
+        code_snippet (str): Source code
+        language (str): Extension hint such as ".py" or "js", optional
+
+    Returns:
+        List[int]: Sorted 0-based line indices where a chunk may start
+    """
+    language = normalize_language(language)
+    lines = code_snippet.split('\n')
+    boundaries = None
+
+    if language in (None, "py"):
+        try:
+            boundaries = _python_boundaries(code_snippet)
+        except (SyntaxError, ValueError):
+            boundaries = None
+
+    if boundaries is None:
+        boundaries = _heuristic_boundaries(lines, language)
+
+    boundaries = _attach_leading_comments(lines, boundaries)
+    return sorted(set([0] + boundaries))
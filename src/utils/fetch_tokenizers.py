@@ -0,0 +1,25 @@
+import sys
+import argparse
+
+from .tokens import fetch_tokenizers, TOKENIZER_URLS
+
+def main(argv=None):
+    """Command line entry point for fetching tokenizer files ahead of offline use."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.utils.fetch_tokenizers",
+        description="Download the tokenizer files used to size chunks, so scans never need the network for them"
+    )
+    parser.add_argument("--families", nargs="+", choices=sorted(TOKENIZER_URLS), help="Families to fetch")
+    parser.add_argument("--dir", help="Directory to store them in")
+    args = parser.parse_args(argv)
+
+    try:
+        for path in fetch_tokenizers(args.families, args.dir):
+            print(path)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
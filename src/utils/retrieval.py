@@ -0,0 +1,86 @@
+import re
+import math
+from collections import Counter
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+CAMEL_CASE_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def tokenize(text):
+    """
+    Split text or code into lowercase search terms.
+
+    Identifiers are kept whole and also split into their camelCase and
+    snake_case parts, so ``getUserById`` matches a query for "user id".
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Search terms, in order of appearance
+    """
+    terms = []
+    for word in WORD_PATTERN.findall(text):
+        lowered = word.lower()
+        terms.append(lowered)
+        parts = CAMEL_CASE_PATTERN.findall(word)
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    # snake_case: WORD_PATTERN already splits on underscores
+    return terms
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over a small set of documents.
+
+    Documents are dicts holding their searchable text under ``text_field``;
+    any other entries are returned untouched with the search results.
+    """
+
+    def __init__(self, documents, k1=1.5, b=0.75, text_field="text"):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(tokenize(document[text_field])) for document in self.documents]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        document_frequency = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.documents)
+        self._idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def __len__(self):
+        return len(self.documents)
+
+    def score(self, query_terms, index):
+        """Return the BM25 score of one document for already tokenized query terms."""
+        counts = self._term_counts[index]
+        length_norm = 1 - self.b + self.b * (self._lengths[index] / self._avg_length if self._avg_length else 0)
+        score = 0.0
+        for term in query_terms:
+            frequency = counts.get(term)
+            if frequency:
+                score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return score
+
+    def search(self, query, k=5):
+        """
+        Find the documents most relevant to a query.
+
+        Args:
+            query (str): Free-text query
+            k (int): Maximum number of results, or None for all matches
+
+        Returns:
+            list: (score, document) pairs with a positive score, best first
+        """
+        query_terms = set(tokenize(query))
+        scored = [(self.score(query_terms, i), i) for i in range(len(self.documents))]
+        ranked = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))
+        if k is not None:
+            ranked = ranked[:k]
+        return [(score, self.documents[i]) for score, i in ranked]
@@ -1,39 +1,111 @@
-def analyze_code_in_chunks(code_snippet, chunk_size=2000):
+from .tokens import get_token_counter, count_tokens, truncate_to_tokens
+from .code_structure import find_block_boundaries
+
+def iter_code_chunks(code_snippet, chunk_size=2000, overlap_lines=0, language=None):
+    """
+    Lazily split code into chunks that follow its top-level structure.
+    
+    Chunks are packed from whole top-level functions, classes and
+    statements. A block larger than ``chunk_size`` on its own is split at
+    line boundaries.
+    
+    Args:
+        code_snippet (str): Code to be chunked
+        chunk_size (int): Maximum size of each chunk in tokens
+        overlap_lines (int): Lines from the end of the previous chunk to repeat
+            at the start of the next one
+        language (str): Extension hint such as ".py" or "js", optional
+    
+    Yields:
+        Tuple[str, Tuple[int, int]]: Chunk text and its 1-based
+        (start_line, end_line) range, inclusive
+    """
+    counter = get_token_counter()
+    lines = code_snippet.split('\n')
+    
+    # Count each line once (memoized per distinct line) so chunking stays linear
+    line_tokens = [counter.count_line(line) + 1 for line in lines]  # +1 for newline
+    
+    if sum(line_tokens) <= chunk_size:
+        yield code_snippet, (1, len(lines))
+        return
+    
+    boundaries = find_block_boundaries(code_snippet, language) + [len(lines)]
+    
+    def emit(start, end):
+        # Prepend overlap from the previous chunk when it still fits the budget
+        overlap_start = start
+        budget = chunk_size - sum(line_tokens[start:end])
+        while overlap_start > max(start - overlap_lines, 0) and line_tokens[overlap_start - 1] <= budget:
+            overlap_start -= 1
+            budget -= line_tokens[overlap_start]
+        return '\n'.join(lines[overlap_start:end]), (overlap_start + 1, end)
+    
+    chunk_start = 0
+    chunk_size_used = 0
+    
+    for block_start, block_end in zip(boundaries, boundaries[1:]):
+        block_size = sum(line_tokens[block_start:block_end])
+        
+        if chunk_size_used + block_size <= chunk_size:
+            chunk_size_used += block_size
+            continue
+        
+        # The block doesn't fit: close the current chunk first
+        if chunk_size_used:
+            yield emit(chunk_start, block_start)
+        chunk_start = block_start
+        chunk_size_used = 0
+        
+        if block_size <= chunk_size:
+            chunk_size_used = block_size
+            continue
+        
+        # Oversized block: fall back to packing its lines
+        for line_index in range(block_start, block_end):
+            if chunk_size_used + line_tokens[line_index] > chunk_size and chunk_size_used:
+                yield emit(chunk_start, line_index)
+                chunk_start = line_index
+                chunk_size_used = 0
+            chunk_size_used += line_tokens[line_index]
+    
+    if chunk_start < len(lines):
+        yield emit(chunk_start, len(lines))
+
+def split_code_with_line_ranges(code_snippet, chunk_size=2000, overlap_lines=0, language=None):
+    """
+    Split code into structure-aware chunks and record the source lines of each.
+    
+    Args:
+        code_snippet (str): Code to be chunked
+        chunk_size (int): Maximum size of each chunk in tokens
+        overlap_lines (int): Lines of overlap between consecutive chunks
+        language (str): Extension hint such as ".py" or "js", optional
+    
+    Returns:
+        List[Tuple[str, Tuple[int, int]]]: Chunks with their 1-based
+        (start_line, end_line) ranges, inclusive
+    """
+    return list(iter_code_chunks(code_snippet, chunk_size, overlap_lines, language))
+
+def analyze_code_in_chunks(code_snippet, chunk_size=2000, language=None):
     """
-    Split code into chunks for analysis, attempting to break at newlines.
+    Split code into chunks for analysis, preferring function/class boundaries.
     
     Args:
         code_snippet (str): Code to be chunked
         chunk_size (int): Approximate size of each chunk in tokens
+        language (str): Extension hint such as ".py" or "js", optional
     
     Returns:
         Union[str, List[str]]: Chunked code
     """
-    # Rough approximation: 1 token ≈ 4 characters
-    char_limit = chunk_size * 4
+    chunks = split_code_with_line_ranges(code_snippet, chunk_size, language=language)
     
-    if len(code_snippet) <= char_limit:
+    if len(chunks) == 1:
         return code_snippet
     
-    # Split code into chunks, trying to break at newlines
-    chunks = []
-    current_chunk = []
-    current_size = 0
-    
-    for line in code_snippet.split('\n'):
-        line_size = len(line) + 1  # +1 for newline
-        if current_size + line_size > char_limit and current_chunk:
-            chunks.append('\n'.join(current_chunk))
-            current_chunk = [line]
-            current_size = line_size
-        else:
-            current_chunk.append(line)
-            current_size += line_size
-    
-    if current_chunk:
-        chunks.append('\n'.join(current_chunk))
-    
-    return chunks
+    return [chunk for chunk, _ in chunks]
 
 def chunk_chat_context(code_snippet, llm_analysis, chunk_size=1500):
     """
@@ -47,21 +119,21 @@ def chunk_chat_context(code_snippet, llm_analysis, chunk_size=1500):
     Returns:
         Tuple[str, str]: Chunked code and analysis
     """
-    total_text = f"{code_snippet}\n\n{llm_analysis}"
-    if len(total_text) <= chunk_size * 4:  # Using same 4 char/token approximation
+    code_tokens = count_tokens(code_snippet)
+    analysis_tokens = count_tokens(llm_analysis)
+    if code_tokens + analysis_tokens + 2 <= chunk_size:
         return code_snippet, llm_analysis
     
     # If we need to chunk, prioritize keeping the analysis intact
-    analysis_size = len(llm_analysis)
-    max_code_size = (chunk_size * 4) - analysis_size - 100  # Buffer for other content
+    max_code_tokens = chunk_size - analysis_tokens - 25  # Buffer for other content
     
-    if max_code_size < 100:  # If even minimal code won't fit
+    if max_code_tokens < 25:  # If even minimal code won't fit
         # Chunk both code and analysis
-        return (code_snippet[:max_code_size], 
-                llm_analysis[:chunk_size * 2])  # Give more space to analysis
+        return (truncate_to_tokens(code_snippet, max_code_tokens), 
+                truncate_to_tokens(llm_analysis, chunk_size // 2))  # Give more space to analysis
     
     # Otherwise just truncate the code
-    return code_snippet[:max_code_size], llm_analysis
+    return truncate_to_tokens(code_snippet, max_code_tokens), llm_analysis
 
 def chunk_rule_context(code_snippet, llm_analysis, chunk_size=1500):
     """
@@ -75,14 +147,15 @@ def chunk_rule_context(code_snippet, llm_analysis, chunk_size=1500):
     Returns:
         Tuple[str, str]: Chunked code and analysis
     """
-    total_text = f"{code_snippet}\n\n{llm_analysis}"
-    if len(total_text) <= chunk_size * 4:
+    code_tokens = count_tokens(code_snippet)
+    analysis_tokens = count_tokens(llm_analysis)
+    if code_tokens + analysis_tokens + 2 <= chunk_size:
         return code_snippet, llm_analysis
     
     # For rules, we need both code context and analysis
-    max_size_each = (chunk_size * 2)  # Split token budget between code and analysis
+    max_tokens_each = chunk_size * 2  # Split token budget between code and analysis
     
-    chunked_code = code_snippet[:max_size_each * 4]  # Convert tokens to chars
-    chunked_analysis = llm_analysis[:max_size_each * 4]
+    chunked_code = truncate_to_tokens(code_snippet, max_tokens_each)
+    chunked_analysis = truncate_to_tokens(llm_analysis, max_tokens_each)
     
-    return chunked_code, chunked_analysis
\ No newline at end of file
+    return chunked_code, chunked_analysis
@@ -0,0 +1,246 @@
+import os
+import math
+import threading
+import urllib.request
+
+# Tokenizer files are fetched once at install time (python -m src.utils.fetch_tokenizers), never at runtime
+DEFAULT_TOKENIZER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                     "tokenizer_files")
+DEFAULT_TOKENIZER_MODEL = "deepseek-r1-distill-llama-70b"
+# Public tokenizer.json per model family; Llama 3 also covers the DeepSeek R1 distills
+TOKENIZER_URLS = {
+    "llama3": "https://huggingface.co/deepseek-ai/DeepSeek-R1-Distill-Llama-70B/resolve/main/tokenizer.json",
+    "qwen2.5": "https://huggingface.co/Qwen/Qwen2.5-Coder-32B-Instruct/resolve/main/tokenizer.json"
+}
+
+class TokenCounter:
+    """
+    Base class for local token counters.
+
+    Subclasses implement ``count``; per-line counts are memoized so that
+    repeated lines (blank lines, braces, imports) are only tokenized once.
+    """
+
+    name = "base"
+
+    def __init__(self, max_cached_lines=100_000):
+        self.max_cached_lines = max_cached_lines
+        self._line_cache = {}
+
+    def count(self, text):
+        """Return the number of tokens in ``text``."""
+        raise NotImplementedError
+
+    def count_line(self, line):
+        """Return the number of tokens in a single line, memoized."""
+        tokens = self._line_cache.get(line)
+        if tokens is None:
+            if len(self._line_cache) >= self.max_cached_lines:
+                self._line_cache.clear()
+            tokens = self._line_cache[line] = self.count(line)
+        return tokens
+
+class CharTokenCounter(TokenCounter):
+    """Approximate counter assuming 1 token ≈ 4 characters."""
+
+    name = "chars"
+
+    def __init__(self, chars_per_token=4, **kwargs):
+        super().__init__(**kwargs)
+        self.chars_per_token = chars_per_token
+
+    def count(self, text):
+        return math.ceil(len(text) / self.chars_per_token)
+
+class TiktokenCounter(TokenCounter):
+    """Counter backed by a local ``tiktoken`` BPE encoding."""
+
+    name = "tiktoken"
+
+    def __init__(self, encoding="cl100k_base", **kwargs):
+        import tiktoken
+
+        super().__init__(**kwargs)
+        self.name = f"tiktoken:{encoding}"
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text):
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+class HuggingFaceTokenCounter(TokenCounter):
+    """Counter backed by a local Hugging Face ``tokenizer.json`` file."""
+
+    name = "hf"
+
+    def __init__(self, tokenizer_file, **kwargs):
+        from tokenizers import Tokenizer
+
+        super().__init__(**kwargs)
+        self.name = f"hf:{tokenizer_file}"
+        self._tokenizer = Tokenizer.from_file(tokenizer_file)
+
+    def count(self, text):
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+_token_counter = None
+_token_counter_lock = threading.Lock()
+
+def _create_token_counter(spec):
+    kind, _, arg = spec.partition(":")
+    if kind == "chars":
+        return CharTokenCounter()
+    if kind == "hf":
+        return HuggingFaceTokenCounter(arg)
+    if kind == "tiktoken":
+        return TiktokenCounter(arg or "cl100k_base")
+    raise ValueError(f"Unknown tokenizer spec: {spec}")
+
+def tokenizer_family(model):
+    """
+    Map a model name to the tokenizer family it uses.
+
+    Args:
+        model (str): Model name, e.g. "qwen-2.5-coder-32b"
+
+    Returns:
+        str: Key of TOKENIZER_URLS; Llama 3 for unknown models
+    """
+    return "qwen2.5" if "qwen" in (model or "").lower() else "llama3"
+
+def tokenizer_path(model=None, tokenizer_dir=None):
+    """
+    Return where the tokenizer.json for a model is stored locally.
+
+    Args:
+        model (str): Model name; LLMGREP_TOKENIZER_MODEL or the default model if None
+        tokenizer_dir (str): Directory of tokenizer files; LLMGREP_TOKENIZER_DIR or the bundled one if None
+
+    Returns:
+        str: Path of the tokenizer file, which may not exist
+    """
+    model = model or os.environ.get("LLMGREP_TOKENIZER_MODEL") or DEFAULT_TOKENIZER_MODEL
+    tokenizer_dir = tokenizer_dir or os.environ.get("LLMGREP_TOKENIZER_DIR") or DEFAULT_TOKENIZER_DIR
+    return os.path.join(tokenizer_dir, f"{tokenizer_family(model)}.json")
+
+def fetch_tokenizers(families=None, tokenizer_dir=None, timeout=60):
+    """
+    Download tokenizer files so token counting works offline afterwards.
+
+    Args:
+        families (list): Keys of TOKENIZER_URLS; all of them if None
+        tokenizer_dir (str): Directory to store them in
+        timeout (int): Network timeout per file in seconds
+
+    Returns:
+        list: Paths of the files written
+    """
+    tokenizer_dir = tokenizer_dir or os.environ.get("LLMGREP_TOKENIZER_DIR") or DEFAULT_TOKENIZER_DIR
+    os.makedirs(tokenizer_dir, exist_ok=True)
+    written = []
+    for family in families or TOKENIZER_URLS:
+        path = os.path.join(tokenizer_dir, f"{family}.json")
+        with urllib.request.urlopen(TOKENIZER_URLS[family], timeout=timeout) as response:
+            data = response.read()
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        written.append(path)
+    return written
+
+def _default_token_counter():
+    # Only local files: tiktoken is opt-in because it downloads its encoding on first use
+    path = tokenizer_path()
+    if os.path.isfile(path):
+        try:
+            return HuggingFaceTokenCounter(path)
+        except Exception:
+            pass
+    return CharTokenCounter()
+
+def get_token_counter():
+    """
+    Return the process-wide token counter.
+
+    The tokenizer is chosen by LLMGREP_TOKENIZER (``hf:<tokenizer.json>``,
+    ``tiktoken[:encoding]`` or ``chars``). Without it, the local
+    tokenizer.json matching LLMGREP_TOKENIZER_MODEL (the default model
+    otherwise) is used, and the 4-characters-per-token estimate only if
+    that file or the ``tokenizers`` package is missing. Nothing is
+    downloaded at runtime.
+
+    Returns:
+        TokenCounter: Shared counter instance
+    """
+    global _token_counter
+
+    with _token_counter_lock:
+        if _token_counter is None:
+            spec = os.environ.get("LLMGREP_TOKENIZER")
+            if spec:
+                _token_counter = _create_token_counter(spec)
+            else:
+                _token_counter = _default_token_counter()
+        return _token_counter
+
+def set_token_counter(counter):
+    """
+    Replace the process-wide token counter.
+
+    Args:
+        counter (TokenCounter): Counter to use, or None to re-resolve from the environment
+    """
+    global _token_counter
+
+    with _token_counter_lock:
+        _token_counter = counter
+
+def count_tokens(text):
+    """
+    Count the tokens in a text using per-line memoized counts.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Token count, including one token per newline
+    """
+    counter = get_token_counter()
+    lines = text.split('\n')
+    return sum(counter.count_line(line) for line in lines) + len(lines) - 1
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Truncate text to a token budget, preferring to cut at line boundaries.
+
+    Args:
+        text (str): Text to truncate
+        max_tokens (int): Maximum number of tokens to keep
+
+    Returns:
+        str: Prefix of ``text`` that fits within the budget
+    """
+    if max_tokens <= 0:
+        return ""
+
+    counter = get_token_counter()
+    used = 0
+    end = 0
+
+    for line in text.split('\n'):
+        line_tokens = counter.count_line(line) + 1  # +1 for newline
+        if used + line_tokens > max_tokens:
+            if end == 0:
+                # A single oversized first line: binary search a prefix that fits
+                low, high = 0, len(line)
+                while low < high:
+                    mid = (low + high + 1) // 2
+                    if counter.count(line[:mid]) <= max_tokens:
+                        low = mid
+                    else:
+                        high = mid - 1
+                return line[:low]
+            break
+        used += line_tokens
+        end += len(line) + 1
+
+    return text[:max(end - 1, 0)] if end < len(text) + 1 else text
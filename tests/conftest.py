@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# Let the tests import the ``src`` package when run as ``pytest tests/`` from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.tokens import CharTokenCounter, set_token_counter
+
+@pytest.fixture(autouse=True)
+def char_token_counter():
+    """Count tokens as characters / 4 so chunk sizes do not depend on a local tokenizer."""
+    set_token_counter(CharTokenCounter())
+    yield
+    set_token_counter(None)
@@ -0,0 +1,75 @@
+import os
+
+from src.core.file_utils import _gitignore_pattern_to_regex, iter_code_files
+
+def matches(pattern, path):
+    return bool(_gitignore_pattern_to_regex(pattern).match(path))
+
+def test_pattern_without_slash_matches_at_any_depth():
+    assert matches("*.log", "debug.log")
+    assert matches("*.log", "logs/nested/debug.log")
+    assert not matches("*.log", "debug.log.txt")
+
+def test_anchored_pattern_matches_from_the_root_only():
+    assert matches("/build", "build")
+    assert not matches("/build", "src/build")
+    assert matches("docs/*.md", "docs/index.md")
+    assert not matches("docs/*.md", "docs/api/index.md")
+
+def test_double_star_and_character_classes():
+    assert matches("**/generated", "generated")
+    assert matches("**/generated", "a/b/generated")
+    assert matches("vendor/**", "vendor/lib/x.py")
+    assert matches("a/**/b", "a/b")
+    assert matches("a/**/b", "a/x/y/b")
+    assert matches("file?.py", "file1.py")
+    assert not matches("file?.py", "file10.py")
+    assert matches("[!a]bc.py", "xbc.py")
+    assert not matches("[!a]bc.py", "abc.py")
+
+def write(root, relative, content="print('hi')\n"):
+    path = os.path.join(root, *relative.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(path, mode) as f:
+        f.write(content)
+    return path
+
+def relative_paths(root, **kwargs):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path, _ in iter_code_files(str(root), **kwargs)]
+
+def test_iter_code_files_filters_and_orders(tmp_path):
+    write(tmp_path, "b.py")
+    write(tmp_path, "a.js", "let a = 1;\n")
+    write(tmp_path, "notes.txt", "not code\n")
+    write(tmp_path, "blob.py", b"\x00\x01binary")
+    write(tmp_path, "big.py", "x = 1\n" * 100)
+    write(tmp_path, ".hidden/secret.py")
+    write(tmp_path, "pkg/z.py")
+    write(tmp_path, "pkg/sub/y.py")
+
+    assert relative_paths(tmp_path, max_file_size=100) == ["a.js", "b.py", "pkg/z.py", "pkg/sub/y.py"]
+
+def test_iter_code_files_honors_nested_gitignore(tmp_path):
+    write(tmp_path, ".gitignore", "build/\n*.gen.py\n!keep.gen.py\n")
+    write(tmp_path, "main.py")
+    write(tmp_path, "out.gen.py")
+    write(tmp_path, "keep.gen.py")
+    write(tmp_path, "build/artifact.py")
+    write(tmp_path, "src/.gitignore", "/local.py\n")
+    write(tmp_path, "src/local.py")
+    write(tmp_path, "src/app.py")
+    write(tmp_path, "src/deep/local.py")
+
+    assert relative_paths(tmp_path) == ["keep.gen.py", "main.py", "src/app.py", "src/deep/local.py"]
+    assert len(relative_paths(tmp_path, respect_gitignore=False)) == 7
+
+def test_iter_code_files_reads_lazily(tmp_path):
+    path = write(tmp_path, "lazy.py", "value = 1\n")
+
+    (found, read_content), = iter_code_files(str(tmp_path))
+    with open(path, "w") as f:
+        f.write("value = 2\n")
+
+    assert found == path
+    assert read_content() == "value = 2\n"
@@ -0,0 +1,38 @@
+import json
+
+from src.core.findings import format_findings, group_findings, project_findings
+
+def semgrep_finding(check_id, line, message, severity="WARNING", path="app.py"):
+    return {
+        "check_id": check_id,
+        "path": path,
+        "start": {"line": line},
+        "end": {"line": line},
+        "extra": {"severity": severity, "message": message, "lines": f"line {line}"}
+    }
+
+RESULTS = {"results": [
+    semgrep_finding("eval-use", 3, "Avoid eval on 'expr'"),
+    semgrep_finding("sql-injection", 10, "Query built from 'name'", severity="ERROR"),
+    semgrep_finding("eval-use", 7, "Avoid eval on 'code'"),
+    semgrep_finding("debug-flag", 40, "Debug enabled", severity="INFO")
+]}
+
+def test_project_findings_selects_overlapping_lines():
+    assert [f["start"]["line"] for f in project_findings(RESULTS, 1, 10)] == [3, 10, 7]
+    assert project_findings(RESULTS, 11, 39) == []
+
+def test_format_findings_matches_group_findings():
+    findings = project_findings(RESULTS, 1, 100)
+
+    entries = json.loads(format_findings(findings))
+
+    assert entries == [
+        {"check_id": "sql-injection", "severity": "ERROR", "lines": [10], "message": "Query built from 'name'"},
+        {"check_id": "eval-use", "severity": "WARNING", "lines": [3, 7], "message": "Avoid eval on 'expr'"},
+        {"check_id": "debug-flag", "severity": "INFO", "lines": [40], "message": "Debug enabled"}
+    ]
+    assert [entry["check_id"] for entry in entries] == [group["check_id"] for group in group_findings(findings)]
+
+def test_format_findings_without_findings():
+    assert format_findings([]) == "No Semgrep findings in this section."
@@ -0,0 +1,122 @@
+import os
+import subprocess
+
+from src.core.git_diff import get_changed_hunks, parse_unified_diff, ranges_overlap
+
+def test_single_file_hunks():
+    diff = (
+        "diff --git a/app.py b/app.py\n"
+        "index 1111111..2222222 100644\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -3 +3,2 @@ def main():\n"
+        "-    run()\n"
+        "+    setup()\n"
+        "+    run()\n"
+        "@@ -10,0 +12 @@\n"
+        "+    cleanup()\n"
+    )
+    assert parse_unified_diff(diff) == {"app.py": [(3, 4), (12, 12)]}
+
+def test_added_line_starting_with_plus_plus_is_not_a_file_header():
+    # "++ i;" added in a C file shows up as "+++ i;" inside the hunk body
+    diff = (
+        "diff --git a/loop.c b/loop.c\n"
+        "index 1111111..2222222 100644\n"
+        "--- a/loop.c\n"
+        "+++ b/loop.c\n"
+        "@@ -4,0 +5,2 @@ int count(void) {\n"
+        "+-- j;\n"
+        "+++ i;\n"
+        "@@ -20 +22 @@ int count(void) {\n"
+        "-    return i;\n"
+        "+    return i + j;\n"
+    )
+    assert parse_unified_diff(diff) == {"loop.c": [(5, 6), (22, 22)]}
+
+def test_multiple_files_and_deletions():
+    diff = (
+        "diff --git a/a.py b/a.py\n"
+        "index 1111111..2222222 100644\n"
+        "--- a/a.py\n"
+        "+++ b/a.py\n"
+        "@@ -5,2 +4,0 @@ def f():\n"
+        "-    x = 1\n"
+        "-    y = 2\n"
+        "diff --git a/b.py b/b.py\n"
+        "new file mode 100644\n"
+        "index 0000000..3333333\n"
+        "--- /dev/null\n"
+        "+++ b/b.py\n"
+        "@@ -0,0 +1,2 @@\n"
+        "+import os\n"
+        "+print(os.getcwd())\n"
+        "\\ No newline at end of file\n"
+        "diff --git a/gone.py b/gone.py\n"
+        "deleted file mode 100644\n"
+        "index 4444444..0000000\n"
+        "--- a/gone.py\n"
+        "+++ /dev/null\n"
+        "@@ -1 +0,0 @@\n"
+        "-print('bye')\n"
+    )
+    assert parse_unified_diff(diff) == {"a.py": [(4, 4)], "b.py": [(1, 2)]}
+
+def test_ranges_overlap():
+    ranges = [(5, 6), (22, 22)]
+    assert ranges_overlap(1, 5, ranges)
+    assert ranges_overlap(20, 30, ranges)
+    assert not ranges_overlap(7, 21, ranges)
+    assert not ranges_overlap(1, 4, [])
+
+def test_quoted_and_spaced_paths():
+    diff = (
+        "diff --git a/dir name/x.py b/dir name/x.py\n"
+        "--- a/dir name/x.py\t\n"
+        "+++ b/dir name/x.py\t\n"
+        "@@ -1,0 +2 @@\n"
+        "+b\n"
+        'diff --git "a/q\\"t.py" "b/q\\"t.py"\n'
+        '--- "a/q\\"t.py"\n'
+        '+++ "b/q\\"t.py"\n'
+        "@@ -1,0 +2 @@\n"
+        "+b\n"
+        'diff --git "a/\\303\\251\\tt.py" "b/\\303\\251\\tt.py"\n'
+        '--- "a/\\303\\251\\tt.py"\n'
+        '+++ "b/\\303\\251\\tt.py"\n'
+        "@@ -1,0 +2 @@\n"
+        "+b\n"
+        'diff --git "a/\xe9\\"s.py" "b/\xe9\\"s.py"\n'
+        '--- "a/\xe9\\"s.py"\n'
+        '+++ "b/\xe9\\"s.py"\n'
+        "@@ -1,0 +2 @@\n"
+        "+b\n"
+    )
+    assert parse_unified_diff(diff) == {
+        "dir name/x.py": [(2, 2)],
+        'q"t.py': [(2, 2)],
+        "\xe9\tt.py": [(2, 2)],
+        '\xe9"s.py': [(2, 2)]
+    }
+
+def test_get_changed_hunks_with_special_paths(tmp_path):
+    def git(*args):
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+    names = ["dir name/x.py", "\xe9.py", 'q"t.py']
+    git("init", "-q")
+    for name in names:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("a\n")
+    git("add", "-A")
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "init")
+    for name in names:
+        (tmp_path / name).write_text("a\nb\n")
+    (tmp_path / "n\xe9w.py").write_text("new\n")
+
+    changed = get_changed_hunks("HEAD", str(tmp_path))
+
+    assert changed == {
+        **{os.path.join(str(tmp_path), name): [(2, 2)] for name in names},
+        os.path.join(str(tmp_path), "n\xe9w.py"): [(1, 2)]
+    }
@@ -0,0 +1,91 @@
+import types
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.core import llm_cache
+from src.core.llm_cache import DiskLLMCache
+
+LLM_STRING = "model=fake temperature=0"
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's clock with one the test advances by hand."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+def generations(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+def cached_text(cache, prompt):
+    result = cache.lookup(prompt, LLM_STRING)
+    return None if result is None else result[0].message.content
+
+def entry_size(tmp_path, text):
+    probe = DiskLLMCache(str(tmp_path / "probe"))
+    probe.update("probe", LLM_STRING, generations(text))
+    return probe.stats()["size_bytes"]
+
+def test_round_trip_and_counters(tmp_path, clock):
+    cache = DiskLLMCache(str(tmp_path))
+
+    assert cached_text(cache, "prompt") is None
+    cache.update("prompt", LLM_STRING, generations("answer"))
+
+    assert cached_text(cache, "prompt") == "answer"
+    assert cache.lookup("prompt", "model=other") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 1
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = DiskLLMCache(str(tmp_path), ttl_seconds=60)
+    cache.update("prompt", LLM_STRING, generations("answer"))
+
+    clock.now += 60
+    assert cached_text(cache, "prompt") == "answer"
+
+    # Reading does not extend the lifetime; expiry counts from creation
+    clock.now += 1
+    assert cached_text(cache, "prompt") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    size = entry_size(tmp_path, "answer a")
+    cache = DiskLLMCache(str(tmp_path / "cache"), max_size_bytes=size * 2)
+
+    cache.update("a", LLM_STRING, generations("answer a"))
+    clock.now += 1
+    cache.update("b", LLM_STRING, generations("answer b"))
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cached_text(cache, "a") == "answer a"
+    clock.now += 1
+    cache.update("c", LLM_STRING, generations("answer c"))
+
+    assert cached_text(cache, "b") is None
+    assert cached_text(cache, "a") == "answer a"
+    assert cached_text(cache, "c") == "answer c"
+    assert cache.stats()["size_bytes"] <= size * 2
+
+def test_clear_removes_entries_and_counters(tmp_path, clock):
+    cache = DiskLLMCache(str(tmp_path))
+    cache.update("prompt", LLM_STRING, generations("answer"))
+    cached_text(cache, "prompt")
+
+    cache.clear()
+
+    assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "size_bytes": 0}
+
+def test_unreadable_entries_count_as_misses(tmp_path, clock):
+    cache = DiskLLMCache(str(tmp_path))
+    cache.update("prompt", LLM_STRING, generations("answer"))
+    with cache._connect() as conn:
+        conn.execute("UPDATE responses SET value = ?", ('["{\\"lc\\": 1, \\"type\\": \\"constructor\\"}"]',))
+
+    assert cached_text(cache, "prompt") is None
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,31 @@
+from src.core.security import _bound_analysis
+from src.core.vulnerabilities import parse_findings
+from src.utils.tokens import count_tokens
+
+FINDINGS = '''```json
+[{"title": "SQL Injection", "classification": "CWE-89", "severity": "high", "lines": [12]},
+ {"title": "Use of eval", "classification": "CWE-95", "severity": "medium", "lines": [40]}]
+```'''
+
+def test_bound_analysis_keeps_short_analyses_without_reasoning():
+    analysis = f"<think>Let me check the parts.</think>\n\n1. **VULNERABILITY**: SQL Injection\n\n{FINDINGS}"
+
+    assert _bound_analysis(analysis, max_tokens=1000) == analysis.split("</think>", 1)[1].strip()
+
+def test_bound_analysis_truncates_prose_but_keeps_findings_whole():
+    code_sample = "\n".join(f"    query_{i} = build_query(user_input_{i})" for i in range(200))
+    analysis = (
+        "<think>" + "reasoning " * 500 + "</think>\n"
+        f"1. **VULNERABILITY**: SQL Injection\n   **FIX**: Use parameters:\n```python\n{code_sample}\n```\n\n"
+        f"{FINDINGS}"
+    )
+
+    bounded = _bound_analysis(analysis, max_tokens=300)
+
+    assert "<think>" not in bounded and "reasoning" not in bounded
+    assert bounded.startswith("1. **VULNERABILITY**: SQL Injection")
+    assert count_tokens(bounded) <= 320
+    assert sum(1 for line in bounded.split("\n") if line.startswith("```")) % 2 == 0
+    assert [(f.title, f.lines) for f in parse_findings(bounded)] == [
+        ("SQL Injection", [12]), ("Use of eval", [40])
+    ]
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from src.core import semgrep
+from src.core.semgrep import _strip_rule_id_prefixes, _write_cache_entry
+
+def test_rule_ids_from_local_rules_lose_their_path_prefix(tmp_path, monkeypatch):
+    rules_dir = tmp_path / "rule_bundles" / "477ed00dc2b9" / "rules"
+    rules_dir.mkdir(parents=True)
+    (rules_dir / "custom.yaml").write_text("rules: []\n")
+    monkeypatch.chdir(tmp_path)
+    absolute_prefix = ".".join(part for part in str(rules_dir).split(os.sep) if part)
+
+    results = {
+        "results": [
+            {"check_id": "rule_bundles.477ed00dc2b9.rules.os-system"},
+            {"check_id": "rule_bundles.477ed00dc2b9.rules.python.lang.security.audit.eval"},
+            {"check_id": f"{absolute_prefix}.sql-injection"}
+        ],
+        "errors": [{"rule_id": "rule_bundles.477ed00dc2b9.rules.broken-rule"}, {"message": "no rule"}]
+    }
+
+    for configs in (["rule_bundles/477ed00dc2b9/rules"], [str(rules_dir / "custom.yaml")]):
+        stripped = _strip_rule_id_prefixes({key: [dict(item) for item in value] for key, value in results.items()},
+                                           configs)
+        assert [finding["check_id"] for finding in stripped["results"]] == [
+            "os-system", "python.lang.security.audit.eval", "sql-injection"
+        ]
+        assert stripped["errors"] == [{"rule_id": "broken-rule"}, {"message": "no rule"}]
+
+def test_registry_rule_ids_are_left_alone():
+    results = {"results": [{"check_id": "python.lang.security.audit.eval"}], "errors": []}
+
+    assert _strip_rule_id_prefixes(results, ["auto", "p/default"]) == results
+
+def test_cache_entries_are_written_atomically(tmp_path, monkeypatch):
+    entry_path = tmp_path / "entry.json"
+    entry_path.write_text('{"results": [{"check_id": "old"}], "errors": []}')
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(semgrep.json, "dump", fail)
+    with pytest.raises(OSError):
+        _write_cache_entry(str(entry_path), {"results": [], "errors": []})
+
+    # The old entry is untouched and no temporary file is left behind
+    assert entry_path.read_text() == '{"results": [{"check_id": "old"}], "errors": []}'
+    assert os.listdir(tmp_path) == ["entry.json"]
+
+    monkeypatch.undo()
+    _write_cache_entry(str(entry_path), {"results": [], "errors": []})
+    assert entry_path.read_text() == '{"results": [], "errors": []}'
@@ -0,0 +1,82 @@
+from src.utils.code_structure import find_block_boundaries
+from src.utils.text_chunk import iter_code_chunks
+from src.utils.tokens import count_tokens
+
+PYTHON_CODE = '''import os
+
+# Helper comment
+@decorator
+def first():
+    return 1
+
+
+class Second:
+    def method(self):
+        return 2
+'''
+
+JS_CODE = '''// Adds two numbers
+function add(a, b) {
+  return a + b;
+}
+/* block
+   comment */
+const sub = (a, b) => {
+  return a - b;
+};
+'''
+
+def test_python_boundaries_include_decorators_and_comments():
+    assert find_block_boundaries(PYTHON_CODE, ".py") == [0, 2, 8]
+
+def test_brace_language_boundaries():
+    # Top-level comments are boundaries of their own; nested lines never are
+    assert find_block_boundaries(JS_CODE, "js") == [0, 1, 4, 6]
+
+def test_unparsable_python_treats_double_slash_as_an_operator():
+    # Python 2 print statement forces the heuristic path
+    code = 'print "total"\nratio = total // count + scale(\n1)\ndone = True\n'
+    assert find_block_boundaries(code, "py") == [0, 1, 3]
+
+def test_small_code_is_a_single_chunk():
+    assert list(iter_code_chunks(PYTHON_CODE, chunk_size=2000)) == [
+        (PYTHON_CODE, (1, len(PYTHON_CODE.split("\n"))))
+    ]
+
+def test_chunks_follow_blocks_and_cover_every_line():
+    functions = [f"def f{i}():\n    return {i} * {i}\n" for i in range(30)]
+    code = "\n".join(functions)
+    lines = code.split("\n")
+
+    chunks = list(iter_code_chunks(code, chunk_size=40, language=".py"))
+
+    assert len(chunks) > 1
+    expected_start = 1
+    for text, (start, end) in chunks:
+        assert start == expected_start
+        assert text == "\n".join(lines[start - 1:end])
+        assert lines[start - 1].startswith("def ") or not lines[start - 1]
+        assert count_tokens(text) <= 40
+        expected_start = end + 1
+    assert expected_start == len(lines) + 1
+
+def test_oversized_block_is_split_by_lines():
+    body = "\n".join(f"    value_{i} = compute({i})" for i in range(50))
+    code = f"def big():\n{body}\n"
+
+    chunks = list(iter_code_chunks(code, chunk_size=30, language=".py"))
+
+    assert len(chunks) > 1
+    assert [line for text, _ in chunks for line in text.split("\n")] == code.split("\n")
+
+def test_overlap_repeats_previous_lines_within_budget():
+    code = "\n".join(f"def f{i}():\n    return {i} * {i}\n" for i in range(20))
+
+    chunks = list(iter_code_chunks(code, chunk_size=25, overlap_lines=2, language=".py"))
+
+    assert len(chunks) > 1
+    overlaps = [previous_end - start + 1
+                for (_, (_, previous_end)), (_, (start, _)) in zip(chunks, chunks[1:])]
+    assert any(overlaps)
+    assert all(0 <= overlap <= 2 for overlap in overlaps)
+    assert all(count_tokens(text) <= 25 for text, _ in chunks)
@@ -0,0 +1,102 @@
+from src.core.vulnerabilities import extract_findings, parse_findings, strip_findings_block
+
+PART_ONE = '''## Analysis Part 1/2
+
+1. **VULNERABILITY**: SQL Injection
+   **SEVERITY**: High
+
+```json
+[{"title": "SQL Injection", "classification": "CWE-89", "severity": "High", "lines": [12]}]
+```'''
+
+PART_TWO = '''## Analysis Part 2/2
+
+Use a JSON config such as:
+
+```json
+{"debug": false}
+```
+
+```json
+[{"vulnerability": "SQL Injection", "cwe": "CWE-89", "severity": "critical", "line": "40",},
+ {"title": "Use of eval", "type": "CWE-95", "level": "medium", "lines": "7, 9"}]
+```'''
+
+def test_parse_findings_reads_every_block():
+    findings = parse_findings(PART_ONE + "\n\n" + PART_TWO)
+
+    assert [(f.title, f.classification, f.severity, f.lines) for f in findings] == [
+        ("SQL Injection", "CWE-89", "high", [12]),
+        ("SQL Injection", "CWE-89", "critical", [40]),
+        ("Use of eval", "CWE-95", "medium", [7, 9])
+    ]
+
+def test_parse_findings_ignores_reasoning_and_falls_back_to_markdown():
+    text = '''<think>```json
+[{"title": "Guess"}]
+```</think>
+1. **VULNERABILITY**: Command Injection
+   **CLASSIFICATION**: CWE-78
+   **SEVERITY**: Critical
+   **RISK**: Shell metacharacters run commands.
+   **FIX**: Pass an argument list.
+2. **VULNERABILITY**: Weak Hash
+   **SEVERITY**: Low
+'''
+    findings = parse_findings(text)
+
+    assert [(f.title, f.classification, f.severity) for f in findings] == [
+        ("Command Injection", "CWE-78", "critical"),
+        ("Weak Hash", "", "low")
+    ]
+    assert findings[0].fix == "Pass an argument list."
+
+def test_strip_findings_block_removes_every_findings_block_only():
+    stripped = strip_findings_block(PART_ONE + "\n\n" + PART_TWO)
+
+    assert "CWE-89" not in stripped
+    assert "Use of eval" not in stripped
+    assert '{"debug": false}' in stripped
+    assert "## Analysis Part 2/2" in stripped
+    assert "\n\n\n" not in stripped
+
+def test_strip_findings_block_without_blocks_is_unchanged():
+    assert strip_findings_block("No issues found.\n") == "No issues found.\n"
+    assert strip_findings_block(None) == ""
+
+def test_extract_findings_dedupes_across_blocks():
+    report, findings = extract_findings(PART_ONE + "\n\n" + PART_TWO, path="app.py")
+
+    assert "```json\n[" not in report
+    assert [(f.title, f.severity, f.lines, f.path) for f in findings] == [
+        ("SQL Injection", "critical", [12, 40], "app.py"),
+        ("Use of eval", "medium", [7, 9], "app.py")
+    ]
+
+def test_fenced_json_code_samples_survive_stripping():
+    text = '''1. **VULNERABILITY**: Permissive CORS
+   **FIX**: Restrict the origins:
+
+```json
+{"allowed_origins": ["https://app.example.com"]}
+```
+
+```json
+[{"path": "/api", "methods": ["GET"]}]
+```
+
+```json
+{"findings": [{"title": "Permissive CORS", "classification": "CWE-942", "severity": "medium"}]}
+```'''
+    stripped = strip_findings_block(text)
+
+    assert '{"allowed_origins": ["https://app.example.com"]}' in stripped
+    assert '[{"path": "/api", "methods": ["GET"]}]' in stripped
+    assert "CWE-942" not in stripped
+    assert [finding.title for finding in parse_findings(text)] == ["Permissive CORS"]
+
+def test_strip_findings_block_keeps_blank_lines_in_code_samples():
+    sample = "```python\nimport os\n\n\n\ndef main():\n    pass\n```"
+    text = f"Report\n\n{sample}\n\n\n\n```json\n[]\n```\n\n\nClosing note\n"
+
+    assert strip_findings_block(text) == f"Report\n\n{sample}\n\nClosing note"